@@ -316,10 +316,15 @@ def cmd_transform_tables(args):
             api_key=args.api_key,
             model=args.model,
             delay_seconds=args.delay,
-            cost_limit_usd=args.cost_limit
+            cost_limit_usd=args.cost_limit,
+            max_concurrent=args.max_concurrent,
+            requests_per_minute=args.requests_per_minute,
+            tokens_per_minute=args.tokens_per_minute,
+            tables_per_batch=args.tables_per_batch,
+            cache_dir=args.cache_dir
         )
         
-        report = transformer.transform(dry_run=args.dry_run)
+        report = transformer.transform(dry_run=args.dry_run, batch_mode=args.batch_api)
         
         if args.dry_run:
             print(f"\n✅ Dry run complete")
@@ -415,10 +420,16 @@ Examples:
     transform_parser.add_argument('table_list', help='Table list file')
     transform_parser.add_argument('--dry-run', action='store_true', help='Estimate cost without executing')
     transform_parser.add_argument('--model', default='gpt-4o-mini', help='OpenAI model (default: gpt-4o-mini)')
-    transform_parser.add_argument('--delay', type=float, default=1.0, help='Delay between API calls (default: 1.0)')
+    transform_parser.add_argument('--delay', type=float, default=1.0, help='Average delay between API calls, used as a request rate limit (default: 1.0)')
+    transform_parser.add_argument('--max-concurrent', type=int, default=8, help='Maximum tables transformed at once (default: 8)')
+    transform_parser.add_argument('--requests-per-minute', type=int, help='OpenAI requests-per-minute limit (default: derived from --delay)')
+    transform_parser.add_argument('--tokens-per-minute', type=int, help='OpenAI tokens-per-minute limit (default: no limit)')
+    transform_parser.add_argument('--tables-per-batch', type=int, default=1, help='Maximum tables sent in one API request (default: 1)')
+    transform_parser.add_argument('--batch-api', action='store_true', help='Submit tables through the OpenAI Batch API at half the cost and wait for the results (up to 24h)')
     transform_parser.add_argument('--cost-limit', type=float, default=5.0, help='Maximum cost in USD (default: 5.0)')
     transform_parser.add_argument('--output-dir', help='Output directory')
     transform_parser.add_argument('--api-key', help='OpenAI API key (if not in .env)')
+    transform_parser.add_argument('--cache-dir', help='Cache transformed tables here; re-runs reuse identical tables without API calls')
     
     # Query command
     query_parser = subparsers.add_parser('query', help='Query ChromaDB collection')
@@ -8,16 +8,32 @@ Features intelligent chunking, entity-aware retrieval, and adaptive semantic fil
 __version__ = "1.0.0"
 __author__ = "GravityCar"
 
-# Main classes available for library use
-from .query.docling_query import DnDRAG
-from .embedders.embedder_orchestrator import EmbedderOrchestrator
-from .embedders.base_embedder import Embedder
-from .embedders.monster_book_embedder import MonsterBookEmbedder
-from .embedders.rule_book_embedder import RuleBookEmbedder
-from .chunkers.monster_encyclopedia import MonsterEncyclopediaChunker
-from .chunkers.players_handbook import PlayersHandbookChunker
-from .utils.config import get_chroma_connection_params, get_openai_api_key, get_default_collection_name
-from .utils.chromadb_connector import ChromaDBConnector
+# Main classes available for library use. They are resolved lazily (PEP 562) so
+# that running a submodule (e.g. `python -m src.transformers.cli --help`) does
+# not import openai/chromadb through this package initializer.
+_LAZY_EXPORTS = {
+    "DnDRAG": ".query.docling_query",
+    "EmbedderOrchestrator": ".embedders.embedder_orchestrator",
+    "Embedder": ".embedders.base_embedder",
+    "MonsterBookEmbedder": ".embedders.monster_book_embedder",
+    "RuleBookEmbedder": ".embedders.rule_book_embedder",
+    "MonsterEncyclopediaChunker": ".chunkers.monster_encyclopedia",
+    "PlayersHandbookChunker": ".chunkers.players_handbook",
+    "ChromaDBConnector": ".utils.chromadb_connector",
+    "get_chroma_connection_params": ".utils.config",
+    "get_openai_api_key": ".utils.config",
+    "get_default_collection_name": ".utils.config",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value  # Cache so later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "DnDRAG",
@@ -66,7 +66,7 @@ class Embedder(ABC):
         print(f"Using OpenAI embedding model: {self.embedding_model_name}...")
 
         # Initialize ChromaDB connector
-        self.chroma = ChromaDBConnector(chroma_host, chroma_port)
+        self.chroma = ChromaDBConnector.get_instance(chroma_host, chroma_port)
         print(f"Connecting to ChromaDB at {self.chroma.chroma_host}:{self.chroma.chroma_port}...")
 
         # Get or create collection
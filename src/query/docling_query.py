@@ -6,36 +6,220 @@ Retrieves relevant chunks from ChromaDB and generates answers using OpenAI's GPT
 Supports both Player's Handbook and Monster Manual collections.
 """
 
-from openai import OpenAI
 from pathlib import Path
 import os
 import argparse
+import asyncio
+import bisect
+import copy
+import io
 import sys
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 
 # Import our centralized configuration
-from ..utils.config import get_openai_api_key, get_default_collection_name
-from ..utils.chromadb_connector import ChromaDBConnector
+from ..utils.config import get_openai_api_key, get_default_collection_name, get_env_string
 from ..utils.rag_output import RAGOutput
+from ..utils.response_cache import ResponseCache
+from .query_must_filter import (
+    satisfies_query_must, parse_query_must, compile_query_must, compile_query_must_json, filter_chunks
+)
+
+# Comparison query patterns: "compare X and Y", "X vs Y", "X versus Y", "differences between X and Y"
+_COMPARISON_PATTERNS = [
+    re.compile(r'compare\s+(?:the\s+)?(.+?)\s+and\s+(?:the\s+)?(.+?)(?:\.|$|\?)', re.IGNORECASE),
+    re.compile(r'(.+?)\s+vs\.?\s+(.+?)(?:\.|$|\?)', re.IGNORECASE),
+    re.compile(r'(.+?)\s+versus\s+(.+?)(?:\.|$|\?)', re.IGNORECASE),
+    re.compile(r'differences?\s+between\s+(?:the\s+)?(.+?)\s+and\s+(?:the\s+)?(.+?)(?:\.|$|\?)', re.IGNORECASE),
+    re.compile(r'(?:the\s+)?(.+?)\s+and\s+(?:the\s+)?(.+?)\s+differ', re.IGNORECASE),
+]
+
+# Every comparison pattern requires at least one of these substrings (lowercase).
+# "and" is not listed: the patterns using it also require "compare" or "differ".
+_COMPARISON_TOKENS = ('compare', 'vs', 'versus', 'differ')
+
+# Question phrasing that signals a short lookup answer vs. a long descriptive one
+# (used by DnDRAG._estimate_max_tokens; long phrasing wins when both appear)
+_SHORT_ANSWER_PHRASES = ('how many', 'how much', 'what is', 'roll to hit', 'what level', 'what number')
+_LONG_ANSWER_PHRASES = ('tell me about', 'describe', 'explain', 'compare', 'difference', 'versus', ' vs')
+
+# Fields requested from collection.query(); embeddings are never read, so never transfer them
+_QUERY_INCLUDE = ["documents", "metadatas", "distances"]
+
+# System prompt for answer generation. Defined once at module level so every request
+# sends byte-identical leading tokens, which lets OpenAI's automatic prompt caching
+# reuse the prefix across queries. Keep volatile content (context, question) out of it.
+SYSTEM_PROMPT = """You are a knowledgeable Dungeon Master assistant for Advanced Dungeons & Dragons 1st Edition.
+
+Your role is to provide accurate, helpful answers based on the official rulebooks. When answering:
+1. Be precise and cite the specific rules context element you are using to establish your answer.
+2. If the context contains tables, READ THEM CAREFULLY:
+   - Identify the correct row (first column)
+   - Identify the correct column header
+   - Show the EXACT intersection value you're using
+   - Double-check your reading before calculating
+3. If the context contains JSON notation:
+   - Parse the JSON into an object
+   - Then parse the object's properties to search for your answer.
+   - Explain which properties you are using and why.
+4. When calculating combat probabilities:
+   - Explain which piece of context you're getting your numbers from.
+   - Apply ALL relevant modifiers (strength "to hit" bonus, dexterity bonuses, etc.)
+   - Modifiers REDUCE the required die roll (a +1 bonus means you need to roll 1 less)
+5. If information is not in the provided context, say so clearly
+6. Use D&D terminology correctly
+7. Show your work step-by-step for complex calculations
+
+The context below comes from official AD&D 1st Edition rulebooks. Use this context AND ONLY this context to answer.
+
+IMPORTANT: you must only use the provided context to answer questions. If the context doesn't provide enough information, explain what might additional information you need.
+"""
+
+# Background worker for speculative ChromaDB re-queries during query_must filtering.
+# Threads are only started on first submit.
+_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dndrag-prefetch")
+
+
+@dataclass(slots=True)
+class Hit:
+    """A single retrieved chunk (one row of a ChromaDB query result)."""
+    id: str
+    document: str
+    metadata: dict
+    distance: float
+
+
+def _hits_from_results(results: dict) -> list:
+    """Convert a ChromaDB query result (single query) into a list of Hit records."""
+    return [
+        Hit(chunk_id, document, metadata, distance)
+        for chunk_id, document, metadata, distance in zip(
+            results['ids'][0],
+            results['documents'][0],
+            results['metadatas'][0],
+            results['distances'][0]
+        )
+    ]
+
+
+def _hits_to_results(hits: list) -> dict:
+    """Convert Hit records back into the ChromaDB query results format."""
+    return {
+        'ids': [[hit.id for hit in hits]],
+        'documents': [[hit.document for hit in hits]],
+        'metadatas': [[hit.metadata for hit in hits]],
+        'distances': [[hit.distance for hit in hits]]
+    }
+
+
+@lru_cache(maxsize=2048)
+def _chunk_info_string(name, book, hierarchy, current_num, total_num) -> str:
+    """Build the "NAME [book: BOOK] [hierarchy] [chunk X of Y]" string for DnDRAG._format_chunk_info."""
+    hierarchy_str = f" [{hierarchy}]" if hierarchy else ""
+    
+    # Format chunk numbering
+    chunk_num_str = ""
+    if current_num is not None and total_num is not None:
+        chunk_num_str = f" [chunk {current_num}/{total_num}]"
+    
+    return f"{name} [book: {book}]{hierarchy_str}{chunk_num_str}"
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two word sets (1.0 for two empty sets)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _format_default_context(name: str, metadata: dict, doc: str) -> str:
+    return f"### {name}\n\n{doc}"
+
+
+def _format_table_context(name: str, metadata: dict, doc: str) -> str:
+    # Include table title prominently
+    return f"## {name}\n\n{doc}"
+
+
+# format_context() formatters by chunk type (any other 'table*' type uses
+# _format_table_context, everything else _format_default_context).
+# For monsters and categories, the doc already has the header with statistics
+# so we don't need to add extra formatting.
+_CONTEXT_FORMATTERS = {
+    'monster': lambda name, metadata, doc: doc,
+    'category': lambda name, metadata, doc: doc,
+    'spell': lambda name, metadata, doc: f"## {name}\n{metadata.get('spell_school', '')}\n\n{doc}",
+    'monster_entry': lambda name, metadata, doc: f"## {name}\n\n{doc}",
+}
+
+
+def _extract_comparison_entities(query: str) -> list:
+    """Extract the two entity names from a comparison query.
+    
+    Args:
+        query: The search query
+        
+    Returns:
+        [entity1, entity2] if the query is a comparison, otherwise []
+    """
+    query_lower = query.lower()
+    # Cheap substring prefilter: most queries are not comparisons, so skip
+    # the regex scan entirely unless a trigger token is present
+    if not any(token in query_lower for token in _COMPARISON_TOKENS):
+        return []
+    
+    for pattern in _COMPARISON_PATTERNS:
+        match = pattern.search(query_lower)
+        if match:
+            # Extract entity names and clean them
+            entity1 = match.group(1).strip()
+            entity2 = match.group(2).strip()
+            # Remove trailing words like "summarize", "what are", etc.
+            for stop_word in ['summarize', 'what are', 'how do', 'explain']:
+                entity2 = re.sub(rf'\s+{stop_word}.*$', '', entity2, flags=re.IGNORECASE)
+            return [entity1, entity2]
+    
+    return []
 
 
 class DnDRAG:
+    # Word-set overlap at which two same-entity chunks count as duplicates in format_context
+    NEAR_DUPLICATE_JACCARD = 0.85
+    # Metadatas fetched per call while probing for query_must in __init__
+    QUERY_MUST_PROBE_PAGE_SIZE = 1000
+    
     def __init__(
         self,
         collection_name: str = None,
         model: str = "gpt-4o-mini",
         chroma_host: str = None,
         chroma_port: int = None,
-        output: RAGOutput = None
+        output: RAGOutput = None,
+        cache_dir: str = None
     ):
         # Initialize output buffer (create new instance if not provided)
         self.output = output if output else RAGOutput()
         
+        # Optional on-disk answer cache (explicit dir, else generate_cache_dir from .env)
+        if cache_dir is None:
+            cache_dir = get_env_string('generate_cache_dir')
+        self.response_cache = ResponseCache(cache_dir) if cache_dir else None
+        
         # Use default collection name if not provided
         if collection_name is None:
             collection_name = get_default_collection_name()
         self.collection_name = collection_name
         self.model = model
         
+        # Heavy client libraries are imported here rather than at module level so
+        # `python -m src.query.docling_query --help` does not load them
+        from openai import OpenAI, AsyncOpenAI
+        from ..utils.chromadb_connector import ChromaDBConnector
+        
         api_key = get_openai_api_key()
         
         self.output.info(f"Initializing D&D RAG system...")
@@ -45,6 +229,7 @@ class DnDRAG:
         # Initialize OpenAI client
         try:
             self.openai_client = OpenAI(api_key=api_key)
+            self.async_openai_client = AsyncOpenAI(api_key=api_key)  # For aquery()
             self.output.info(f"  ✅ OpenAI client initialized")
         except Exception as e:
             self.output.error(f"  ❌ Failed to initialize OpenAI client: {e}")
@@ -59,7 +244,7 @@ class DnDRAG:
         
         # Connect to ChromaDB using connector
         self.output.info(f"  Connecting to ChromaDB...")
-        self.chroma = ChromaDBConnector(chroma_host, chroma_port)
+        self.chroma = ChromaDBConnector.get_instance(chroma_host, chroma_port)
         self.output.info(f"  ChromaDB: {self.chroma.chroma_host}:{self.chroma.chroma_port}")
         
         try:
@@ -69,6 +254,37 @@ class DnDRAG:
             self.output.error(f"  ❌ Error: Collection '{collection_name}' not found")
             self.output.error(f"     Available collections: {[c.name for c in self.chroma.list_collections()]}")
             raise
+        
+        # Probe once whether any chunk carries query_must metadata. Collections
+        # without it can skip the iterative filtering machinery entirely.
+        try:
+            self._has_query_must = self._collection_has_query_must()
+        except Exception:
+            # Probe unsupported or failed: assume filtering is needed
+            self._has_query_must = True
+        if not self._has_query_must:
+            self.output.info("  No query_must metadata in collection (filtering not needed)")
+    
+    def _collection_has_query_must(self) -> bool:
+        """
+        Check whether any chunk in the collection has a query_must metadata key.
+        
+        ChromaDB has no key-exists filter ($ne also matches chunks without the
+        key), so metadatas are paged through until one carrying the key is found.
+        """
+        offset = 0
+        while True:
+            page = self.collection.get(
+                include=["metadatas"],
+                limit=self.QUERY_MUST_PROBE_PAGE_SIZE,
+                offset=offset
+            )
+            metadatas = page['metadatas'] or []
+            if any(metadata and "query_must" in metadata for metadata in metadatas):
+                return True
+            if len(metadatas) < self.QUERY_MUST_PROBE_PAGE_SIZE:
+                return False
+            offset += len(metadatas)
     
     def get_embedding(self, text: str):
         """Get embedding from OpenAI API."""
@@ -94,25 +310,96 @@ class DnDRAG:
         Returns:
             Formatted string with: "NAME [book: BOOK] [hierarchy] [chunk X of Y]"
         """
-        # Get chunk name/title
-        name = metadata.get('title', metadata.get('name', 'Unknown'))
+        # Interactive sessions re-retrieve the same chunks, so the display
+        # string is cached by the fields it is built from
+        return _chunk_info_string(
+            metadata.get('title', metadata.get('name', 'Unknown')),
+            metadata.get('book', 'Unknown'),
+            # Heading hierarchy may be stored as 'hierarchy' or 'heading_hierarchy'
+            metadata.get('hierarchy', metadata.get('heading_hierarchy', '')),
+            current_num,
+            total_num
+        )
+    
+    def _apply_gap_cutoff(self, distances: list, k: int, distance_threshold: float, debug: bool = False,
+                          gap_threshold: float = 0.06, label: str = "", presorted: bool = False) -> int:
+        """Decide how many results to keep using adaptive gap detection.
+        
+        Strategy:
+        1. Look for the largest gap between consecutive distances
+        2. If gap > gap_threshold, cut there (indicates relevance drop-off)
+        3. Otherwise use distance_threshold as relative cutoff
+        4. Always keep at least 2 results, respect maximum k
+        
+        Args:
+            distances: Result distances (must be non-empty)
+            k: Maximum number of results to keep
+            distance_threshold: Maximum distance increase from best result
+            debug: If True, print detailed gap detection info
+            gap_threshold: Minimum gap size treated as a semantic cliff
+            label: Suffix for the debug gap analysis heading
+            presorted: True if distances are known to be ascending, allowing a
+                       binary search for the threshold cutoff. Base retrieval
+                       reorders results (entity/category injection), so it
+                       must leave this False.
+            
+        Returns:
+            Number of leading results to keep
+        """
+        # Calculate gaps between consecutive results
+        # Start from position 2 (skip gap after best result, which can be large
+        # simply because the best result is exceptionally good)
+        gaps = []
+        for i in range(2, min(len(distances), k)):
+            gap = distances[i] - distances[i-1]
+            gaps.append((i, gap))  # (position_after_gap, gap_size)
         
-        # Get book name
-        book = metadata.get('book', 'Unknown')
+        # Find the largest gap
+        max_gap_pos = None
+        max_gap_size = 0
         
-        # Get heading hierarchy (may be stored as 'hierarchy' or 'heading_hierarchy')
-        hierarchy = metadata.get('hierarchy', metadata.get('heading_hierarchy', ''))
-        if hierarchy:
-            hierarchy_str = f" [{hierarchy}]"
+        if gaps:
+            max_gap_pos, max_gap_size = max(gaps, key=lambda x: x[1])
+        
+        if debug and gaps:
+            self.output.info(f"  [DEBUG] Gap analysis{label}:")
+            for pos, gap in sorted(gaps, key=lambda x: x[1], reverse=True)[:3]:
+                self.output.info(f"    Position {pos}: gap={gap:.4f}")
+            self.output.info(f"  [DEBUG] Largest gap: {max_gap_size:.4f} at position {max_gap_pos}")
+        
+        # Strategy 1: Cut at large gap (semantic cliff detected)
+        if max_gap_size >= gap_threshold:
+            keep_count = max_gap_pos
+            strategy_used = f"gap detection (cliff at position {max_gap_pos}, gap={max_gap_size:.4f})"
+        # Strategy 2: Use relative distance threshold
         else:
-            hierarchy_str = ""
+            best_distance = distances[0]
+            cutoff_distance = best_distance + distance_threshold
+            if presorted:
+                keep_count = max(1, bisect.bisect_right(distances, cutoff_distance))
+            else:
+                # Count leading results within the cutoff (stop at the first one beyond it)
+                keep_count = 1
+                for i in range(1, len(distances)):
+                    if distances[i] <= cutoff_distance:
+                        keep_count += 1
+                    else:
+                        break
+            strategy_used = f"distance threshold (cutoff={cutoff_distance:.4f})"
+        
+        # Apply constraints
+        original_keep = keep_count
+        keep_count = max(2, keep_count) if len(distances) > 1 else 1  # Min 2 results
+        keep_count = min(keep_count, k)  # Respect max k
+        keep_count = min(keep_count, len(distances))  # Can't exceed what we have
         
-        # Format chunk numbering
-        chunk_num_str = ""
-        if current_num is not None and total_num is not None:
-            chunk_num_str = f" [chunk {current_num}/{total_num}]"
+        if debug:
+            self.output.info(f"  [DEBUG] Strategy: {strategy_used}")
+            self.output.info(f"  [DEBUG] Keep count: {original_keep} → {keep_count} (after constraints)")
+            if keep_count < len(distances):
+                self.output.info(f"  [DEBUG] Dropping {len(distances) - keep_count} results with distances: {distances[keep_count:]}")
         
-        return f"{name} [book: {book}]{hierarchy_str}{chunk_num_str}"
+        return keep_count
     
     def retrieve(self, query: str, k: int = 15, distance_threshold: float = 0.4, debug: bool = False, enable_filtering: bool = True, max_iterations: int = 3):
         """Retrieve top-k relevant chunks from ChromaDB with entity-aware enhancement and optional query_must filtering.
@@ -126,9 +413,12 @@ class DnDRAG:
             enable_filtering: If True, apply query_must filtering with iterative re-querying (default: True)
             max_iterations: Maximum iterations for re-querying when filtering is enabled (default: 3)
         """
-        if enable_filtering:
+        if enable_filtering and self._has_query_must:
             # Use iterative filtering wrapper
             return self._retrieve_with_filtering(query, k, distance_threshold, debug, max_iterations)
+        elif enable_filtering:
+            # Nothing in the collection can be filtered out: single query, same cutoff
+            return self._retrieve_unfiltered(query, k, distance_threshold, debug)
         else:
             # Use original retrieval logic
             return self._retrieve_base(query, k, distance_threshold, debug)
@@ -147,27 +437,7 @@ class DnDRAG:
         
         # Smart enhancement: Detect if query mentions multiple specific entities
         # Common comparison patterns: "compare X and Y", "X vs Y", "X versus Y", "differences between X and Y"
-        import re
-        comparison_patterns = [
-            r'compare\s+(?:the\s+)?(.+?)\s+and\s+(?:the\s+)?(.+?)(?:\.|$|\?)',
-            r'(.+?)\s+vs\.?\s+(.+?)(?:\.|$|\?)',
-            r'(.+?)\s+versus\s+(.+?)(?:\.|$|\?)',
-            r'differences?\s+between\s+(?:the\s+)?(.+?)\s+and\s+(?:the\s+)?(.+?)(?:\.|$|\?)',
-            r'(?:the\s+)?(.+?)\s+and\s+(?:the\s+)?(.+?)\s+differ',
-        ]
-        
-        entities_mentioned = []
-        for pattern in comparison_patterns:
-            match = re.search(pattern, query.lower(), re.IGNORECASE)
-            if match:
-                # Extract entity names and clean them
-                entity1 = match.group(1).strip()
-                entity2 = match.group(2).strip()
-                # Remove trailing words like "summarize", "what are", etc.
-                for stop_word in ['summarize', 'what are', 'how do', 'explain']:
-                    entity2 = re.sub(rf'\s+{stop_word}.*$', '', entity2, flags=re.IGNORECASE)
-                entities_mentioned = [entity1, entity2]
-                break
+        entities_mentioned = _extract_comparison_entities(query)
         
         # If we detected multiple entities, increase search results temporarily
         expanded_k = k
@@ -177,12 +447,16 @@ class DnDRAG:
         # Search
         results = self.collection.query(
             query_embeddings=[query_embedding],
-            n_results=expanded_k
+            n_results=expanded_k,
+            include=_QUERY_INCLUDE
         )
         
+        # Work on Hit records so every reorder/insert is a single list operation
+        hits = _hits_from_results(results)
+        
         # If entities were detected, ensure they're all in the results
         if entities_mentioned:
-            retrieved_names = [meta.get('name', '').lower() for meta in results['metadatas'][0]]
+            retrieved_names = [hit.metadata.get('name', '').lower() for hit in hits]
             missing_entities = []
             matched_indices = []  # Track indices of matched entities
             
@@ -218,141 +492,111 @@ class DnDRAG:
                 else:
                     missing_entities.append(entity)
             
-            # Move matched entities to the front of results (after position 0 which is best semantic match)
+            # Move matched entities to the front of results (highest original index first,
+            # matching the previous remove-then-insert-at-0 ordering)
             if matched_indices:
-                # Sort matched indices in descending order to avoid index shifting during removal
-                matched_indices.sort(reverse=True)
-                
-                # Extract the matched items
-                matched_items = []
-                for idx in matched_indices:
-                    matched_items.append({
-                        'id': results['ids'][0][idx],
-                        'document': results['documents'][0][idx],
-                        'metadata': results['metadatas'][0][idx],
-                        'distance': results['distances'][0][idx]
-                    })
-                    # Remove from current position (working backwards)
-                    del results['ids'][0][idx]
-                    del results['documents'][0][idx]
-                    del results['metadatas'][0][idx]
-                    del results['distances'][0][idx]
-                
-                # Insert matched items at the front (they're in reverse order, so reverse again)
-                matched_items.reverse()
-                for item in matched_items:
-                    results['ids'][0].insert(0, item['id'])
-                    results['documents'][0].insert(0, item['document'])
-                    results['metadatas'][0].insert(0, item['metadata'])
-                    results['distances'][0].insert(0, item['distance'])
+                matched = sorted(set(matched_indices), reverse=True)
+                matched_set = set(matched)
+                hits = [hits[idx] for idx in matched] + [
+                    hit for idx, hit in enumerate(hits) if idx not in matched_set
+                ]
             
             # For each missing entity, do a targeted search
             if missing_entities:
                 for entity in missing_entities:
                     entity_results = self.collection.query(
                         query_embeddings=[self.get_embedding(entity)],
-                        n_results=1
+                        n_results=1,
+                        include=_QUERY_INCLUDE
                     )
-                    if entity_results['ids'][0]:
-                        # Add this result to our main results
-                        results['ids'][0].append(entity_results['ids'][0][0])
-                        results['documents'][0].append(entity_results['documents'][0][0])
-                        results['metadatas'][0].append(entity_results['metadatas'][0][0])
-                        results['distances'][0].append(entity_results['distances'][0][0])
+                    # Add this result (if any) to our main results
+                    hits.extend(_hits_from_results(entity_results)[:1])
         
         # Smart enhancement: If the TOP result is a monster with a parent_category,
         # fetch that category and insert it as the second result
-        if results['metadatas'][0] and results['metadatas'][0][0].get('parent_category_id'):
-            category_id = results['metadatas'][0][0]['parent_category_id']
-            existing_ids = set(results['ids'][0])
+        if hits and hits[0].metadata.get('parent_category_id'):
+            category_id = hits[0].metadata['parent_category_id']
+            existing_ids = {hit.id for hit in hits}
             
             # Only fetch if category not already in results
             if category_id not in existing_ids:
                 try:
-                    cat_result = self.collection.get(ids=[category_id])
+                    cat_result = self.collection.get(ids=[category_id], include=["documents", "metadatas"])
                     if cat_result['ids']:
                         # Insert category at position 1 (after the primary result)
-                        results['ids'][0].insert(1, cat_result['ids'][0])
-                        results['documents'][0].insert(1, cat_result['documents'][0])
-                        results['metadatas'][0].insert(1, cat_result['metadatas'][0])
                         # Use distance slightly worse than primary result
-                        results['distances'][0].insert(1, results['distances'][0][0] + 0.05)
+                        hits.insert(1, Hit(
+                            cat_result['ids'][0],
+                            cat_result['documents'][0],
+                            cat_result['metadatas'][0],
+                            hits[0].distance + 0.05
+                        ))
                 except Exception as e:
                     # If category fetch fails, just continue
                     pass
         
         # Smart filtering: Adaptive cutoff based on distance gaps
-        # Strategy:
-        # 1. Look for the largest gap between consecutive distances
-        # 2. If gap > threshold, cut there (indicates relevance drop-off)
-        # 3. Otherwise use distance_threshold as relative cutoff
-        # 4. Always keep at least 2 results, respect maximum k
-        
-        if len(results['ids'][0]) > 0:
-            distances = results['distances'][0]
-            
-            # Calculate gaps between consecutive results
-            # Start from position 2 (skip gap after best result, which can be large
-            # simply because the best result is exceptionally good)
-            gaps = []
-            for i in range(2, min(len(distances), k)):
-                gap = distances[i] - distances[i-1]
-                gaps.append((i, gap))  # (position_after_gap, gap_size)
-            
-            # Find the largest gap
-            max_gap_pos = None
-            max_gap_size = 0
-            gap_threshold = 0.06  # Significant semantic discontinuity
-            
-            if gaps:
-                max_gap_pos, max_gap_size = max(gaps, key=lambda x: x[1])
-            
-            if debug and gaps:
-                self.output.info(f"  [DEBUG] Gap analysis:")
-                for pos, gap in sorted(gaps, key=lambda x: x[1], reverse=True)[:3]:
-                    self.output.info(f"    Position {pos}: gap={gap:.4f}")
-                self.output.info(f"  [DEBUG] Largest gap: {max_gap_size:.4f} at position {max_gap_pos}")
-                
-            # Decide where to cut
-            keep_count = len(distances)  # Default: keep all
-            strategy_used = "none"
-            
-            # Strategy 1: Cut at large gap (semantic cliff detected)
-            if max_gap_size >= gap_threshold:
-                keep_count = max_gap_pos
-                strategy_used = f"gap detection (cliff at position {max_gap_pos}, gap={max_gap_size:.4f})"
-            # Strategy 2: Use relative distance threshold
-            else:
-                best_distance = distances[0]
-                cutoff_distance = best_distance + distance_threshold
-                keep_count = 1
-                for i in range(1, len(distances)):
-                    if distances[i] <= cutoff_distance:
-                        keep_count += 1
-                    else:
-                        break
-                strategy_used = f"distance threshold (cutoff={cutoff_distance:.4f})"
-            
-            # Apply constraints
-            original_keep = keep_count
-            keep_count = max(2, keep_count) if len(distances) > 1 else 1  # Min 2 results
-            keep_count = min(keep_count, k)  # Respect max k
-            keep_count = min(keep_count, len(distances))  # Can't exceed what we have
+        if hits:
+            keep_count = self._apply_gap_cutoff([hit.distance for hit in hits], k, distance_threshold, debug)
+            hits = hits[:keep_count]
+        
+        return _hits_to_results(hits)
+    
+    def _build_filter_query_params(self, query_embedding, k: int, seen_uids: set) -> dict:
+        """Build ChromaDB query parameters for one filtering iteration.
+        
+        Args:
+            query_embedding: Embedded query vector
+            k: Number of results to request
+            seen_uids: uids already processed (kept + excluded) to exclude
             
-            if debug:
-                self.output.info(f"  [DEBUG] Strategy: {strategy_used}")
-                self.output.info(f"  [DEBUG] Keep count: {original_keep} → {keep_count} (after constraints)")
-                if keep_count < len(distances):
-                    self.output.info(f"  [DEBUG] Dropping {len(distances) - keep_count} results with distances: {distances[keep_count:]}")
+        Returns:
+            Keyword arguments for collection.query()
+        """
+        query_params = {
+            "query_embeddings": [query_embedding],
+            "n_results": k,
+            "include": _QUERY_INCLUDE
+        }
+        
+        # Exclude ALL previously processed chunks (both kept and excluded)
+        # Use metadata.uid instead of document ID since ChromaDB where clause only works on metadata
+        # (ChromaDB validates $nin operands as a list, so the set is materialized once here)
+        if seen_uids:
+            query_params["where"] = {"uid": {"$nin": list(seen_uids)}}
+        
+        return query_params
+    
+    def _retrieve_unfiltered(self, query: str, k: int = 15, distance_threshold: float = 0.4, debug: bool = False):
+        """Fast path for _retrieve_with_filtering when the collection has no query_must metadata.
+        
+        With nothing to exclude, the filtering loop always stops after its first
+        query, so this runs that single query and applies the same gap detection.
+        
+        Args:
+            query: The search query
+            k: Target number of results
+            distance_threshold: Maximum distance increase from best result
+            debug: If True, print detailed gap detection info
             
-            # Trim results
-            if keep_count < len(results['ids'][0]):
-                results['ids'][0] = results['ids'][0][:keep_count]
-                results['documents'][0] = results['documents'][0][:keep_count]
-                results['metadatas'][0] = results['metadatas'][0][:keep_count]
-                results['distances'][0] = results['distances'][0][:keep_count]
+        Returns:
+            Results dict in same format as _retrieve_base
+        """
+        query_embedding = self.get_embedding(query)
+        results = self.collection.query(**self._build_filter_query_params(query_embedding, k, set()))
+        hits = _hits_from_results(results)
+        
+        if debug:
+            self.output.info(f"\n[FILTERING] Skipped (collection has no query_must metadata), {len(hits)} chunks retrieved")
         
-        return results
+        if hits:
+            keep_count = self._apply_gap_cutoff(
+                [hit.distance for hit in hits], k, distance_threshold, debug,
+                label=" on filtered results", presorted=True
+            )
+            hits = hits[:keep_count]
+        
+        return _hits_to_results(hits)
     
     def _retrieve_with_filtering(self, query: str, k: int = 15, distance_threshold: float = 0.4, debug: bool = False, max_iterations: int = 3):
         """Retrieve with iterative query_must filtering.
@@ -374,18 +618,17 @@ class DnDRAG:
         Returns:
             Results dict in same format as _retrieve_base
         """
-        import json
-        import time
-        from .query_must_filter import satisfies_query_must
-        
         start_time = time.time()
         
         # Initialize state
-        excluded_ids = set()
-        kept_ids = set()  # Track IDs we've already kept to avoid duplicates
+        # seen_uids holds every uid processed so far (kept + excluded) and is
+        # maintained incrementally, so building the $nin clause never needs a set union
+        seen_uids = set()
+        kept_uids = set()  # Track uids we've already kept to avoid duplicates
         all_kept_chunks = []
         iteration = 0
         total_excluded = 0
+        pending_results = None  # Future for the speculatively prefetched next batch
         
         # Get embedding once (reuse across iterations)
         query_embedding = self.get_embedding(query)
@@ -397,22 +640,15 @@ class DnDRAG:
             if debug:
                 self.output.info(f"\n[FILTERING] === Iteration {iteration + 1} ===")
             
-            # Build ChromaDB query parameters
-            query_params = {
-                "query_embeddings": [query_embedding],
-                "n_results": k
-            }
-            
-            # Exclude ALL previously processed chunks (both kept and excluded)
-            # Use metadata.uid instead of document ID since ChromaDB where clause only works on metadata
-            all_seen_ids = excluded_ids | kept_ids
-            if all_seen_ids:
-                query_params["where"] = {"uid": {"$nin": list(all_seen_ids)}}
-                if debug:
-                    self.output.info(f"[FILTERING] Excluding {len(all_seen_ids)} previously processed chunks ({len(kept_ids)} kept + {len(excluded_ids)} excluded)")
+            if debug and seen_uids:
+                self.output.info(f"[FILTERING] Excluding {len(seen_uids)} previously processed chunks ({len(kept_uids)} kept + {len(seen_uids) - len(kept_uids)} excluded)")
             
-            # Retrieve from ChromaDB
-            results = self.collection.query(**query_params)
+            # Retrieve from ChromaDB (or collect the batch prefetched last iteration)
+            if pending_results is not None:
+                results = pending_results.result()
+                pending_results = None
+            else:
+                results = self.collection.query(**self._build_filter_query_params(query_embedding, k, seen_uids))
             
             # Check if results returned
             if not results['ids'][0]:
@@ -420,88 +656,107 @@ class DnDRAG:
                     self.output.info(f"[FILTERING] No more results available from ChromaDB")
                 break
             
+            # Every chunk in this batch ends up in seen_uids whatever its classification,
+            # so the next iteration's query is already known. If the batch could cause an
+            # exclusion (the only way the loop continues below k), start that query now
+            # so the ChromaDB round-trip overlaps with filtering this batch.
+            if iteration + 1 < max_iterations and any(
+                'query_must' in metadata for metadata in results['metadatas'][0]
+            ):
+                next_seen_uids = seen_uids.union(
+                    metadata.get('uid', chunk_id)
+                    for chunk_id, metadata in zip(results['ids'][0], results['metadatas'][0])
+                )
+                next_params = self._build_filter_query_params(query_embedding, k, next_seen_uids)
+                pending_results = _PREFETCH_EXECUTOR.submit(self.collection.query, **next_params)
+            
             # Filter based on query_must
             newly_kept = []
             newly_excluded = []
             
-            # Track total chunks to process for numbering
+            # Total chunks in batch (for debug numbering only; chunk info strings
+            # are built inside `if debug:` guards so the default path never formats them)
             total_chunks_in_batch = len(results['ids'][0])
-            chunk_counter = 0
             
-            for chunk_id, metadata, document, distance in zip(
+            # Parse every chunk's query_must up front so the whole batch is checked
+            # against the query in one pass (filter_chunks) instead of chunk by chunk
+            batch_query_musts = []  # Parsed spec per chunk (None = not filtered)
+            batch_predicates = []  # Compiled spec per chunk (None = not filtered)
+            malformed = set()  # Batch positions with unparseable query_must (fail open)
+            for position, metadata in enumerate(results['metadatas'][0]):
+                query_must = None
+                predicate = None
+                # Skip query_must filtering for reference chunks (EXPLANATORY NOTES)
+                # These are educational/reference material that should always be available
+                is_reference = (metadata.get('type') == 'reference' and
+                               metadata.get('section') == 'EXPLANATORY NOTES')
+                if 'query_must' in metadata and not is_reference:
+                    try:
+                        # Parse query_must (stored as JSON string in ChromaDB)
+                        # (parsed specs are cached by string and shared, so never mutate them)
+                        # Compiled predicates are cached by string too, so each distinct
+                        # spec is interpreted once per process rather than once per check
+                        raw_query_must = metadata['query_must']
+                        if isinstance(raw_query_must, str):
+                            query_must = parse_query_must(raw_query_must)
+                            predicate = compile_query_must_json(raw_query_must)
+                        else:
+                            query_must = raw_query_must
+                            predicate = compile_query_must(raw_query_must)
+                    except json.JSONDecodeError:
+                        malformed.add(position)
+                batch_query_musts.append(query_must)
+                batch_predicates.append(predicate)
+            
+            if any(predicate is not None for predicate in batch_predicates):
+                verdicts = filter_chunks(query, batch_predicates)
+            else:
+                # Nothing in this batch is restricted: skip the term scan entirely
+                verdicts = [True] * len(batch_predicates)
+            
+            for chunk_counter, (chunk_id, metadata, document, distance) in enumerate(zip(
                 results['ids'][0],
                 results['metadatas'][0],
                 results['documents'][0],
                 results['distances'][0]
-            ):
-                chunk_counter += 1
+            ), 1):
+                position = chunk_counter - 1
                 
                 # Extract uid from metadata (fallback to chunk_id if not present for backwards compatibility)
                 uid = metadata.get('uid', chunk_id)
                 
                 # Skip if already kept in a previous iteration (avoid duplicates)
-                if uid in kept_ids:
+                if uid in kept_uids:
                     if debug:
                         chunk_info = self._format_chunk_info(metadata, chunk_counter, total_chunks_in_batch)
                         self.output.info(f"  ⏭️  SKIP: {chunk_info} (duplicate)")
                     continue
                 
-                # Skip query_must filtering for reference chunks (EXPLANATORY NOTES)
-                # These are educational/reference material that should always be available
-                is_reference = (metadata.get('type') == 'reference' and 
-                               metadata.get('section') == 'EXPLANATORY NOTES')
+                query_must = batch_query_musts[position]
                 
-                # Check if chunk has query_must metadata (skip for reference chunks)
-                if 'query_must' in metadata and not is_reference:
-                    try:
-                        # Parse query_must (stored as JSON string in ChromaDB)
-                        query_must = json.loads(metadata['query_must']) if isinstance(metadata['query_must'], str) else metadata['query_must']
-                        
-                        # Check if query satisfies requirements
-                        if satisfies_query_must(query, query_must, debug=debug):
-                            newly_kept.append({
-                                'id': chunk_id,
-                                'metadata': metadata,
-                                'document': document,
-                                'distance': distance
-                            })
-                            kept_ids.add(uid)  # Track by uid
-                            if debug:
-                                chunk_info = self._format_chunk_info(metadata, chunk_counter, total_chunks_in_batch)
-                                self.output.info(f"  ✅ KEEP: {chunk_info}")
-                        else:
-                            newly_excluded.append(uid)  # Track by uid
-                            excluded_ids.add(uid)  # Track by uid
-                            if debug:
-                                chunk_info = self._format_chunk_info(metadata, chunk_counter, total_chunks_in_batch)
-                                self.output.info(f"  ❌ EXCLUDE: {chunk_info}")
-                    except json.JSONDecodeError as e:
-                        # If query_must is malformed, keep the chunk (fail open)
-                        if debug:
-                            chunk_info = self._format_chunk_info(metadata, chunk_counter, total_chunks_in_batch)
-                            self.output.info(f"  ⚠️  KEEP (malformed query_must): {chunk_info}")
-                        newly_kept.append({
-                            'id': chunk_id,
-                            'metadata': metadata,
-                            'document': document,
-                            'distance': distance
-                        })
-                        kept_ids.add(uid)  # Track by uid
-                else:
-                    # No restrictions - always keep
-                    newly_kept.append({
-                        'id': chunk_id,
-                        'metadata': metadata,
-                        'document': document,
-                        'distance': distance
-                    })
-                    kept_ids.add(uid)  # Track by uid
+                if not verdicts[position]:
+                    newly_excluded.append(uid)  # Track by uid
+                    seen_uids.add(uid)
                     if debug:
+                        # Re-check individually to report which operator failed
+                        satisfies_query_must(query, query_must, debug=True)
                         chunk_info = self._format_chunk_info(metadata, chunk_counter, total_chunks_in_batch)
-                        if is_reference:
-                            self.output.info(f"  ✅ KEEP: {chunk_info} (reference - no filtering)")
-                        else:
-                            self.output.info(f"  ✅ KEEP: {chunk_info} (no restrictions)")
+                        self.output.info(f"  ❌ EXCLUDE: {chunk_info}")
+                    continue
+                
+                newly_kept.append(Hit(chunk_id, document, metadata, distance))
+                kept_uids.add(uid)  # Track by uid
+                seen_uids.add(uid)
+                if debug:
+                    chunk_info = self._format_chunk_info(metadata, chunk_counter, total_chunks_in_batch)
+                    if position in malformed:
+                        self.output.info(f"  ⚠️  KEEP (malformed query_must): {chunk_info}")
+                    elif query_must is not None:
+                        self.output.info(f"  ✅ KEEP: {chunk_info}")
+                    elif metadata.get('type') == 'reference' and metadata.get('section') == 'EXPLANATORY NOTES':
+                        self.output.info(f"  ✅ KEEP: {chunk_info} (reference - no filtering)")
+                    else:
+                        self.output.info(f"  ✅ KEEP: {chunk_info} (no restrictions)")
             
             # Add kept chunks to results
             all_kept_chunks.extend(newly_kept)
@@ -528,6 +783,10 @@ class DnDRAG:
             
             iteration += 1
         
+        # Drop an unused prefetch (stopping conditions were met first)
+        if pending_results is not None:
+            pending_results.cancel()
+        
         # Performance metrics
         elapsed_time = (time.time() - start_time) * 1000  # Convert to ms
         
@@ -538,26 +797,9 @@ class DnDRAG:
             self.output.info(f"[FILTERING] Final kept: {len(all_kept_chunks)}")
             self.output.info(f"[FILTERING] Time: {elapsed_time:.1f}ms")
         
-        # If no chunks were kept, return empty results
-        if not all_kept_chunks:
-            return {
-                'ids': [[]],
-                'documents': [[]],
-                'metadatas': [[]],
-                'distances': [[]]
-            }
-        
         # Sort by distance and take top k
-        all_kept_chunks.sort(key=lambda x: x['distance'])
-        final_chunks = all_kept_chunks[:k]
-        
-        # Convert back to ChromaDB results format
-        filtered_results = {
-            'ids': [[chunk['id'] for chunk in final_chunks]],
-            'documents': [[chunk['document'] for chunk in final_chunks]],
-            'metadatas': [[chunk['metadata'] for chunk in final_chunks]],
-            'distances': [[chunk['distance'] for chunk in final_chunks]]
-        }
+        all_kept_chunks.sort(key=lambda hit: hit.distance)
+        final_hits = all_kept_chunks[:k]
         
         # Now apply the same enhancements as base retrieval:
         # 1. Entity-aware repositioning (comparison queries)
@@ -567,122 +809,63 @@ class DnDRAG:
         # Note: These enhancements were already applied in the initial retrieval,
         # so we just need to apply gap detection to the final filtered set
         
-        if len(filtered_results['ids'][0]) > 0:
-            distances = filtered_results['distances'][0]
-            
-            # Apply adaptive gap detection (same logic as base retrieval)
-            gaps = []
-            for i in range(2, min(len(distances), k)):
-                gap = distances[i] - distances[i-1]
-                gaps.append((i, gap))
-            
-            max_gap_pos = None
-            max_gap_size = 0
-            gap_threshold = 0.06
-            
-            if gaps:
-                max_gap_pos, max_gap_size = max(gaps, key=lambda x: x[1])
-            
-            if debug and gaps:
-                self.output.info(f"  [DEBUG] Gap analysis on filtered results:")
-                for pos, gap in sorted(gaps, key=lambda x: x[1], reverse=True)[:3]:
-                    self.output.info(f"    Position {pos}: gap={gap:.4f}")
-            
-            # Decide where to cut
-            keep_count = len(distances)
-            strategy_used = "none"
-            
-            if max_gap_size >= gap_threshold:
-                keep_count = max_gap_pos
-                strategy_used = f"gap detection (cliff at position {max_gap_pos}, gap={max_gap_size:.4f})"
-            else:
-                best_distance = distances[0]
-                cutoff_distance = best_distance + distance_threshold
-                keep_count = 1
-                for i in range(1, len(distances)):
-                    if distances[i] <= cutoff_distance:
-                        keep_count += 1
-                    else:
-                        break
-                strategy_used = f"distance threshold (cutoff={cutoff_distance:.4f})"
-            
-            # Apply constraints
-            original_keep = keep_count
-            keep_count = max(2, keep_count) if len(distances) > 1 else 1
-            keep_count = min(keep_count, k)
-            keep_count = min(keep_count, len(distances))
-            
-            if debug:
-                self.output.info(f"  [DEBUG] Strategy: {strategy_used}")
-                self.output.info(f"  [DEBUG] Keep count: {original_keep} → {keep_count} (after constraints)")
-            
-            # Trim results
-            if keep_count < len(filtered_results['ids'][0]):
-                filtered_results['ids'][0] = filtered_results['ids'][0][:keep_count]
-                filtered_results['documents'][0] = filtered_results['documents'][0][:keep_count]
-                filtered_results['metadatas'][0] = filtered_results['metadatas'][0][:keep_count]
-                filtered_results['distances'][0] = filtered_results['distances'][0][:keep_count]
+        if final_hits:
+            keep_count = self._apply_gap_cutoff(
+                [hit.distance for hit in final_hits], k, distance_threshold, debug,
+                label=" on filtered results", presorted=True
+            )
+            final_hits = final_hits[:keep_count]
         
-        return filtered_results
+        # Convert back to ChromaDB results format (empty lists if nothing was kept)
+        return _hits_to_results(final_hits)
     
     def format_context(self, results):
-        """Format retrieved chunks into context for the LLM."""
-        contexts = []
+        """Format retrieved chunks into context for the LLM.
         
-        for i, (doc, metadata) in enumerate(zip(
-            results['documents'][0],
-            results['metadatas'][0]
-        )):
+        Redundant chunks are dropped to save prompt tokens: exact duplicate
+        documents (ignoring whitespace), and chunks whose word sets overlap a
+        kept chunk with the same name and type by NEAR_DUPLICATE_JACCARD or more.
+        Retrieval order is preserved (it carries entity/category placement).
+        """
+        buf = io.StringIO()
+        wrote_any = False
+        seen_docs = set()  # Whitespace-normalized documents already included
+        kept_word_sets = {}  # (name, chunk_type) -> word sets of included chunks
+        
+        for doc, metadata in zip(results['documents'][0], results['metadatas'][0]):
             name = metadata.get('name', metadata.get('title', 'Unknown'))
             chunk_type = metadata.get('type', 'text')
-            chunk_part = metadata.get('chunk_part', 1)
-            # For monsters and categories, the doc already has the header with statistics
-            # so we don't need to add extra formatting
-            if chunk_type in ['monster', 'category']:
-                contexts.append(doc)
-            # Format based on chunk type for other content
-            elif chunk_type == 'spell':
-                school = metadata.get('spell_school', '')
-                contexts.append(f"## {name}\n{school}\n\n{doc}")
-            elif chunk_type == 'monster_entry':
-                contexts.append(f"## {name}\n\n{doc}")
-            elif chunk_type.startswith('table'):
-                # Include table title prominently
-                contexts.append(f"## {name}\n\n{doc}")
-            else:
-                contexts.append(f"### {name}\n\n{doc}")
+            
+            # Drop exact duplicates
+            normalized_doc = " ".join(doc.split())
+            if normalized_doc in seen_docs:
+                continue
+            seen_docs.add(normalized_doc)
+            
+            # Drop near-duplicates of the same entity (e.g. overlapping split parts)
+            group_key = (name.strip().lower(), chunk_type)
+            words = frozenset(normalized_doc.lower().split())
+            group_word_sets = kept_word_sets.setdefault(group_key, [])
+            if any(_jaccard(words, kept) >= self.NEAR_DUPLICATE_JACCARD for kept in group_word_sets):
+                continue
+            group_word_sets.append(words)
+            
+            formatter = _CONTEXT_FORMATTERS.get(chunk_type)
+            if formatter is None:
+                formatter = _format_table_context if chunk_type.startswith('table') else _format_default_context
+            if wrote_any:
+                buf.write("\n\n---\n\n")
+            buf.write(formatter(name, metadata, doc))
+            wrote_any = True
         
-
-        return "\n\n---\n\n".join(contexts)
+        return buf.getvalue()
     
-    def generate(self, query: str, context: str, max_tokens: int = 800):
-        """Generate answer using OpenAI."""
-        system_prompt = """You are a knowledgeable Dungeon Master assistant for Advanced Dungeons & Dragons 1st Edition.
-
-Your role is to provide accurate, helpful answers based on the official rulebooks. When answering:
-1. Be precise and cite the specific rules context element you are using to establish your answer.
-2. If the context contains tables, READ THEM CAREFULLY:
-   - Identify the correct row (first column)
-   - Identify the correct column header
-   - Show the EXACT intersection value you're using
-   - Double-check your reading before calculating
-3. If the context contains JSON notation:
-   - Parse the JSON into an object
-   - Then parse the object's properties to search for your answer.
-   - Explain which properties you are using and why.
-4. When calculating combat probabilities:
-   - Explain which piece of context you're getting your numbers from.
-   - Apply ALL relevant modifiers (strength "to hit" bonus, dexterity bonuses, etc.)
-   - Modifiers REDUCE the required die roll (a +1 bonus means you need to roll 1 less)
-5. If information is not in the provided context, say so clearly
-6. Use D&D terminology correctly
-7. Show your work step-by-step for complex calculations
-
-The context below comes from official AD&D 1st Edition rulebooks. Use this context AND ONLY this context to answer.
-
-IMPORTANT: you must only use the provided context to answer questions. If the context doesn't provide enough information, explain what might additional information you need.
-"""
-   
+    def _prepare_generation(self, query: str, context: str, max_tokens: int):
+        """Build the chat request for generate()/agenerate() and check the answer cache.
+        
+        Returns:
+            Tuple of (request kwargs, cache key or None, cached result or None)
+        """
         user_prompt = f"""Context from D&D 1st Edition rulebooks:
 
 {context}
@@ -692,28 +875,140 @@ Question: {query}
 
 Answer based on the context above:"""
 
-        response = self.openai_client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
+        temperature = 0.1  # Lower temperature for more factual responses
+        
+        request = {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
-            max_tokens=max_tokens,
-            temperature=0.1  # Lower temperature for more factual responses
-        )
+            'max_tokens': max_tokens,
+            'temperature': temperature
+        }
+        
+        # Serve identical requests from the answer cache (no tokens billed)
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.make_key(self.model, SYSTEM_PROMPT, user_prompt, max_tokens, temperature)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return request, cache_key, {
+                    'content': cached['content'],
+                    'usage': {
+                        'prompt_tokens': 0,
+                        'completion_tokens': 0,
+                        'total_tokens': 0,
+                        'cached': True
+                    }
+                }
         
+        return request, cache_key, None
+    
+    def _finish_generation(self, content: str, usage, cache_key):
+        """Package an answer and its token usage, storing it in the answer cache."""
         # Return both content and token usage
-        return {
-            'content': response.choices[0].message.content,
+        result = {
+            'content': content,
             'usage': {
-                'prompt_tokens': response.usage.prompt_tokens,
-                'completion_tokens': response.usage.completion_tokens,
-                'total_tokens': response.usage.total_tokens
+                'prompt_tokens': usage.prompt_tokens if usage else 0,
+                'completion_tokens': usage.completion_tokens if usage else 0,
+                'total_tokens': usage.total_tokens if usage else 0
             }
         }
+        
+        if cache_key is not None:
+            self.response_cache.set(cache_key, result)
+        
+        return result
+    
+    def generate(self, query: str, context: str, max_tokens: int = 800, on_delta=None):
+        """Generate answer using OpenAI.
+        
+        Args:
+            query: The user's question
+            context: Formatted context from format_context()
+            max_tokens: Maximum completion tokens
+            on_delta: Optional callback receiving answer text as it is generated.
+                      When given, the completion is streamed so output can be shown
+                      before the model finishes. The return value is the same either way.
+        
+        Returns:
+            Dict with 'content' (full answer) and 'usage' (token counts)
+        """
+        request, cache_key, cached = self._prepare_generation(query, context, max_tokens)
+        if cached is not None:
+            if on_delta is not None:
+                on_delta(cached['content'])
+            return cached
+        
+        if on_delta is None:
+            response = self.openai_client.chat.completions.create(**request)
+            content = response.choices[0].message.content
+            usage = response.usage
+        else:
+            # Stream deltas to the callback; usage arrives in the final chunk
+            stream = self.openai_client.chat.completions.create(
+                **request,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            parts = []
+            usage = None
+            for event in stream:
+                if event.choices:
+                    delta = event.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        on_delta(delta)
+                if event.usage is not None:
+                    usage = event.usage
+            content = "".join(parts)
+        
+        return self._finish_generation(content, usage, cache_key)
+    
+    async def agenerate(self, query: str, context: str, max_tokens: int = 800):
+        """Async variant of generate() using the AsyncOpenAI client (no streaming).
+        
+        Returns:
+            Dict with 'content' (full answer) and 'usage' (token counts)
+        """
+        request, cache_key, cached = self._prepare_generation(query, context, max_tokens)
+        if cached is not None:
+            return cached
+        
+        response = await self.async_openai_client.chat.completions.create(**request)
+        return self._finish_generation(response.choices[0].message.content, response.usage, cache_key)
     
-    def query(self, question: str, k: int = 15, distance_threshold: float = 0.4, show_context: bool = False, debug: bool = False, enable_filtering: bool = True, max_iterations: int = 3):
-        """Full RAG pipeline: retrieve + generate."""
+    def _estimate_max_tokens(self, question: str, context: str, max_tokens: int = 800) -> int:
+        """Pick a completion budget for a question instead of always reserving max_tokens.
+        
+        Lookup-style questions (a table value, a count) get a short budget,
+        descriptive/comparison questions the full ceiling, and everything else
+        a medium one. Roughly 10% of the context size (~4 chars/token) is kept
+        as a floor so large contexts can still be summarized.
+        
+        Args:
+            question: The user's question
+            context: Formatted context from format_context()
+            max_tokens: Ceiling for the returned budget
+        
+        Returns:
+            Completion token budget (never above max_tokens)
+        """
+        question_lower = question.lower()
+        if any(phrase in question_lower for phrase in _LONG_ANSWER_PHRASES):
+            estimate = max_tokens
+        elif any(phrase in question_lower for phrase in _SHORT_ANSWER_PHRASES):
+            estimate = 300
+        else:
+            estimate = 600
+        context_floor = len(context) // 4 // 10
+        return min(max_tokens, max(estimate, context_floor))
+    
+    def _retrieve_context(self, question: str, k: int, distance_threshold: float, show_context: bool,
+                          debug: bool, enable_filtering: bool, max_iterations: int) -> str:
+        """Retrieval half of query(): retrieve, log the chunks, and format the context."""
         self.output.info(f"\n{'='*80}")
         self.output.info(f"QUESTION: {question}")
         self.output.info(f"{'='*80}\n")
@@ -725,14 +1020,17 @@ Answer based on the context above:"""
                                enable_filtering=enable_filtering, max_iterations=max_iterations)
         
         # Show retrieved chunks
+        # (one diagnostics entry for the whole list rather than one per chunk)
         total_chunks = len(results['metadatas'][0])
-        self.output.info(f"\nRetrieved chunks:")
-        for i, (metadata, distance) in enumerate(zip(
-            results['metadatas'][0],
-            results['distances'][0]
-        ), 1):  # Start enumeration at 1
-            chunk_info = self._format_chunk_info(metadata, i, total_chunks)
-            self.output.info(f"  {i}. {chunk_info} (distance: {distance:.4f})")
+        lines = ["\nRetrieved chunks:"]
+        lines.extend(
+            f"  {i}. {self._format_chunk_info(metadata, i, total_chunks)} (distance: {distance:.4f})"
+            for i, (metadata, distance) in enumerate(zip(
+                results['metadatas'][0],
+                results['distances'][0]
+            ), 1)  # Start enumeration at 1
+        )
+        self.output.info("\n".join(lines))
         
         # Format context
         context = self.format_context(results)
@@ -746,7 +1044,10 @@ Answer based on the context above:"""
         
         # Generate answer
         self.output.info(f"\nGenerating answer with {self.model}...")
-        generation_result = self.generate(question, context)
+        return context
+    
+    def _finish_query(self, generation_result: dict) -> dict:
+        """Generation half of query(): record the answer and build the result dict."""
         answer = generation_result['content']
         usage = generation_result['usage']
         
@@ -762,6 +1063,32 @@ Answer based on the context above:"""
         result_dict['usage'] = usage  # Add usage to output
         
         return result_dict
+    
+    def query(self, question: str, k: int = 15, distance_threshold: float = 0.4, show_context: bool = False, debug: bool = False, enable_filtering: bool = True, max_iterations: int = 3, on_delta=None):
+        """Full RAG pipeline: retrieve + generate.
+        
+        on_delta, if given, receives the answer text as it streams (see generate()).
+        """
+        context = self._retrieve_context(question, k, distance_threshold, show_context, debug,
+                                         enable_filtering, max_iterations)
+        generation_result = self.generate(question, context, max_tokens=self._estimate_max_tokens(question, context),
+                                          on_delta=on_delta)
+        return self._finish_query(generation_result)
+    
+    async def aquery(self, question: str, k: int = 15, distance_threshold: float = 0.4, show_context: bool = False, debug: bool = False, enable_filtering: bool = True, max_iterations: int = 3):
+        """Async variant of query() so several questions can be answered concurrently.
+        
+        Retrieval (blocking ChromaDB/embedding calls) runs in a worker thread and
+        generation awaits the AsyncOpenAI client. Each call writes to its own
+        RAGOutput buffer, so concurrent calls never interleave diagnostics.
+        """
+        rag = copy.copy(self)  # Shares clients and collection; only the output buffer differs
+        rag.output = RAGOutput()
+        context = await asyncio.to_thread(rag._retrieve_context, question, k, distance_threshold,
+                                          show_context, debug, enable_filtering, max_iterations)
+        generation_result = await rag.agenerate(question, context,
+                                                max_tokens=rag._estimate_max_tokens(question, context))
+        return rag._finish_query(generation_result)
 
 
 def main():
@@ -816,13 +1143,30 @@ def main():
         action="store_true",
         help="Run test questions for the collection"
     )
+    parser.add_argument(
+        "--batch", "--no-prompt",
+        dest="batch",
+        action="store_true",
+        help="With --test, print all answers without pausing between questions (for scripted/timed runs)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Cache answers on disk in this directory (default: generate_cache_dir from .env, else no caching)"
+    )
     
     args = parser.parse_args()
     
+    def _print_delta(text):
+        """Write streamed answer text to the terminal as it arrives."""
+        sys.stdout.write(text)
+        sys.stdout.flush()
+    
     # Initialize RAG system
     try:
         rag = DnDRAG(
-            model=args.model
+            model=args.model,
+            cache_dir=args.cache_dir
         )
     except Exception as e:
         print(f"Error initializing RAG system: {e}")
@@ -842,14 +1186,30 @@ def main():
         print(f"RUNNING TEST QUESTIONS FOR UNIFIED COLLECTION")
         print(f"{'*'*80}\n")
         
-        for i, question in enumerate(test_questions, 1):
+        # Answer the questions concurrently (bounded to respect rate limits),
+        # then print them in order
+        async def _run_tests():
+            semaphore = asyncio.Semaphore(3)
+            
+            async def _answer(question):
+                async with semaphore:
+                    return await rag.aquery(question, k=args.k, distance_threshold=args.distance_threshold,
+                                            show_context=args.show_context, debug=args.debug,
+                                            enable_filtering=not args.disable_filtering,
+                                            max_iterations=args.max_iterations)
+            
+            return await asyncio.gather(*(_answer(question) for question in test_questions))
+        
+        results = asyncio.run(_run_tests())
+        
+        for i, (question, result) in enumerate(zip(test_questions, results), 1):
             print(f"\n{'#'*80}")
             print(f"TEST QUESTION {i}/{len(test_questions)}")
             print(f"{'#'*80}")
-            rag.query(question, k=args.k, distance_threshold=args.distance_threshold, show_context=args.show_context, debug=args.debug,
-                     enable_filtering=not args.disable_filtering, max_iterations=args.max_iterations)
+            print(f"QUESTION: {question}\n")
+            print(result['answer'])
             
-            if i < len(test_questions):
+            if i < len(test_questions) and not args.batch:
                 input("\nPress Enter to continue to next question...")
         
         sys.exit(0)
@@ -857,7 +1217,9 @@ def main():
     # Single query mode
     if args.query:
         rag.query(args.query, k=args.k, distance_threshold=args.distance_threshold, show_context=args.show_context, debug=args.debug,
-                 enable_filtering=not args.disable_filtering, max_iterations=args.max_iterations)
+                 enable_filtering=not args.disable_filtering, max_iterations=args.max_iterations,
+                 on_delta=_print_delta)
+        print()
         sys.exit(0)
     
     # Interactive mode
@@ -881,7 +1243,9 @@ def main():
                 break
             
             rag.query(question, k=args.k, distance_threshold=args.distance_threshold, show_context=args.show_context, debug=args.debug,
-                     enable_filtering=not args.disable_filtering, max_iterations=args.max_iterations)
+                     enable_filtering=not args.disable_filtering, max_iterations=args.max_iterations,
+                     on_delta=_print_delta)
+            print()
             
         except KeyboardInterrupt:
             print("\n\nGoodbye!")
@@ -10,8 +10,207 @@ query_must filtering in docling_query.py. This module only validates the operato
 the decision to skip filtering is made at the pipeline level.
 """
 
+import json
 import re
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Union
+
+try:
+    import orjson  # Optional: faster JSON decoding for query_must strings
+except ImportError:
+    orjson = None
+
+try:
+    import ahocorasick  # Optional (pyahocorasick): single-pass multi-term scan
+except ImportError:
+    ahocorasick = None
+
+
+# Numbers mentioned in a query (for contain_range)
+_NUM_RE = re.compile(r'\b\d+\b')
+
+
+@lru_cache(maxsize=256)
+def _query_numbers(query: str) -> tuple:
+    """Integers mentioned in a query (cached: one query is checked against many chunks)."""
+    return tuple(int(n) for n in _NUM_RE.findall(query))
+
+
+@lru_cache(maxsize=4096)
+def _compiled_boundary(term: str) -> re.Pattern:
+    """Compile a whole-word pattern for a term (cached; terms repeat across chunks)."""
+    return re.compile(r'\b' + re.escape(term.lower()) + r'\b')
+
+
+@lru_cache(maxsize=4096)
+def _is_plain_term(term_lower: str) -> bool:
+    """True if a term is only letters/digits and inner spaces (no punctuation)."""
+    return term_lower == term_lower.strip() and term_lower.replace(' ', '').isalnum()
+
+
+def _is_word_char(char: str) -> bool:
+    """Same notion of a word character as regex \\w."""
+    return char.isalnum() or char == '_'
+
+
+def _has_word(query_lower: str, term_lower: str) -> bool:
+    """
+    Whole-word match of a lowercased term, equivalent to _compiled_boundary(term).search().
+    
+    Plain terms (most query_must terms, e.g. "cleric" or "armor class 6") are
+    found with str.find plus a check of the neighbouring characters, which is
+    much cheaper than a regex search. Other terms fall back to the regex.
+    """
+    if not _is_plain_term(term_lower):
+        return bool(_compiled_boundary(term_lower).search(query_lower))
+    
+    term_len = len(term_lower)
+    query_len = len(query_lower)
+    start = query_lower.find(term_lower)
+    while start != -1:
+        end = start + term_len
+        if ((start == 0 or not _is_word_char(query_lower[start - 1])) and
+                (end == query_len or not _is_word_char(query_lower[end]))):
+            return True
+        start = query_lower.find(term_lower, start + 1)
+    return False
+
+
+@lru_cache(maxsize=4096)
+def _compiled_plural(term: str) -> re.Pattern:
+    """Compile a whole-word pattern for a term allowing an optional plural 's'."""
+    return re.compile(r'\b' + re.escape(term.lower()) + r's?\b')
+
+
+@lru_cache(maxsize=1024)
+def _term_automaton(terms: tuple):
+    """Build an Aho-Corasick automaton over lowercased terms (cached per term set)."""
+    automaton = ahocorasick.Automaton()
+    for term in terms:
+        term_lower = term.lower()
+        automaton.add_word(term_lower, term_lower)
+    automaton.make_automaton()
+    return automaton
+
+
+def _scan_terms(query_lower: str, terms: tuple) -> set:
+    """
+    Find which terms occur in the query as whole words, in one pass.
+    
+    The automaton reports every substring occurrence; each candidate is then
+    confirmed with the term's word-boundary pattern anchored at that position,
+    so results match the per-term regex search exactly.
+    
+    Args:
+        query_lower: Lowercased query
+        terms: Terms to look for (hashable, so the automaton can be cached)
+        
+    Returns:
+        Set of matched terms (lowercased)
+    """
+    matched = set()
+    if not terms:
+        return matched  # An empty automaton cannot be searched
+    for end_index, term_lower in _term_automaton(terms).iter(query_lower):
+        if term_lower in matched:
+            continue
+        start = end_index - len(term_lower) + 1
+        if _compiled_boundary(term_lower).match(query_lower, start):
+            matched.add(term_lower)
+    return matched
+
+
+@lru_cache(maxsize=2048)
+def parse_query_must(query_must_json: str) -> Any:
+    """
+    Parse a query_must JSON string (as stored in ChromaDB metadata).
+    
+    Many chunks share identical query_must strings, so parsed results are
+    cached by string. The returned object is shared between callers and
+    must be treated as read-only.
+    
+    Uses orjson when installed, falling back to the stdlib json module.
+    
+    Args:
+        query_must_json: JSON-encoded query_must specification
+        
+    Returns:
+        Parsed query_must object
+        
+    Raises:
+        json.JSONDecodeError: If the string is not valid JSON
+            (orjson.JSONDecodeError is a subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(query_must_json)
+    return json.loads(query_must_json)
+
+
+# Operator checks on a lowercased query. satisfies_query_must lowercases once and
+# calls these directly; the public validate_* functions below wrap them.
+def _check_contain_one_of(query_lower: str, query_must: Dict[str, Any]) -> bool:
+    """contain_one_of check on an already-lowercased query."""
+    if "contain_one_of" not in query_must:
+        return True  # No requirement, pass through
+    
+    if ahocorasick is not None:
+        # One scan over the query for every term in every group
+        term_groups = query_must["contain_one_of"]
+        matched = _scan_terms(query_lower, tuple(term for group in term_groups for term in group))
+        return all(any(term.lower() in matched for term in group) for group in term_groups)
+    
+    for term_group in query_must["contain_one_of"]:
+        # Each group is an OR - at least one term must match
+        # Use word boundaries to prevent partial matches
+        group_matched = False
+        for term in term_group:
+            if _has_word(query_lower, term.lower()):
+                group_matched = True
+                break
+        
+        if not group_matched:
+            return False  # This group failed, overall failure
+    
+    return True  # All groups passed
+
+
+def _check_contain_all_of(query_lower: str, query_must: Dict[str, Any]) -> bool:
+    """contain_all_of check on an already-lowercased query."""
+    if "contain_all_of" not in query_must:
+        return True  # No requirement, pass through
+    
+    if ahocorasick is not None:
+        terms = tuple(query_must["contain_all_of"])
+        matched = _scan_terms(query_lower, terms)
+        return all(term.lower() in matched for term in terms)
+    
+    for term in query_must["contain_all_of"]:
+        if not _has_word(query_lower, term.lower()):
+            return False
+    
+    return True
+
+
+def _check_contain(query_lower: str, query_must: Dict[str, Any]) -> bool:
+    """contain check on an already-lowercased query."""
+    if "contain" not in query_must:
+        return True  # No requirement, pass through
+    
+    # Word boundary at start, optional 's' at end for plurals, word boundary after
+    return bool(_compiled_plural(str(query_must["contain"])).search(query_lower))
+
+
+def _check_contain_range(query_lower: str, query_must: Dict[str, Any]) -> bool:
+    """contain_range check on an already-lowercased query."""
+    if "contain_range" not in query_must:
+        return True  # No requirement, pass through
+    
+    range_spec = query_must["contain_range"]
+    min_val = range_spec["min"]
+    max_val = range_spec["max"]
+    
+    # Check if any number in the query falls in range [min, max] (inclusive)
+    return any(min_val <= num <= max_val for num in _query_numbers(query_lower))
 
 
 def validate_contain_one_of(query: str, query_must: Dict[str, Any]) -> bool:
@@ -47,26 +246,7 @@ def validate_contain_one_of(query: str, query_must: Dict[str, Any]) -> bool:
         >>> validate_contain_one_of(query, query_must)
         False
     """
-    if "contain_one_of" not in query_must:
-        return True  # No requirement, pass through
-    
-    query_lower = query.lower()
-    for term_group in query_must["contain_one_of"]:
-        # Each group is an OR - at least one term must match
-        # Use word boundaries to prevent partial matches
-        group_matched = False
-        for term in term_group:
-            term_lower = term.lower()
-            # Escape special regex characters and add word boundaries
-            pattern = r'\b' + re.escape(term_lower) + r'\b'
-            if re.search(pattern, query_lower):
-                group_matched = True
-                break
-        
-        if not group_matched:
-            return False  # This group failed, overall failure
-    
-    return True  # All groups passed
+    return _check_contain_one_of(query.lower(), query_must)
 
 
 def validate_contain_all_of(query: str, query_must: Dict[str, Any]) -> bool:
@@ -95,18 +275,7 @@ def validate_contain_all_of(query: str, query_must: Dict[str, Any]) -> bool:
         >>> validate_contain_all_of(query, query_must)
         False
     """
-    if "contain_all_of" not in query_must:
-        return True  # No requirement, pass through
-    
-    query_lower = query.lower()
-    for term in query_must["contain_all_of"]:
-        term_lower = term.lower()
-        # Escape special regex characters and add word boundaries
-        pattern = r'\b' + re.escape(term_lower) + r'\b'
-        if not re.search(pattern, query_lower):
-            return False
-    
-    return True
+    return _check_contain_all_of(query.lower(), query_must)
 
 
 def validate_contain(query: str, query_must: Dict[str, Any]) -> bool:
@@ -142,19 +311,7 @@ def validate_contain(query: str, query_must: Dict[str, Any]) -> bool:
         >>> validate_contain(query, query_must)
         True
     """
-    if "contain" not in query_must:
-        return True  # No requirement, pass through
-    
-    query_lower = query.lower()
-    term_lower = str(query_must["contain"]).lower()
-    
-    # Escape special regex characters and add word boundary at start
-    # Allow optional 's' at end for plurals, with word boundary after
-    escaped_term = re.escape(term_lower)
-    pattern = r'\b' + escaped_term + r's?\b'
-    
-    return bool(re.search(pattern, query_lower))
-
+    return _check_contain(query.lower(), query_must)
 
 
 def validate_contain_range(query: str, query_must: Dict[str, Any]) -> bool:
@@ -188,18 +345,7 @@ def validate_contain_range(query: str, query_must: Dict[str, Any]) -> bool:
         >>> validate_contain_range(query, query_must)
         True
     """
-    if "contain_range" not in query_must:
-        return True  # No requirement, pass through
-    
-    range_spec = query_must["contain_range"]
-    min_val = range_spec["min"]
-    max_val = range_spec["max"]
-    
-    # Extract all numbers from query using regex
-    numbers = [int(n) for n in re.findall(r'\b\d+\b', query)]
-    
-    # Check if any number falls in range [min, max] (inclusive)
-    return any(min_val <= num <= max_val for num in numbers)
+    return _check_contain_range(query.lower(), query_must)
 
 
 def satisfies_query_must(query: str, query_must: Optional[Dict[str, Any]], debug: bool = False) -> bool:
@@ -254,23 +400,25 @@ def satisfies_query_must(query: str, query_must: Optional[Dict[str, Any]], debug
     if query_must is None or not query_must:
         return True
     
+    query_lower = query.lower()  # Shared by every operator check
+    
     # Call each validation method - all must pass (AND logic)
-    if not validate_contain_one_of(query, query_must):
+    if not _check_contain_one_of(query_lower, query_must):
         if debug:
             print(f"    ❌ Failed contain_one_of: {query_must.get('contain_one_of')}")
         return False
     
-    if not validate_contain_all_of(query, query_must):
+    if not _check_contain_all_of(query_lower, query_must):
         if debug:
             print(f"    ❌ Failed contain_all_of: {query_must.get('contain_all_of')}")
         return False
     
-    if not validate_contain(query, query_must):
+    if not _check_contain(query_lower, query_must):
         if debug:
             print(f"    ❌ Failed contain: {query_must.get('contain')}")
         return False
     
-    if not validate_contain_range(query, query_must):
+    if not _check_contain_range(query_lower, query_must):
         if debug:
             print(f"    ❌ Failed contain_range: {query_must.get('contain_range')}")
         return False
@@ -278,6 +426,147 @@ def satisfies_query_must(query: str, query_must: Optional[Dict[str, Any]], debug
     return True  # All validations passed
 
 
+
+def _pass_all(has_word: Callable[[str], bool], has_contain: Callable[[str], bool], numbers: tuple) -> bool:
+    """Predicate for chunks without query_must restrictions."""
+    return True
+
+
+_pass_all.word_terms = frozenset()
+
+
+def compile_query_must(query_must: Optional[Dict[str, Any]]) -> Callable[..., bool]:
+    """
+    Specialize a query_must spec into a predicate.
+    
+    query_must specs are static chunk metadata; only the query varies. Compiling
+    resolves the spec's structure once (which operators are present, lowercased
+    term tuples, range bounds) so checking a query is a short chain of closures
+    with no dict lookups or branching on operator names.
+    
+    The predicate is called as predicate(has_word, has_contain, numbers):
+    - has_word(term): whole-word match of a lowercased term in the query
+    - has_contain(term): plural-tolerant match for the contain operator
+    - numbers: integers mentioned in the query
+    It has a word_terms attribute listing the terms it passes to has_word, so
+    a batch of predicates can be served by one scan (see filter_chunks).
+    
+    Args:
+        query_must: Parsed query_must specification (None/empty = no restrictions)
+        
+    Returns:
+        Predicate returning True if the query satisfies all requirements
+    """
+    if not query_must:
+        return _pass_all
+    
+    checks = []
+    word_terms = set()
+    
+    if "contain_one_of" in query_must:
+        term_groups = tuple(
+            tuple(term.lower() for term in term_group)
+            for term_group in query_must["contain_one_of"]
+        )
+        for term_group in term_groups:
+            word_terms.update(term_group)
+        checks.append(lambda has_word, has_contain, numbers: all(
+            any(map(has_word, term_group)) for term_group in term_groups
+        ))
+    
+    if "contain_all_of" in query_must:
+        all_terms = tuple(term.lower() for term in query_must["contain_all_of"])
+        word_terms.update(all_terms)
+        checks.append(lambda has_word, has_contain, numbers: all(map(has_word, all_terms)))
+    
+    if "contain" in query_must:
+        contain_term = str(query_must["contain"])
+        checks.append(lambda has_word, has_contain, numbers: has_contain(contain_term))
+    
+    if "contain_range" in query_must:
+        min_val = query_must["contain_range"]["min"]
+        max_val = query_must["contain_range"]["max"]
+        checks.append(lambda has_word, has_contain, numbers: any(
+            min_val <= num <= max_val for num in numbers
+        ))
+    
+    checks = tuple(checks)
+    
+    def predicate(has_word, has_contain, numbers):
+        for check in checks:
+            if not check(has_word, has_contain, numbers):
+                return False
+        return True
+    
+    predicate.word_terms = frozenset(word_terms)
+    return predicate
+
+
+@lru_cache(maxsize=2048)
+def compile_query_must_json(query_must_json: str) -> Callable[..., bool]:
+    """
+    Parse and compile a query_must JSON string (cached by string).
+    
+    Raises:
+        json.JSONDecodeError: If the string is not valid JSON
+    """
+    return compile_query_must(parse_query_must(query_must_json))
+
+
+def filter_chunks(query: str, query_musts: List[Union[Optional[Dict[str, Any]], Callable[..., bool]]]) -> List[bool]:
+    """
+    Check many chunks' query_must requirements against one query in a single pass.
+    
+    Equivalent to [satisfies_query_must(query, qm) for qm in query_musts], but the
+    query is lowercased and its numbers extracted once, and every distinct term
+    across all chunks is looked up in the query once (one Aho-Corasick scan when
+    pyahocorasick is installed). Each chunk is then resolved with set lookups.
+    
+    Args:
+        query: User's natural language query (any case)
+        query_musts: One entry per chunk: a parsed query_must spec (None/empty =
+            no restrictions) or a predicate from compile_query_must()
+        
+    Returns:
+        List of booleans, True where the chunk's requirements are satisfied
+        
+    Examples:
+        >>> filter_chunks("cleric vs armor class 6", [
+        ...     {"contain_one_of": [["cleric"], ["armor class 6"]]},
+        ...     {"contain": "fighter"},
+        ...     None
+        ... ])
+        [True, False, True]
+    """
+    query_lower = query.lower()
+    predicates = [
+        query_must if callable(query_must) else compile_query_must(query_must)
+        for query_must in query_musts
+    ]
+    
+    # Union of whole-word terms (contain_one_of / contain_all_of) across all chunks
+    word_terms = set()
+    for predicate in predicates:
+        word_terms.update(predicate.word_terms)
+    
+    if ahocorasick is not None:
+        matched_words = _scan_terms(query_lower, tuple(sorted(word_terms)))
+    else:
+        matched_words = {term for term in word_terms if _has_word(query_lower, term)}
+    
+    # contain (plural-tolerant) lookups are resolved lazily, once per term
+    matched_contain = {}
+    
+    def has_contain(term):
+        if term not in matched_contain:
+            matched_contain[term] = bool(_compiled_plural(term).search(query_lower))
+        return matched_contain[term]
+    
+    has_word = matched_words.__contains__
+    numbers = _query_numbers(query_lower)
+    return [predicate(has_word, has_contain, numbers) for predicate in predicates]
+
+
 if __name__ == "__main__":
     # Self-test examples
     print("Testing query_must_filter.py...")
@@ -4,7 +4,6 @@ Complex Table Transformer
 Transforms markdown tables to structured JSON using OpenAI's LLM.
 """
 
-from .table_transformer import TableTransformer
 from .data_models import TableRecord, TransformationResult, TransformationReport
 
 __all__ = [
@@ -13,3 +12,12 @@ __all__ = [
     "TransformationResult",
     "TransformationReport",
 ]
+
+
+def __getattr__(name):
+    # TableTransformer pulls in openai; load it on first use so the
+    # `python -m src.transformers.cli` entry point starts quickly
+    if name == "TableTransformer":
+        from .table_transformer import TableTransformer
+        return TableTransformer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
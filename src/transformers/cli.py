@@ -9,8 +9,6 @@ import argparse
 import sys
 from pathlib import Path
 
-from src.transformers.table_transformer import TableTransformer
-
 
 def main():
     """Main CLI entry point."""
@@ -59,7 +57,39 @@ Examples:
         "--delay",
         type=float,
         default=1.0,
-        help="Delay between API calls in seconds (default: 1.0)"
+        help="Average delay between API calls in seconds, used as a request rate limit (default: 1.0)"
+    )
+    
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=8,
+        help="Maximum number of tables transformed at once (default: 8)"
+    )
+    
+    parser.add_argument(
+        "--requests-per-minute",
+        type=int,
+        help="OpenAI requests-per-minute limit (default: derived from --delay)"
+    )
+    
+    parser.add_argument(
+        "--tokens-per-minute",
+        type=int,
+        help="OpenAI tokens-per-minute limit (default: no limit)"
+    )
+    
+    parser.add_argument(
+        "--tables-per-batch",
+        type=int,
+        default=1,
+        help="Maximum tables sent in one API request (default: 1)"
+    )
+    
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Submit tables through the OpenAI Batch API at half the cost and wait for the results (up to 24h)"
     )
     
     parser.add_argument(
@@ -79,6 +109,11 @@ Examples:
         help="OpenAI API key (if not set in .env)"
     )
     
+    parser.add_argument(
+        "--cache-dir",
+        help="Cache transformed tables here; re-runs reuse identical tables without API calls"
+    )
+    
     # Parse arguments
     args = parser.parse_args()
     
@@ -96,6 +131,9 @@ Examples:
     
     # Execute transformation
     try:
+        # Imported after argument validation so --help and bad paths stay fast
+        from src.transformers.table_transformer import TableTransformer
+        
         transformer = TableTransformer(
             markdown_file=args.markdown_file,
             table_list_file=args.table_list_file,
@@ -103,10 +141,15 @@ Examples:
             api_key=args.api_key,
             model=args.model,
             delay_seconds=args.delay,
-            cost_limit_usd=args.cost_limit
+            cost_limit_usd=args.cost_limit,
+            cache_dir=args.cache_dir,
+            max_concurrent=args.max_concurrent,
+            requests_per_minute=args.requests_per_minute,
+            tokens_per_minute=args.tokens_per_minute,
+            tables_per_batch=args.tables_per_batch
         )
         
-        report = transformer.transform(dry_run=args.dry_run)
+        report = transformer.transform(dry_run=args.dry_run, batch_mode=args.batch_api)
         
         # Display success message
         if args.dry_run:
@@ -0,0 +1,156 @@
+"""
+Numba-compiled table preprocessing kernel.
+
+Optional accelerator for TablePreprocessor: the same whitespace stripping
+and separator compression as TablePreprocessor._preprocess_lines_fast(),
+compiled to machine code and run over the table's bytes. Importing this
+module raises ImportError when numba (or numpy) is not installed.
+
+The kernel only understands ASCII whitespace, so callers must only pass
+ASCII tables (str.strip() also strips Unicode whitespace).
+"""
+
+import numpy as np
+from numba import njit
+
+PIPE = 124      # '|'
+HYPHEN = 45     # '-'
+NEWLINE = 10    # '\n'
+SPACE = 32      # ' '
+
+
+@njit(cache=True)
+def _is_space(byte):
+    """ASCII whitespace as str.strip() sees it (\\t-\\r, \\x1c-\\x1f, space)."""
+    return (9 <= byte <= 13) or (28 <= byte <= 32)
+
+
+@njit(cache=True)
+def compress_table_bytes(buf):
+    """
+    Preprocess an ASCII markdown table held in a uint8 array.
+
+    Lines are split on '\\n'. Blank lines and the cells outside the first
+    and last '|' are copied unchanged. Separator lines (stripped line
+    starts and ends with '|' and contains '---') get '---' for every inner
+    cell containing a hyphen; other lines get every inner cell stripped
+    and padded with one space.
+
+    Args:
+        buf: Table bytes (uint8 array)
+
+    Returns:
+        Preprocessed table bytes (uint8 array)
+    """
+    n = buf.shape[0]
+    # Inner cells grow by at most 2 bytes and are delimited by pipes
+    out = np.empty(3 * n + 3, dtype=np.uint8)
+    o = 0
+    line_start = 0
+    while True:
+        line_end = line_start
+        while line_end < n and buf[line_end] != NEWLINE:
+            line_end += 1
+
+        # Stripped bounds of the line
+        a = line_start
+        while a < line_end and _is_space(buf[a]):
+            a += 1
+        b = line_end
+        while b > a and _is_space(buf[b - 1]):
+            b -= 1
+
+        first = line_start
+        while first < line_end and buf[first] != PIPE:
+            first += 1
+
+        if a == b or first == line_end:
+            # Blank line or no cells: copy as-is
+            for k in range(line_start, line_end):
+                out[o] = buf[k]
+                o += 1
+        else:
+            separator = False
+            if buf[a] == PIPE and buf[b - 1] == PIPE:
+                for k in range(a, b - 2):
+                    if buf[k] == HYPHEN and buf[k + 1] == HYPHEN and buf[k + 2] == HYPHEN:
+                        separator = True
+                        break
+
+            last = line_end - 1
+            while buf[last] != PIPE:
+                last -= 1
+
+            # Leading outer cell and first pipe
+            for k in range(line_start, first + 1):
+                out[o] = buf[k]
+                o += 1
+
+            # Inner cells, each followed by its closing pipe
+            cell_start = first + 1
+            while cell_start <= last and first < last:
+                cell_end = cell_start
+                while buf[cell_end] != PIPE:
+                    cell_end += 1
+
+                if separator:
+                    has_hyphen = False
+                    for k in range(cell_start, cell_end):
+                        if buf[k] == HYPHEN:
+                            has_hyphen = True
+                            break
+                    if has_hyphen:
+                        out[o] = HYPHEN
+                        out[o + 1] = HYPHEN
+                        out[o + 2] = HYPHEN
+                        o += 3
+                    else:
+                        for k in range(cell_start, cell_end):
+                            out[o] = buf[k]
+                            o += 1
+                else:
+                    c = cell_start
+                    while c < cell_end and _is_space(buf[c]):
+                        c += 1
+                    d = cell_end
+                    while d > c and _is_space(buf[d - 1]):
+                        d -= 1
+                    out[o] = SPACE
+                    o += 1
+                    if d > c:
+                        for k in range(c, d):
+                            out[o] = buf[k]
+                            o += 1
+                        out[o] = SPACE
+                        o += 1
+
+                out[o] = PIPE
+                o += 1
+                cell_start = cell_end + 1
+
+            # Trailing outer cell
+            for k in range(last + 1, line_end):
+                out[o] = buf[k]
+                o += 1
+
+        if line_end >= n:
+            break
+        out[o] = NEWLINE
+        o += 1
+        line_start = line_end + 1
+
+    return out[:o]
+
+
+def compress_table_text(table_markdown: str) -> str:
+    """
+    Preprocess an ASCII markdown table with the compiled kernel.
+
+    Args:
+        table_markdown: ASCII table text
+
+    Returns:
+        Preprocessed table text
+    """
+    buf = np.frombuffer(table_markdown.encode('ascii'), dtype=np.uint8)
+    return compress_table_bytes(buf).tobytes().decode('ascii')
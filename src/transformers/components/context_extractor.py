@@ -7,10 +7,13 @@ heading boundaries. Context is bounded by the nearest heading before
 the table and the next heading of equal or higher level after the table.
 """
 
-import re
+import bisect
+import itertools
 import logging
 from typing import List, Tuple, Optional
 
+from .markdown_file_reader import LINE_TABLE
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,18 +34,39 @@ class ContextExtractor:
     - Heading level comparison: fewer # = higher level (e.g., ## > ###)
     """
     
-    HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+)$')
-    TABLE_LINE_PATTERN = re.compile(r'^\|')
-    
-    def __init__(self, markdown_lines: List[str]):
+    def __init__(self, markdown_lines: List[str], line_classes: Optional[List[int]] = None):
         """
         Initialize context extractor with markdown file content.
         
         Args:
             markdown_lines: List of lines from markdown file (1-indexed when used)
+            line_classes: Optional per-line classes for these same lines from
+                MarkdownFileReader.classify_lines(); when given, lines are not
+                re-parsed here
         """
         self.markdown_lines = markdown_lines
-        logger.info(f"ContextExtractor initialized with {len(markdown_lines)} lines")
+        
+        # Index the headings once (sorted 1-indexed line numbers with their levels)
+        # so each table's boundary lookups are a bisect instead of a line scan
+        self._heading_line_numbers: List[int] = []
+        self._heading_line_levels: List[int] = []
+        # Per-line "not a table line" flags, built on first extract_contexts() call
+        self._non_table_line_flags: Optional[List[bool]] = None
+        
+        if line_classes is not None:
+            for line_number, line_class in enumerate(line_classes, 1):
+                if 1 <= line_class <= 6:
+                    self._heading_line_numbers.append(line_number)
+                    self._heading_line_levels.append(line_class)
+            self._non_table_line_flags = [line_class != LINE_TABLE for line_class in line_classes]
+        else:
+            for line_number, line in enumerate(markdown_lines, 1):
+                heading_level = self.get_heading_level(line)
+                if heading_level is not None:
+                    self._heading_line_numbers.append(line_number)
+                    self._heading_line_levels.append(heading_level)
+        
+        logger.info("ContextExtractor initialized with %d lines", len(markdown_lines))
     
     def extract_context(
         self, 
@@ -67,44 +91,116 @@ class ContextExtractor:
             ValueError: If line numbers are invalid
         """
         # Validate line numbers
-        if table_start < 1 or table_end > len(self.markdown_lines):
-            raise ValueError(
-                f"Invalid line numbers: start={table_start}, end={table_end}, "
-                f"file has {len(self.markdown_lines)} lines"
-            )
-        if table_start > table_end:
-            raise ValueError(
-                f"Invalid range: start={table_start} > end={table_end}"
-            )
+        self._validate_table_range(table_start, table_end)
         
         # Find context boundaries
         context_start, heading_level = self.find_heading_before(table_start)
         context_end = self.find_next_heading(table_end, heading_level)
         
         logger.debug(
-            f"Context boundaries for table at lines {table_start}-{table_end}: "
-            f"lines {context_start}-{context_end} (heading level {heading_level})"
+            "Context boundaries for table at lines %d-%d: lines %d-%d (heading level %d)",
+            table_start, table_end, context_start, context_end, heading_level
         )
         
         # Extract lines (convert to 0-indexed for slicing)
         context_lines = self.markdown_lines[context_start - 1:context_end - 1]
         
-        # Filter out table lines
-        filtered_lines = self.filter_table_lines(context_lines)
-        
-        context = '\n'.join(filtered_lines)
+        # Filter out table lines (joined straight from a generator, so no
+        # intermediate list of the kept lines is built)
+        context = '\n'.join(
+            line for line in context_lines if not line.lstrip().startswith('|')
+        )
         logger.info(
-            f"Extracted context: {len(context_lines)} lines total, "
-            f"{len(filtered_lines)} lines after filtering tables"
+            "Extracted context: %d lines total, %d characters after filtering tables",
+            len(context_lines), len(context)
         )
         
         return context
     
+    def extract_contexts(self, tables: List[Tuple[int, int]]) -> List[str]:
+        """
+        Extract and filter context for many tables in one sweep.
+        
+        Returns the same strings as calling extract_context() for each table,
+        but visits the tables in line order so the heading before each one is
+        found by advancing a single pointer through the heading index, and
+        each line's table/non-table status is computed once for all contexts
+        (contexts of tables in the same section overlap heavily).
+        
+        Args:
+            tables: (table_start, table_end) pairs, 1-indexed, in any order
+            
+        Returns:
+            Filtered contexts, in the same order as tables
+            
+        Raises:
+            ValueError: If any table's line numbers are invalid
+        """
+        for table_start, table_end in tables:
+            self._validate_table_range(table_start, table_end)
+        
+        if self._non_table_line_flags is None:
+            self._non_table_line_flags = [
+                not line.lstrip().startswith('|') for line in self.markdown_lines
+            ]
+        non_table_line_flags = self._non_table_line_flags
+        heading_line_numbers = self._heading_line_numbers
+        heading_line_levels = self._heading_line_levels
+        heading_count = len(heading_line_numbers)
+        end_of_file = len(self.markdown_lines) + 1
+        
+        contexts: List[str] = [''] * len(tables)
+        heading_index = 0  # First heading at or after the current table's start
+        for position in sorted(range(len(tables)), key=lambda position: tables[position][0]):
+            table_start, table_end = tables[position]
+            while heading_index < heading_count and heading_line_numbers[heading_index] < table_start:
+                heading_index += 1
+            
+            # Nearest heading before the table (or start of file, lowest priority)
+            if heading_index > 0:
+                context_start = heading_line_numbers[heading_index - 1]
+                heading_level = heading_line_levels[heading_index - 1]
+            else:
+                context_start, heading_level = 1, 6
+            
+            # Next heading of equal or higher level after the table (or end of file)
+            context_end = end_of_file
+            for index in range(bisect.bisect_right(heading_line_numbers, table_end, heading_index),
+                               heading_count):
+                if heading_line_levels[index] <= heading_level:
+                    context_end = heading_line_numbers[index]
+                    break
+            
+            contexts[position] = '\n'.join(itertools.compress(
+                self.markdown_lines[context_start - 1:context_end - 1],
+                non_table_line_flags[context_start - 1:context_end - 1]
+            ))
+        
+        logger.info("Extracted contexts for %d tables", len(tables))
+        return contexts
+    
+    def _validate_table_range(self, table_start: int, table_end: int) -> None:
+        """
+        Check that a table's line range lies within the file.
+        
+        Raises:
+            ValueError: If line numbers are invalid
+        """
+        if table_start < 1 or table_end > len(self.markdown_lines):
+            raise ValueError(
+                f"Invalid line numbers: start={table_start}, end={table_end}, "
+                f"file has {len(self.markdown_lines)} lines"
+            )
+        if table_start > table_end:
+            raise ValueError(
+                f"Invalid range: start={table_start} > end={table_end}"
+            )
+    
     def find_heading_before(self, line_number: int) -> Tuple[int, int]:
         """
         Find the nearest heading before a given line number.
         
-        Scans backward from line_number - 1 to find the first heading.
+        Looks up the last indexed heading before line_number.
         
         Args:
             line_number: 1-indexed line number to search before
@@ -113,16 +209,16 @@ class ContextExtractor:
             Tuple of (heading_line_number, heading_level)
             If no heading found, returns (1, 6) meaning start of file with lowest priority
         """
-        # Scan backward from line_number - 1
-        for i in range(line_number - 1, 0, -1):
-            line = self.markdown_lines[i - 1]  # Convert to 0-indexed
-            heading_level = self.get_heading_level(line)
-            if heading_level is not None:
-                logger.debug(f"Found heading at line {i}, level {heading_level}")
-                return (i, heading_level)
+        # Last heading strictly before line_number
+        index = bisect.bisect_left(self._heading_line_numbers, line_number) - 1
+        if index >= 0:
+            i = self._heading_line_numbers[index]
+            heading_level = self._heading_line_levels[index]
+            logger.debug("Found heading at line %d, level %d", i, heading_level)
+            return (i, heading_level)
         
         # No heading found, use start of file
-        logger.debug(f"No heading found before line {line_number}, using start of file")
+        logger.debug("No heading found before line %d, using start of file", line_number)
         return (1, 6)  # Level 6 is lowest priority
     
     def find_next_heading(
@@ -134,7 +230,8 @@ class ContextExtractor:
         Find the next heading of equal or higher level after a given line.
         
         "Higher level" means fewer # characters (e.g., ## is higher than ###).
-        Scans forward from line_number + 1 to find first matching heading.
+        Starts at the first indexed heading after line_number and skips
+        lower-level (more #) headings until one qualifies.
         
         Args:
             line_number: 1-indexed line number to search after
@@ -143,22 +240,23 @@ class ContextExtractor:
         Returns:
             1-indexed line number of next heading, or len(lines) + 1 if none found
         """
-        # Scan forward from line_number + 1
-        for i in range(line_number + 1, len(self.markdown_lines) + 1):
-            line = self.markdown_lines[i - 1]  # Convert to 0-indexed
-            heading_level = self.get_heading_level(line)
-            if heading_level is not None and heading_level <= min_level:
+        # Headings strictly after line_number, in file order
+        for index in range(bisect.bisect_right(self._heading_line_numbers, line_number),
+                           len(self._heading_line_numbers)):
+            heading_level = self._heading_line_levels[index]
+            if heading_level <= min_level:
+                i = self._heading_line_numbers[index]
                 logger.debug(
-                    f"Found next heading at line {i}, level {heading_level} "
-                    f"(min_level={min_level})"
+                    "Found next heading at line %d, level %d (min_level=%d)",
+                    i, heading_level, min_level
                 )
                 return i
         
         # No heading found, use end of file
         end_line = len(self.markdown_lines) + 1
         logger.debug(
-            f"No heading found after line {line_number} with level <= {min_level}, "
-            f"using end of file (line {end_line})"
+            "No heading found after line %d with level <= %d, using end of file (line %d)",
+            line_number, min_level, end_line
         )
         return end_line
     
@@ -172,9 +270,11 @@ class ContextExtractor:
         Returns:
             Heading level (1-6) if line is a heading, None otherwise
         """
-        match = self.HEADING_PATTERN.match(line.strip())
-        if match:
-            level = len(match.group(1))  # Count # characters
+        # Hand-rolled equivalent of r'^(#{1,6})\s+(.+)$' on the stripped line:
+        # most lines fail on the first character, so skip the regex engine
+        stripped = line.strip()
+        level = len(stripped) - len(stripped.lstrip('#'))  # Count # characters
+        if 1 <= level <= 6 and len(stripped) > level and stripped[level].isspace():
             return level
         return None
     
@@ -190,8 +290,4 @@ class ContextExtractor:
         Returns:
             List of lines with table content removed
         """
-        filtered = []
-        for line in lines:
-            if not self.TABLE_LINE_PATTERN.match(line.strip()):
-                filtered.append(line)
-        return filtered
+        return [line for line in lines if not line.lstrip().startswith('|')]
@@ -6,13 +6,25 @@ Handles writing transformed markdown files with backup creation.
 """
 
 import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
-from datetime import datetime
+from typing import List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+def _fsync_path(path: Path) -> None:
+    """Flush a file's (or POSIX directory's) data to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
 class FileWriter:
     """
     Writes transformed markdown content to files with backup support.
@@ -33,6 +45,9 @@ class FileWriter:
         """
         self.output_dir = Path(output_dir)
         self.backup_dir = self.output_dir / "backups"
+        # Directories already created by this writer (skip repeat mkdir calls)
+        self._output_dir_ready = False
+        self._backup_dir_ready = False
     
     def write_transformed_file(
         self,
@@ -58,25 +73,77 @@ class FileWriter:
         output_path = self.generate_output_filename(original_path)
         
         # Create output directory if needed
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if not self._output_dir_ready:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self._output_dir_ready = True
         
         # Create backup if requested
         if create_backup and original_path.exists():
             self.create_backup(original_path)
         
-        # Write transformed content
-        content = '\n'.join(transformed_lines)
-        output_path.write_text(content, encoding='utf-8')
+        # Write transformed content line by line (same bytes as '\n'.join, but
+        # without materializing and then encoding the whole document at once)
+        with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            lines = iter(transformed_lines)
+            first_line = next(lines, None)
+            if first_line is not None:
+                f.write(first_line)
+                f.writelines('\n' + line for line in lines)
         
         logger.info(f"Wrote transformed file: {output_path}")
         return output_path
     
-    def create_backup(self, original_path: Path) -> Path:
+    def write_transformed_files(
+        self,
+        items: List[Tuple[Path, List[str]]],
+        create_backup: bool = True,
+        fsync: bool = False
+    ) -> List[Path]:
+        """
+        Write several transformed markdown files concurrently.
+        
+        File writes spend most of their time in system calls that release
+        the GIL, so a thread pool keeps several writes in flight at once.
+        
+        Args:
+            items: (original_path, transformed_lines) pairs
+            create_backup: Whether to create backups of the originals
+            fsync: If True, flush all written files and the output directory
+                to disk once every write has finished (one batch of fsyncs
+                instead of one per write)
+            
+        Returns:
+            Output paths, in the same order as items
+            
+        Raises:
+            OSError: If any write fails
+        """
+        if not items:
+            return []
+        
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(items))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            output_paths = list(executor.map(
+                lambda item: self.write_transformed_file(item[0], item[1], create_backup),
+                items
+            ))
+        
+        if fsync:
+            for output_path in output_paths:
+                _fsync_path(output_path)
+            if os.name == "posix":  # Directories can only be fsynced on POSIX
+                _fsync_path(self.output_dir)
+        
+        return output_paths
+    
+    def create_backup(self, original_path: Path, timestamp: Optional[str] = None) -> Path:
         """
         Create timestamped backup of original file.
         
         Args:
             original_path: Path to file to backup
+            timestamp: Timestamp for the backup name (e.g. from a previous
+                get_backup_path() call); defaults to the current time
             
         Returns:
             Path to created backup file
@@ -85,18 +152,16 @@ class FileWriter:
             OSError: If backup creation fails
         """
         # Create backup directory
-        self.backup_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if not self._backup_dir_ready:
+            self.backup_dir.mkdir(parents=True, exist_ok=True)
+            self._backup_dir_ready = True
         
         # Generate backup filename
-        backup_filename = f"{original_path.stem}_{timestamp}{original_path.suffix}"
-        backup_path = self.backup_dir / backup_filename
+        backup_path = self.get_backup_path(original_path, timestamp)
         
-        # Copy file to backup
-        content = original_path.read_text(encoding='utf-8')
-        backup_path.write_text(content, encoding='utf-8')
+        # Copy file to backup (byte-for-byte; no decode/encode round trip,
+        # and the kernel does the copy where the platform supports it)
+        shutil.copyfile(original_path, backup_path)
         
         logger.info(f"Created backup: {backup_path}")
         return backup_path
@@ -117,19 +182,22 @@ class FileWriter:
         output_filename = f"{original_path.stem}_with_json_tables{original_path.suffix}"
         return self.output_dir / output_filename
     
-    def get_backup_path(self, original_path: Path) -> Path:
+    def get_backup_path(self, original_path: Path, timestamp: Optional[str] = None) -> Path:
         """
         Get the backup path that would be used for a file.
         
-        Note: This generates a path with current timestamp.
-        The actual backup filename will differ if created later.
+        Note: Without a timestamp this uses the current time, so a backup
+        created later may get a different name. Pass the same timestamp to
+        create_backup() to get exactly this path.
         
         Args:
             original_path: Path to original file
+            timestamp: Timestamp for the backup name; defaults to the current time
             
         Returns:
-            Path where backup would be created (with current timestamp)
+            Path where backup would be created
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if timestamp is None:
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
         backup_filename = f"{original_path.stem}_{timestamp}{original_path.suffix}"
         return self.backup_dir / backup_filename
@@ -8,6 +8,11 @@ Uses 1-indexed line numbers to match editor conventions.
 from pathlib import Path
 from typing import List
 
+# Line classes returned by MarkdownFileReader.classify_lines()
+# (values 1-6 are markdown heading levels)
+LINE_OTHER = 0
+LINE_TABLE = 7
+
 
 class MarkdownFileReader:
     """Reads markdown files and extracts specific line ranges."""
@@ -26,6 +31,11 @@ class MarkdownFileReader:
         if not self.file_path.exists():
             raise FileNotFoundError(f"File not found: {self.file_path}")
         self._lines: List[str] | None = None
+        # Whole file text plus the offset where each line starts (with a final
+        # end offset), so line ranges are extracted as one slice of the text
+        self._text: str | None = None
+        self._line_starts: List[int] | None = None
+        self._line_classes: List[int] | None = None
 
     def read_file(self) -> str:
         """
@@ -57,12 +67,44 @@ class MarkdownFileReader:
             IOError: If the file cannot be read
         """
         if self._lines is None:
+            text, line_starts = self._load()
+            self._lines = [
+                text[line_starts[i] : line_starts[i + 1]]
+                for i in range(len(line_starts) - 1)
+            ]
+        return self._lines
+
+    def _load(self) -> tuple[str, List[int]]:
+        """
+        Read the file once and index where each line starts.
+
+        Lines are split on newline characters exactly as readlines() would
+        (after universal-newline translation).
+
+        Returns:
+            Tuple of (file text, line start offsets followed by the end offset)
+
+        Raises:
+            IOError: If the file cannot be read
+        """
+        if self._text is None:
             try:
                 with open(self.file_path, "r", encoding="utf-8") as f:
-                    self._lines = f.readlines()
+                    text = f.read()
             except IOError as e:
                 raise IOError(f"Failed to read file {self.file_path}: {e}")
-        return self._lines
+
+            line_starts = [0]
+            newline = text.find("\n")
+            while newline != -1:
+                line_starts.append(newline + 1)
+                newline = text.find("\n", newline + 1)
+            if line_starts[-1] != len(text):
+                line_starts.append(len(text))  # Last line has no trailing newline
+
+            self._text = text
+            self._line_starts = line_starts
+        return self._text, self._line_starts
 
     def extract_lines(self, start_line: int, end_line: int) -> str:
         """
@@ -90,22 +132,53 @@ class MarkdownFileReader:
                 f"end_line ({end_line}) must be >= start_line ({start_line})"
             )
 
-        # Read lines (cached)
-        lines = self.read_lines()
+        # Read file and line offsets (cached)
+        text, line_starts = self._load()
+        line_count = len(line_starts) - 1
 
         # Check bounds
-        if start_line > len(lines):
+        if start_line > line_count:
             raise ValueError(
-                f"start_line ({start_line}) exceeds file length ({len(lines)} lines)"
+                f"start_line ({start_line}) exceeds file length ({line_count} lines)"
             )
-        if end_line > len(lines):
+        if end_line > line_count:
             raise ValueError(
-                f"end_line ({end_line}) exceeds file length ({len(lines)} lines)"
+                f"end_line ({end_line}) exceeds file length ({line_count} lines)"
             )
 
-        # Extract lines (convert to 0-indexed)
-        extracted = lines[start_line - 1 : end_line]
-        return "".join(extracted)
+        # Extract lines as a single slice (convert to 0-indexed offsets)
+        return text[line_starts[start_line - 1] : line_starts[end_line]]
+
+    def classify_lines(self) -> List[int]:
+        """
+        Classify every line as a heading, table line, or other text.
+
+        Computed once per file (cached) so consumers such as ContextExtractor
+        do not each re-parse every line. Headings follow the ATX rule used by
+        ContextExtractor.get_heading_level (1-6 '#' then whitespace); table
+        lines start with '|' after leading whitespace.
+
+        Returns:
+            One entry per line: heading level 1-6, LINE_TABLE, or LINE_OTHER
+
+        Raises:
+            IOError: If the file cannot be read
+        """
+        if self._line_classes is None:
+            line_classes = []
+            for line in self.read_lines():
+                stripped = line.strip()
+                first_char = stripped[:1]
+                if first_char == "#":
+                    level = len(stripped) - len(stripped.lstrip("#"))
+                    is_heading = level <= 6 and len(stripped) > level and stripped[level].isspace()
+                    line_classes.append(level if is_heading else LINE_OTHER)
+                elif first_char == "|":
+                    line_classes.append(LINE_TABLE)
+                else:
+                    line_classes.append(LINE_OTHER)
+            self._line_classes = line_classes
+        return self._line_classes
 
     def get_line_count(self) -> int:
         """
@@ -114,4 +187,4 @@ class MarkdownFileReader:
         Returns:
             Total number of lines
         """
-        return len(self.read_lines())
+        return len(self._load()[1]) - 1
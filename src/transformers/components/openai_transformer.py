@@ -7,16 +7,252 @@ JSON arrays with descriptive property names. Each data row becomes
 a separate JSON object with a title property for heading generation.
 """
 
+import asyncio
+import importlib.util
 import json
-import re
+import random
+import threading
 import time
 import logging
-from typing import List, Dict, Any, Tuple, Optional
-from openai import OpenAI
-from openai import APIError, RateLimitError, APITimeoutError
+import weakref
+from functools import cached_property
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from ...utils.api_rate_limiter import ApiRateLimiter
+from ...utils.response_cache import ResponseCache
+
+try:
+    import orjson  # Optional: faster parsing of large JSON responses
+except ImportError:
+    orjson = None
+
+try:
+    import tiktoken  # Optional: exact prompt token counts for rate limiting
+except ImportError:
+    tiktoken = None
 
 logger = logging.getLogger(__name__)
 
+# Connection pool size for the shared HTTP clients (keep-alive connections are
+# reused across requests and transformers instead of re-doing TLS handshakes)
+HTTP_MAX_CONNECTIONS = 64
+
+_shared_http_client = None
+_shared_async_http_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_shared_http_lock = threading.Lock()
+
+
+def _http_client_options() -> Dict[str, Any]:
+    """Connection limits (and HTTP/2 when the h2 package is installed)."""
+    import httpx
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS
+        ),
+        "http2": importlib.util.find_spec("h2") is not None
+    }
+
+
+def get_shared_http_client():
+    """
+    Get the process-wide HTTP client used by synchronous OpenAI clients.
+    
+    Every OpenAITransformer shares one connection pool, so creating
+    transformers per document doesn't repeat TLS handshakes.
+    """
+    global _shared_http_client
+    with _shared_http_lock:
+        if _shared_http_client is None:
+            from openai import DefaultHttpxClient
+            _shared_http_client = DefaultHttpxClient(**_http_client_options())
+        return _shared_http_client
+
+
+def get_shared_async_http_client(loop: asyncio.AbstractEventLoop):
+    """
+    Get the HTTP client used by async OpenAI clients on an event loop.
+    
+    Async connections belong to the loop that opened them, so there is one
+    shared pool per loop (released when the loop is garbage collected).
+    
+    Args:
+        loop: Event loop the client will be used on
+    """
+    with _shared_http_lock:
+        http_client = _shared_async_http_clients.get(loop)
+        if http_client is None:
+            from openai import DefaultAsyncHttpxClient
+            http_client = DefaultAsyncHttpxClient(**_http_client_options())
+            _shared_async_http_clients[loop] = http_client
+        return http_client
+
+
+def _loads_json(text: str) -> Any:
+    """
+    Parse JSON with orjson when installed, else the stdlib json module.
+    
+    Raises:
+        json.JSONDecodeError: If the text is not valid JSON
+            (orjson.JSONDecodeError is a subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _find_fenced_array_start(text: str) -> int:
+    """
+    Find the '[' that opens a JSON array inside a ``` or ```json code fence.
+    
+    Args:
+        text: Response text
+        
+    Returns:
+        Index of the '[', or -1 if no fence is followed by an array
+    """
+    fence = text.find('```')
+    while fence != -1:
+        index = fence + 3
+        if text.startswith('json', index):
+            index += 4
+        while index < len(text) and text[index].isspace():
+            index += 1
+        if text.startswith('[', index):
+            return index
+        fence = text.find('```', fence + 3)
+    return -1
+
+
+def _find_json_span(text: str, start: int = 0) -> Optional[Tuple[int, int, bool]]:
+    """
+    Find the first complete JSON array or object at or after start.
+    
+    Walks the text once from the first '[' or '{', tracking bracket depth
+    and ignoring brackets inside string literals, so surrounding prose or
+    code fences are never rescanned.
+    
+    Args:
+        text: Response text
+        start: Index to start searching from
+        
+    Returns:
+        Tuple of (span_start, span_end, is_array) for text[span_start:span_end],
+        or None if there is no '[' or '{'. An unclosed value runs to the end
+        of the text (so parsing it reports invalid JSON).
+    """
+    array_start = text.find('[', start)
+    object_start = text.find('{', start)
+    if array_start == -1 and object_start == -1:
+        return None
+    if array_start == -1 or (object_start != -1 and object_start < array_start):
+        span_start = object_start
+    else:
+        span_start = array_start
+    is_array = span_start == array_start
+    
+    depth = 0
+    in_string = False
+    escape = False
+    for index in range(span_start, len(text)):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '[' or char == '{':
+            depth += 1
+        elif char == ']' or char == '}':
+            depth -= 1
+            if depth == 0:
+                return span_start, index + 1, is_array
+    
+    return span_start, len(text), is_array
+
+
+class _StreamingRowParser:
+    """
+    Pulls complete row objects out of a JSON response as it streams in.
+    
+    Tracks bracket depth and string state across chunks. The first array
+    seen (the bare array, or the "rows" array of a JSON mode object) holds
+    the rows; each object directly inside it is emitted as soon as its
+    closing brace arrives. Text before the first bracket is ignored.
+    """
+    
+    def __init__(self):
+        self._text = ''  # Unscanned text plus any row still being received
+        self._pos = 0  # Next index of _text to scan
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._rows_depth: Optional[int] = None  # Depth of the rows array
+        self._row_start: Optional[int] = None  # Index in _text of the current row's '{'
+    
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Add streamed text.
+        
+        Args:
+            chunk: Next piece of the response
+            
+        Returns:
+            JSON text of each row object completed by this chunk
+        """
+        text = self._text + chunk
+        rows: List[str] = []
+        index = self._pos
+        while index < len(text):
+            char = text[index]
+            if not self._started:
+                if char != '[' and char != '{':
+                    index += 1
+                    continue
+                self._started = True
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '[' or char == '{':
+                self._depth += 1
+                if char == '[' and self._rows_depth is None:
+                    self._rows_depth = self._depth
+                elif (char == '{' and self._rows_depth is not None
+                      and self._depth == self._rows_depth + 1):
+                    self._row_start = index
+            elif char == ']' or char == '}':
+                if (char == '}' and self._row_start is not None
+                        and self._depth == self._rows_depth + 1):
+                    rows.append(text[self._row_start:index + 1])
+                    self._row_start = None
+                self._depth -= 1
+            index += 1
+        
+        # Keep only the partially received row (if any)
+        keep_from = self._row_start if self._row_start is not None else index
+        self._text = text[keep_from:]
+        self._pos = index - keep_from
+        if self._row_start is not None:
+            self._row_start = 0
+        return rows
+    
+    @property
+    def complete(self) -> bool:
+        """Whether the JSON value seen so far has been closed."""
+        return self._started and self._depth == 0
+
 
 class OpenAITransformer:
     """
@@ -30,8 +266,10 @@ class OpenAITransformer:
     - Error handling
     """
     
-    # Prompt template requesting array output (one JSON object per row)
-    PROMPT_TEMPLATE = """You are an expert in giving JSON objects self-documenting, human-friendly property names that describe what the property represents.
+    # Static instructions, sent as the system message. Kept byte-identical
+    # across requests (no formatting) so OpenAI's automatic prompt caching
+    # can reuse this prefix; only USER_TEMPLATE varies per table.
+    SYSTEM_INSTRUCTIONS = """You are an expert in giving JSON objects self-documenting, human-friendly property names that describe what the property represents.
 
 I will provide you with a table in markdown format, and text that describes the data the table represents. 
 
@@ -70,35 +308,35 @@ The JSON should follow these exact formatting rules:
         - If the y-axis column represents a numerical range (like "10-13" for ability scores), use query_must.contain_range with min and max values. Also include the ability/stat names in contain_one_of.
 
         - Example: query_must for attack matrix with abbreviations:
-        {{
-            "query_must": {{
+        {
+            "query_must": {
                 "contain_one_of": [
                     ["cleric", "clerics", "druid", "druids", "monk", "monks"],
                     ["opponent armor class 3", "armor class 3", "a.c. 3", "ac 3"]
                 ]
-            }}
-        }}
+            }
+        }
 
         - Example: query_must with single y-axis name/value pair:
-        {{
-            "query_must": {{
+        {
+            "query_must": {
                 "contain_one_of": [
                     ["temperate", "forest", "woodland"]
                 ],
                 "contain": "encounter"
-            }}
-        }}
+            }
+        }
 
         - Example: query_must for psionic table with stat range:
-        {{
-            "query_must": {{
+        {
+            "query_must": {
                 "contain_one_of": [
                     ["psionic", "psionic blast", "psychic", "psionics"],
                     ["intelligence", "wisdom", "int", "wis"]
                 ],
-                "contain_range": {{"min": 10, "max": 13}}
-            }}
-        }}
+                "contain_range": {"min": 10, "max": 13}
+            }
+        }
 
         - IMPORTANT: Only add query_must to tables where filtering is useful. Do NOT add query_must to:
             - General reference tables (strength bonuses, equipment lists, spell descriptions)
@@ -114,23 +352,65 @@ Preserve the original data values exactly.
 
 Format the JSON cleanly and consistently.
 
-Return ONLY a JSON array with one object per data row, with no additional explanation or formatting. Do not wrap it in markdown code blocks.
-
-Here is the table:
+Return ONLY a JSON object with a single "rows" property whose value is the array, with one object per data row: {"rows": [...]}. Add no additional explanation or formatting. Do not wrap it in markdown code blocks."""
+    
+    # Per-table user message
+    USER_TEMPLATE = """Here is the table:
 {table_markdown}
 
 Here is the text that describes the table's purpose:
 {table_context}"""
     
+    # User message header for transform_tables_batched(); the system message
+    # stays SYSTEM_INSTRUCTIONS so batched and single requests share a prefix
+    BATCH_USER_HEADER = """Convert each of the following {table_count} tables separately, following all of the rules above. Instead of a single "rows" object, return ONLY a JSON object with one property per table, named by the table's number ("1", "2", ...), whose value is that table's array of row objects: {{"1": [...], "2": [...]}}.
+
+"""
+    
+    # One table's section in a batched user message
+    BATCH_TABLE_TEMPLATE = """## Table {table_number}
+{table_markdown}
+
+### Context {table_number}
+{table_context}
+
+"""
+    
     # Pricing per 1M tokens (gpt-4o-mini, October 2024)
     PRICE_PER_1M_INPUT_TOKENS = 0.150
     PRICE_PER_1M_OUTPUT_TOKENS = 0.600
+    PRICE_PER_INPUT_TOKEN = PRICE_PER_1M_INPUT_TOKENS / 1_000_000
+    PRICE_PER_OUTPUT_TOKEN = PRICE_PER_1M_OUTPUT_TOKENS / 1_000_000
+    
+    # The Batch API bills both input and output at half the above rates
+    BATCH_API_PRICE_FACTOR = 0.5
+    
+    # Seconds between Batch API status checks, and the statuses that end a batch
+    BATCH_POLL_SECONDS = 60.0
+    BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+    
+    # Output tokens reserved per request when gating on tokens-per-minute
+    # (the actual usage replaces the estimate once the response arrives)
+    EXPECTED_OUTPUT_TOKENS = 2000
+    
+    # Retry backoff bounds (decorrelated jitter between these)
+    RETRY_BASE_SECONDS = 1.0
+    RETRY_MAX_SECONDS = 32.0
+    
+    # Async callers parse responses longer than this in a worker thread, so
+    # the event loop keeps serving other requests (shorter ones are cheaper
+    # to parse inline than to hand off)
+    THREAD_PARSE_MIN_CHARS = 8192
     
     def __init__(
         self, 
         api_key: str,
         model: str = "gpt-4o-mini",
-        temperature: float = 0.0
+        temperature: float = 0.0,
+        json_mode: bool = True,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        cache_dir: Optional[str] = None
     ):
         """
         Initialize OpenAI transformer.
@@ -139,12 +419,70 @@ Here is the text that describes the table's purpose:
             api_key: OpenAI API key
             model: Model to use (default: gpt-4o-mini)
             temperature: Temperature for generation (default: 0.0 for deterministic)
+            json_mode: Request response_format json_object, so the model always
+                returns a parseable JSON object (default: True; disable for
+                models without JSON mode)
+            requests_per_minute: Account RPM limit; async calls wait for room
+                instead of hitting 429s (default: None, not gated)
+            tokens_per_minute: Account TPM limit (default: None, not gated)
+            cache_dir: Directory for an on-disk cache of transformed tables;
+                re-running identical tables is then a lookup (default: None, no cache)
         """
-        self.client = OpenAI(api_key=api_key)
+        # The openai package is imported and the clients created on first use
+        # (see client/async_client), so importing this module stays cheap
+        self._api_key = api_key
+        self._async_client = None
+        self._async_client_loop = None
+        self._async_client_pinned = False
         self.model = model
         self.temperature = temperature
+        self.json_mode = json_mode
+        
+        self.rate_limiter: Optional[ApiRateLimiter] = None
+        if requests_per_minute or tokens_per_minute:
+            self.rate_limiter = ApiRateLimiter(requests_per_minute, tokens_per_minute)
+        self._encoding = None  # tiktoken encoding, loaded on first estimate
+        self._instruction_tokens: Optional[int] = None  # SYSTEM_INSTRUCTIONS token count
+        self.response_cache = ResponseCache(cache_dir) if cache_dir else None
         logger.info(f"OpenAITransformer initialized with model={model}, temperature={temperature}")
     
+    @cached_property
+    def client(self):
+        """Synchronous OpenAI client, created on first use (shared connection pool)."""
+        from openai import OpenAI
+        return OpenAI(api_key=self._api_key, http_client=get_shared_http_client())
+    
+    @property
+    def async_client(self):
+        """
+        Async OpenAI client for atransform_table()/transform_tables().
+        
+        Created on first use in each event loop, on that loop's shared
+        connection pool. A client assigned to this attribute is always used.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if self._async_client is None or (not self._async_client_pinned
+                                          and self._async_client_loop is not loop):
+            from openai import AsyncOpenAI
+            if loop is None:
+                self._async_client = AsyncOpenAI(api_key=self._api_key)
+            else:
+                self._async_client = AsyncOpenAI(
+                    api_key=self._api_key,
+                    http_client=get_shared_async_http_client(loop)
+                )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    @async_client.setter
+    def async_client(self, async_client) -> None:
+        self._async_client = async_client
+        self._async_client_pinned = True
+    
     def transform_table(
         self, 
         table_markdown: str,
@@ -164,144 +502,874 @@ Here is the text that describes the table's purpose:
             ValueError: If JSON validation fails
             APIError: If OpenAI API call fails after retries
         """
-        # Construct prompt
-        prompt = self._construct_prompt(table_markdown, table_context)
-        
-        # DEBUG: Log the full prompt
-        logger.info("=" * 80)
-        logger.info("FULL PROMPT SENT TO OPENAI:")
-        logger.info("=" * 80)
-        logger.info(prompt)
-        logger.info("=" * 80)
-        logger.info(f"Prompt length: {len(prompt)} characters")
-        logger.info("=" * 80)
+        prompt = self._prepare_prompt(table_markdown, table_context)
+        cache_key, cached = self._check_cache(prompt)
+        if cached is not None:
+            return cached
         
         # Call OpenAI with retry logic
         try:
-            response, tokens_used = self._call_openai_with_retry(prompt)
-            logger.info("=" * 80)
-            logger.info("OPENAI RESPONSE:")
-            logger.info("=" * 80)
-            logger.info(response[:2000] + ("..." if len(response) > 2000 else ""))
-            logger.info("=" * 80)
-            logger.debug(f"OpenAI response received: {len(response)} chars, {tokens_used} tokens")
+            response, prompt_tokens, completion_tokens = self._call_openai_with_retry(prompt)
         except Exception as e:
             logger.error(f"OpenAI API call failed: {e}")
             raise
         
-        # Extract and validate JSON
+        return self._finish_transform(response, prompt_tokens, completion_tokens, cache_key)
+    
+    async def atransform_table(
+        self, 
+        table_markdown: str,
+        table_context: str
+    ) -> Tuple[List[Dict[str, Any]], int, float]:
+        """
+        Async version of transform_table().
+        
+        Uses the AsyncOpenAI client, so many tables can be in flight at once
+        (see transform_tables()).
+        
+        Args:
+            table_markdown: Markdown table to transform
+            table_context: Context describing the table
+            
+        Returns:
+            Tuple of (json_objects, tokens_used, cost_usd)
+            
+        Raises:
+            ValueError: If JSON validation fails
+            APIError: If OpenAI API call fails after retries
+        """
+        prompt = self._prepare_prompt(table_markdown, table_context)
+        cache_key, cached = self._check_cache(prompt)
+        if cached is not None:
+            return cached
+        
         try:
-            json_objects = self._extract_and_validate_json(response)
-            logger.info(f"Successfully extracted {len(json_objects)} JSON objects")
+            response, prompt_tokens, completion_tokens = await self._acall_openai_with_retry(prompt)
         except Exception as e:
-            logger.error(f"JSON extraction/validation failed: {e}")
-            raise ValueError(f"Failed to extract valid JSON: {e}")
+            logger.error(f"OpenAI API call failed: {e}")
+            raise
+        
+        json_objects = None
+        if len(response) > self.THREAD_PARSE_MIN_CHARS:
+            json_objects = await asyncio.to_thread(self._extract_json_objects, response)
+        
+        return self._finish_transform(
+            response, prompt_tokens, completion_tokens, cache_key, json_objects
+        )
+    
+    async def transform_table_stream(
+        self,
+        table_markdown: str,
+        table_context: str,
+        on_usage: Optional[Callable[[int, float], None]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Transform a table, yielding each row object as soon as it is generated.
+        
+        Streams the completion and parses it incrementally, so consumers can
+        start on the first rows while the rest are still being generated.
+        Rows are validated one at a time (each must be an object with a
+        title); an invalid row closes the stream at once, so the model stops
+        generating (and billing) the rest. A response that ends before its
+        JSON is closed (e.g. cut off at the token limit) is an error rather
+        than a silently truncated table. Retries only cover opening the
+        stream.
+        
+        Args:
+            table_markdown: Markdown table to transform
+            table_context: Context describing the table
+            on_usage: Optional callback, called with (tokens_used, cost_usd)
+                once the stream completes (0 and $0 for a cache hit)
+            
+        Yields:
+            JSON objects, one per table row
+            
+        Raises:
+            ValueError: If a row is invalid, the response contains no rows or
+                the response is truncated
+            APIError: If OpenAI API call fails after retries
+        """
+        prompt = self._prepare_prompt(table_markdown, table_context)
+        cache_key, cached = self._check_cache(prompt)
+        if cached is not None:
+            for row in cached[0]:
+                yield row
+            if on_usage is not None:
+                on_usage(0, 0.0)
+            return
+        
+        request = self._build_request(prompt)
+        request["stream"] = True
+        request["stream_options"] = {"include_usage": True}
+        stream, reservation = await self._acreate_with_retry(prompt, request)
+        
+        parser = _StreamingRowParser()
+        rows: List[Dict[str, Any]] = []
+        prompt_tokens = completion_tokens = 0
+        finish_reason = None
+        try:
+            async for chunk in stream:
+                if chunk.usage is not None:
+                    prompt_tokens = chunk.usage.prompt_tokens
+                    completion_tokens = chunk.usage.completion_tokens
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                if not choice.delta.content:
+                    continue
+                for row_json in parser.feed(choice.delta.content):
+                    try:
+                        row = _loads_json(row_json)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Failed to extract valid JSON: Invalid JSON: {e}")
+                    if "title" not in row:
+                        raise ValueError(f"Failed to extract valid JSON: Object {len(rows)} missing required 'title' field")
+                    rows.append(row)
+                    yield row
+        except BaseException:
+            # Invalid output or the consumer stopped early: drop the
+            # connection so the rest of the response isn't generated
+            await stream.close()
+            raise
+        
+        tokens_used = prompt_tokens + completion_tokens
+        if reservation is not None:
+            self.rate_limiter.record_usage(reservation, tokens_used)
+        if not rows:
+            raise ValueError("Failed to extract valid JSON: no rows found in response")
+        if finish_reason == "length" or not parser.complete:
+            raise ValueError(
+                f"Failed to extract valid JSON: response truncated after {len(rows)} rows "
+                f"(finish_reason={finish_reason})"
+            )
+        
+        logger.info("Transformed table: %d rows, %d tokens", len(rows), tokens_used)
+        if cache_key is not None:
+            self.response_cache.set(cache_key, rows)
+        if on_usage is not None:
+            on_usage(tokens_used, self._calculate_cost(prompt_tokens, completion_tokens))
+    
+    async def transform_tables(
+        self,
+        items: List[Tuple[str, str]],
+        max_concurrent: int = 8
+    ) -> List[Any]:
+        """
+        Transform many tables concurrently.
+        
+        The work is bound by network latency, so requests are overlapped
+        (at most max_concurrent in flight) instead of run back to back.
+        One table failing does not abort the others.
+        
+        Args:
+            items: (table_markdown, table_context) pairs
+            max_concurrent: Maximum number of simultaneous API requests
+            
+        Returns:
+            One entry per item, in the same order: the (json_objects,
+            tokens_used, cost_usd) tuple on success, or the exception raised
+            for that table on failure
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        
+        async def _transform(table_markdown: str, table_context: str):
+            async with semaphore:
+                return await self.atransform_table(table_markdown, table_context)
+        
+        return await asyncio.gather(
+            *(_transform(table_markdown, table_context) for table_markdown, table_context in items),
+            return_exceptions=True
+        )
+    
+    async def transform_tables_batched(
+        self,
+        items: List[Tuple[str, str]],
+        batch_token_budget: int = 8000,
+        max_tables_per_batch: int = 10,
+        max_concurrent: int = 8
+    ) -> List[Any]:
+        """
+        Transform many tables, packing several into each API request.
+        
+        Every request repeats the large instruction block, so sending K
+        tables per request cuts instruction tokens by about (K-1)/K. Tables
+        are packed greedily in order until the batch's table and context
+        tokens would exceed batch_token_budget; batches run concurrently.
+        Cached tables are served from the cache and not sent, and batched
+        results are cached per table.
+        
+        Args:
+            items: (table_markdown, table_context) pairs
+            batch_token_budget: Max table+context tokens per request (a single
+                larger table still gets its own request)
+            max_tables_per_batch: Max tables per request (bounds output length)
+            max_concurrent: Maximum number of simultaneous API requests
+            
+        Returns:
+            One entry per item, in the same order: the (json_objects,
+            tokens_used, cost_usd) tuple on success, or the exception for
+            that table on failure. A request's tokens are split across its
+            tables in proportion to their size.
+        """
+        results: List[Any] = [None] * len(items)
+        
+        # Pack uncached tables into batches of (item index, cache key, table tokens)
+        batches: List[List[Tuple[int, Optional[str], int]]] = []
+        batch: List[Tuple[int, Optional[str], int]] = []
+        batch_tokens = 0
+        for index, (table_markdown, table_context) in enumerate(items):
+            cache_key, cached = self._check_cache(self._construct_prompt(table_markdown, table_context))
+            if cached is not None:
+                results[index] = cached
+                continue
+            
+            table_tokens = self._count_tokens(table_markdown) + self._count_tokens(table_context)
+            if batch and (batch_tokens + table_tokens > batch_token_budget
+                          or len(batch) >= max_tables_per_batch):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append((index, cache_key, table_tokens))
+            batch_tokens += table_tokens
+        if batch:
+            batches.append(batch)
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        
+        async def _transform_batch(batch: List[Tuple[int, Optional[str], int]]):
+            prompt = self.BATCH_USER_HEADER.format(table_count=len(batch)) + ''.join(
+                self.BATCH_TABLE_TEMPLATE.format(
+                    table_number=table_number,
+                    table_markdown=items[index][0],
+                    table_context=items[index][1]
+                )
+                for table_number, (index, _, _) in enumerate(batch, 1)
+            )
+            async with semaphore:
+                try:
+                    response, prompt_tokens, completion_tokens = await self._acall_openai_with_retry(prompt)
+                    if len(response) > self.THREAD_PARSE_MIN_CHARS:
+                        tables_json = await asyncio.to_thread(
+                            self._extract_batch_json, response, len(batch)
+                        )
+                    else:
+                        tables_json = self._extract_batch_json(response, len(batch))
+                except Exception as e:
+                    logger.error("Batch of %d tables failed: %s", len(batch), e)
+                    for index, _, _ in batch:
+                        results[index] = e
+                    return
+            
+            # Split the request's tokens across its tables by size
+            total_table_tokens = sum(table_tokens for _, _, table_tokens in batch) or 1
+            prompt_left, completion_left = prompt_tokens, completion_tokens
+            for position, (index, cache_key, table_tokens) in enumerate(batch):
+                if position == len(batch) - 1:
+                    prompt_share, completion_share = prompt_left, completion_left
+                else:
+                    prompt_share = prompt_tokens * table_tokens // total_table_tokens
+                    completion_share = completion_tokens * table_tokens // total_table_tokens
+                prompt_left -= prompt_share
+                completion_left -= completion_share
+                
+                table_json = tables_json[position]
+                if isinstance(table_json, Exception):
+                    results[index] = table_json
+                    continue
+                if cache_key is not None:
+                    self.response_cache.set(cache_key, table_json)
+                results[index] = (
+                    table_json,
+                    prompt_share + completion_share,
+                    self._calculate_cost(prompt_share, completion_share)
+                )
+            
+            tokens_used = prompt_tokens + completion_tokens
+            logger.info("Transformed batch: %d tables, %d tokens", len(batch), tokens_used)
+        
+        await asyncio.gather(*(_transform_batch(batch) for batch in batches))
+        return results
+    
+    def transform_tables_batch_api(
+        self,
+        items: List[Tuple[str, str]],
+        poll_seconds: Optional[float] = None
+    ) -> List[Any]:
+        """
+        Transform many tables through the OpenAI Batch API.
+        
+        Every uncached table becomes one chat completion request in a JSONL
+        file, which is uploaded and submitted as a single batch. The batch is
+        then polled until it finishes (OpenAI's completion window is 24h) and
+        its output is mapped back to the tables by custom_id. Batch requests
+        cost half as much as synchronous ones, so this suits large one-off
+        runs that don't need results right away.
+        
+        Args:
+            items: (table_markdown, table_context) pairs
+            poll_seconds: Seconds between status checks (default: BATCH_POLL_SECONDS)
+            
+        Returns:
+            One entry per item, in the same order: the (json_objects,
+            tokens_used, cost_usd) tuple on success, or the exception for
+            that table on failure
+        """
+        if poll_seconds is None:
+            poll_seconds = self.BATCH_POLL_SECONDS
+        
+        results: List[Any] = [None] * len(items)
+        cache_keys: Dict[int, Optional[str]] = {}
+        request_lines: List[str] = []
+        for index, (table_markdown, table_context) in enumerate(items):
+            prompt = self._prepare_prompt(table_markdown, table_context)
+            cache_key, cached = self._check_cache(prompt)
+            if cached is not None:
+                results[index] = cached
+                continue
+            cache_keys[index] = cache_key
+            request_lines.append(json.dumps({
+                "custom_id": f"table_{index}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_request(prompt)
+            }, ensure_ascii=False))
+        
+        if not request_lines:
+            return results
+        
+        input_file = self.client.files.create(
+            file=("tables.jsonl", "\n".join(request_lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("Submitted batch %s with %d tables", batch.id, len(request_lines))
+        
+        while batch.status not in self.BATCH_FINAL_STATUSES:
+            time.sleep(poll_seconds)
+            batch = self.client.batches.retrieve(batch.id)
+            logger.info("Batch %s status: %s", batch.id, batch.status)
+        
+        # Successful requests are in the output file, failed ones in the error file
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    self._store_batch_api_result(json.loads(line), cache_keys, results)
+        
+        for index in cache_keys:
+            if results[index] is None:
+                results[index] = RuntimeError(
+                    f"Batch {batch.id} ended with status {batch.status} without a result for this table"
+                )
+        return results
+    
+    def _store_batch_api_result(
+        self,
+        line: Dict[str, Any],
+        cache_keys: Dict[int, Optional[str]],
+        results: List[Any]
+    ) -> None:
+        """
+        Store one line of a Batch API output or error file in results.
+        
+        Args:
+            line: Parsed JSONL line (custom_id, response, error)
+            cache_keys: Response cache key of each submitted table, by index
+            results: Result list being filled in, by index
+        """
+        index = int(line["custom_id"].rpartition("_")[2])
+        if index not in cache_keys:
+            return
+        
+        response = line.get("response") or {}
+        error = line.get("error")
+        if error or response.get("status_code") != 200:
+            message = (error or {}).get("message") or response.get("body", {}).get("error", {}).get("message")
+            results[index] = RuntimeError(
+                f"Batch request failed (status {response.get('status_code')}): {message}"
+            )
+            return
+        
+        body = response["body"]
+        usage = body.get("usage") or {}
+        try:
+            results[index] = self._finish_transform(
+                body["choices"][0]["message"]["content"] or "",
+                usage.get("prompt_tokens", 0),
+                usage.get("completion_tokens", 0),
+                cache_keys[index],
+                price_factor=self.BATCH_API_PRICE_FACTOR
+            )
+        except ValueError as e:
+            results[index] = e
+    
+    def _extract_batch_json(self, response: str, table_count: int) -> List[Any]:
+        """
+        Extract each table's rows from a batched response.
+        
+        Args:
+            response: Raw response from OpenAI, a JSON object keyed "1".."N"
+            table_count: Number of tables in the request
+            
+        Returns:
+            One entry per table: its validated list of JSON objects, or a
+            ValueError if that table's entry is missing or invalid
+            
+        Raises:
+            ValueError: If the response is not a JSON object
+        """
+        response = response.strip()
+        try:
+            batch_data = _loads_json(response)
+        except json.JSONDecodeError:
+            span = _find_json_span(response)
+            if span is None:
+                raise ValueError("No valid JSON found in response")
+            try:
+                batch_data = _loads_json(response[span[0]:span[1]])
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(batch_data, dict):
+            raise ValueError(f"Expected JSON object keyed by table number, got {type(batch_data).__name__}")
+        
+        tables_json: List[Any] = []
+        for table_number in range(1, table_count + 1):
+            table_data = batch_data.get(str(table_number))
+            if table_data is None:
+                tables_json.append(ValueError(f"Failed to extract valid JSON: table {table_number} missing from response"))
+                continue
+            try:
+                tables_json.append(self._validate_rows(table_data))
+            except ValueError as e:
+                tables_json.append(ValueError(f"Failed to extract valid JSON: table {table_number}: {e}"))
+        return tables_json
+    
+    def _prepare_prompt(self, table_markdown: str, table_context: str) -> str:
+        """
+        Construct the prompt for a table (logged at DEBUG level).
+        
+        Args:
+            table_markdown: Markdown table
+            table_context: Context describing table
+            
+        Returns:
+            Formatted prompt string
+        """
+        prompt = self._construct_prompt(table_markdown, table_context)
+        
+        # Full prompt only at DEBUG level (it is several KB per table)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Prompt sent to OpenAI (%d characters):\n%s", len(prompt), prompt)
+        
+        return prompt
+    
+    def _check_cache(
+        self,
+        prompt: str
+    ) -> Tuple[Optional[str], Optional[Tuple[List[Dict[str, Any]], int, float]]]:
+        """
+        Look up a previously transformed table.
+        
+        The key covers the model, temperature, instructions and user message
+        (so both the table and its context), so a hit is only served for
+        identical input.
+        
+        Args:
+            prompt: Constructed user message for the table
+            
+        Returns:
+            Tuple of (cache key or None, cached result or None); a cached
+            result reports 0 tokens and $0 since no API call is made
+        """
+        if self.response_cache is None:
+            return None, None
+        
+        cache_key = ResponseCache.make_key(self.model, self.temperature, self.SYSTEM_INSTRUCTIONS, prompt)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Cache hit: reusing %d JSON objects", len(cached))
+            return cache_key, (cached, 0, 0.0)
+        return cache_key, None
+    
+    def _finish_transform(
+        self,
+        response: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cache_key: Optional[str] = None,
+        json_objects: Optional[List[Dict[str, Any]]] = None,
+        price_factor: float = 1.0
+    ) -> Tuple[List[Dict[str, Any]], int, float]:
+        """
+        Log the response, extract its JSON and price the call.
+        
+        Shared by transform_table(), atransform_table() and the Batch API
+        path. Validated results are stored in the response cache under
+        cache_key.
+        
+        Args:
+            response: Raw response text from OpenAI
+            prompt_tokens: Input tokens used by the call
+            completion_tokens: Output tokens used by the call
+            cache_key: Response cache key, or None when not caching
+            json_objects: Rows already extracted from the response (e.g. in a
+                worker thread), or None to extract them here
+            price_factor: Multiplier on the token prices (BATCH_API_PRICE_FACTOR
+                for Batch API results)
+            
+        Returns:
+            Tuple of (json_objects, tokens_used, cost_usd)
+            
+        Raises:
+            ValueError: If JSON validation fails
+        """
+        tokens_used = prompt_tokens + completion_tokens
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "OpenAI response (%d chars, %d tokens):\n%s%s",
+                len(response), tokens_used, response[:2000], "..." if len(response) > 2000 else ""
+            )
+        
+        if json_objects is None:
+            json_objects = self._extract_json_objects(response)
+        logger.info("Transformed table: %d rows, %d tokens", len(json_objects), tokens_used)
+        
+        if cache_key is not None:
+            self.response_cache.set(cache_key, json_objects)
         
         # Calculate cost
-        cost = self._calculate_cost(tokens_used)
-        logger.debug(f"Transformation cost: ${cost:.6f}")
+        cost = self._calculate_cost(prompt_tokens, completion_tokens) * price_factor
+        logger.debug("Transformation cost: $%.6f", cost)
         
         return json_objects, tokens_used, cost
     
+    def _extract_json_objects(self, response: str) -> List[Dict[str, Any]]:
+        """
+        Extract and validate the rows in a response.
+        
+        Raises:
+            ValueError: If JSON validation fails
+        """
+        try:
+            return self._extract_and_validate_json(response)
+        except Exception as e:
+            logger.error("JSON extraction/validation failed: %s", e)
+            raise ValueError(f"Failed to extract valid JSON: {e}")
+    
     def _construct_prompt(
         self, 
         table_markdown: str,
         table_context: str
     ) -> str:
         """
-        Build prompt from template.
+        Build the per-table user message from USER_TEMPLATE.
+        
+        The instructions are not included; they are sent separately as
+        the SYSTEM_INSTRUCTIONS system message.
         
         Args:
             table_markdown: Markdown table
             table_context: Context describing table
             
         Returns:
-            Formatted prompt string
+            Formatted user message
         """
-        return self.PROMPT_TEMPLATE.format(
+        return self.USER_TEMPLATE.format(
             table_markdown=table_markdown,
             table_context=table_context
         )
     
+    def _load_encoding(self):
+        """
+        Load the tiktoken encoding for the model.
+        
+        Returns:
+            tiktoken Encoding, or False if tiktoken is not installed or its
+            encoding cannot be loaded (it is downloaded on first use)
+        """
+        if tiktoken is None:
+            return False
+        try:
+            try:
+                return tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                return tiktoken.get_encoding("o200k_base")  # Model unknown to this tiktoken
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable ({e}), estimating tokens from length")
+            return False
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens with tiktoken, or approximate 4 characters per token."""
+        if self._encoding is None:
+            self._encoding = self._load_encoding()
+        if self._encoding:
+            return len(self._encoding.encode(text))
+        return len(text) // 4 + 1
+    
+    def _estimate_tokens(self, prompt: str) -> int:
+        """
+        Estimate the tokens a request will use (instructions, user message
+        and expected output).
+        
+        The instructions are identical for every table, so they are
+        tokenized once and only the user message is encoded per call.
+        
+        Args:
+            prompt: User message to send to API
+            
+        Returns:
+            Estimated total tokens
+        """
+        if self._instruction_tokens is None:
+            self._instruction_tokens = self._count_tokens(self.SYSTEM_INSTRUCTIONS)
+        return self._instruction_tokens + self._count_tokens(prompt) + self.EXPECTED_OUTPUT_TOKENS
+    
+    def _build_request(self, prompt: str) -> Dict[str, Any]:
+        """
+        Build the chat completion request for a prompt.
+        
+        Args:
+            prompt: Prompt to send to API
+            
+        Returns:
+            Keyword arguments for chat.completions.create()
+        """
+        request = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_INSTRUCTIONS},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": self.temperature
+        }
+        if self.json_mode:
+            request["response_format"] = {"type": "json_object"}
+        return request
+    
+    @staticmethod
+    def _retry_after_seconds(error: Exception) -> Optional[float]:
+        """
+        Read the server-requested retry delay from an API error, if any.
+        
+        Args:
+            error: Exception raised by the attempt
+            
+        Returns:
+            Seconds from the retry-after-ms or retry-after header, or None
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers is None:
+            return None
+        for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                seconds = float(value) * scale
+            except (TypeError, ValueError):
+                continue  # e.g. an HTTP-date; fall back to backoff
+            if seconds > 0:
+                return seconds
+        return None
+    
+    def _retry_wait_time(
+        self,
+        error: Exception,
+        attempt: int,
+        max_retries: int,
+        previous_wait: float
+    ) -> Optional[float]:
+        """
+        Log a failed attempt and decide whether to retry it.
+        
+        Waits the server's Retry-After interval when given, otherwise uses
+        decorrelated jitter (a random wait between the base delay and 3x the
+        previous wait, capped), so concurrent workers that failed together
+        don't all retry at the same moment.
+        
+        Args:
+            error: Exception raised by the attempt
+            attempt: 0-indexed attempt number
+            max_retries: Maximum number of retry attempts
+            previous_wait: Previous wait in seconds (RETRY_BASE_SECONDS before the first retry)
+            
+        Returns:
+            Seconds to wait before the next attempt, or None if retries
+            are exhausted (the caller re-raises)
+        """
+        from openai import RateLimitError, APITimeoutError
+        
+        wait_time = self._retry_after_seconds(error)
+        if wait_time is not None:
+            wait_time = min(wait_time, self.RETRY_MAX_SECONDS)
+        else:
+            wait_time = min(
+                self.RETRY_MAX_SECONDS,
+                random.uniform(self.RETRY_BASE_SECONDS, previous_wait * 3)
+            )
+        
+        if isinstance(error, RateLimitError):
+            logger.warning(f"Rate limit hit, waiting {wait_time:.1f}s before retry {attempt + 1}/{max_retries}")
+            exhausted_message = "Max retries reached for rate limit"
+        elif isinstance(error, APITimeoutError):
+            logger.warning(f"API timeout, waiting {wait_time:.1f}s before retry {attempt + 1}/{max_retries}")
+            exhausted_message = "Max retries reached for timeout"
+        else:
+            logger.error(f"OpenAI API error: {error}")
+            exhausted_message = "Max retries reached for API error"
+            if attempt < max_retries - 1:
+                logger.warning(f"Waiting {wait_time:.1f}s before retry {attempt + 1}/{max_retries}")
+        
+        if attempt < max_retries - 1:
+            return wait_time
+        logger.error(exhausted_message)
+        return None
+    
     def _call_openai_with_retry(
         self, 
         prompt: str,
         max_retries: int = 3
-    ) -> Tuple[str, int]:
+    ) -> Tuple[str, int, int]:
         """
-        Call OpenAI API with exponential backoff retry logic.
+        Call OpenAI API with jittered backoff retry logic.
         
         Args:
             prompt: Prompt to send to API
             max_retries: Maximum number of retry attempts
             
         Returns:
-            Tuple of (response_text, total_tokens_used)
+            Tuple of (response_text, prompt_tokens, completion_tokens)
             
         Raises:
             APIError: If all retries fail
         """
+        from openai import APIError, RateLimitError, APITimeoutError
+        
+        request = self._build_request(prompt)
+        wait_time = self.RETRY_BASE_SECONDS
         for attempt in range(max_retries):
             try:
-                logger.debug(f"OpenAI API call attempt {attempt + 1}/{max_retries}")
+                logger.debug("OpenAI API call attempt %d/%d", attempt + 1, max_retries)
                 
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a data transformation expert."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=self.temperature
-                )
+                response = self.client.chat.completions.create(**request)
                 
                 # Extract response text and token usage
                 response_text = response.choices[0].message.content
-                tokens_used = response.usage.total_tokens
+                usage = response.usage
                 
-                logger.info(f"OpenAI API call succeeded on attempt {attempt + 1}")
-                return response_text, tokens_used
+                logger.debug("OpenAI API call succeeded on attempt %d", attempt + 1)
+                return response_text, usage.prompt_tokens, usage.completion_tokens
                 
-            except RateLimitError as e:
-                wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                logger.warning(f"Rate limit hit, waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                if attempt < max_retries - 1:
-                    time.sleep(wait_time)
-                else:
-                    logger.error("Max retries reached for rate limit")
-                    raise
-                    
-            except APITimeoutError as e:
-                wait_time = 2 ** attempt
-                logger.warning(f"API timeout, waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                if attempt < max_retries - 1:
-                    time.sleep(wait_time)
-                else:
-                    logger.error("Max retries reached for timeout")
+            except (RateLimitError, APITimeoutError, APIError) as e:
+                wait_time = self._retry_wait_time(e, attempt, max_retries, wait_time)
+                if wait_time is None:
                     raise
-                    
-            except APIError as e:
-                logger.error(f"OpenAI API error: {e}")
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Waiting {wait_time}s before retry {attempt + 1}/{max_retries}")
-                    time.sleep(wait_time)
-                else:
-                    logger.error("Max retries reached for API error")
+                time.sleep(wait_time)
+        
+        # Should never reach here
+        raise RuntimeError("Unexpected: exceeded max retries without raising exception")
+    
+    async def _acall_openai_with_retry(
+        self, 
+        prompt: str,
+        max_retries: int = 3
+    ) -> Tuple[str, int, int]:
+        """
+        Async version of _call_openai_with_retry().
+        
+        Backoff waits use asyncio.sleep, so other requests keep running
+        while this one waits. With a rate limiter configured, each attempt
+        first waits for room in the RPM/TPM window.
+        
+        Args:
+            prompt: Prompt to send to API
+            max_retries: Maximum number of retry attempts
+            
+        Returns:
+            Tuple of (response_text, prompt_tokens, completion_tokens)
+            
+        Raises:
+            APIError: If all retries fail
+        """
+        response, reservation = await self._acreate_with_retry(
+            prompt, self._build_request(prompt), max_retries
+        )
+        
+        response_text = response.choices[0].message.content
+        usage = response.usage
+        if reservation is not None:
+            self.rate_limiter.record_usage(reservation, usage.prompt_tokens + usage.completion_tokens)
+        return response_text, usage.prompt_tokens, usage.completion_tokens
+    
+    async def _acreate_with_retry(
+        self,
+        prompt: str,
+        request: Dict[str, Any],
+        max_retries: int = 3
+    ) -> Tuple[Any, Optional[List[float]]]:
+        """
+        Send an async chat request with rate limiting and retries.
+        
+        Args:
+            prompt: User message in the request (for the token estimate)
+            request: Keyword arguments for chat.completions.create()
+            max_retries: Maximum number of retry attempts
+            
+        Returns:
+            Tuple of (response, rate limiter reservation or None); the caller
+            records the actual usage against the reservation
+            
+        Raises:
+            APIError: If all retries fail
+        """
+        from openai import APIError, RateLimitError, APITimeoutError
+        
+        estimated_tokens = self._estimate_tokens(prompt) if self.rate_limiter else 0
+        wait_time = self.RETRY_BASE_SECONDS
+        for attempt in range(max_retries):
+            try:
+                logger.debug("OpenAI API call attempt %d/%d", attempt + 1, max_retries)
+                
+                reservation = None
+                if self.rate_limiter:
+                    reservation = await self.rate_limiter.acquire(estimated_tokens)
+                
+                response = await self.async_client.chat.completions.create(**request)
+                
+                logger.debug("OpenAI API call succeeded on attempt %d", attempt + 1)
+                return response, reservation
+                
+            except (RateLimitError, APITimeoutError, APIError) as e:
+                wait_time = self._retry_wait_time(e, attempt, max_retries, wait_time)
+                if wait_time is None:
                     raise
+                await asyncio.sleep(wait_time)
         
         # Should never reach here
-        raise APIError("Unexpected: exceeded max retries without raising exception")
+        raise RuntimeError("Unexpected: exceeded max retries without raising exception")
     
     def _extract_and_validate_json(self, response: str) -> List[Dict[str, Any]]:
         """
         Extract and validate JSON array from OpenAI response.
         
         Handles:
+        - {"rows": [...]} object (the JSON mode response shape)
         - Pure JSON array
         - JSON wrapped in markdown code blocks
         - Single JSON object (wraps in array as fallback)
         - Text before/after JSON
         
+        A response that is entirely JSON (always the case in JSON mode) is
+        parsed directly; only other responses are scanned for the JSON.
+        Uses orjson when installed, falling back to the stdlib json module.
+        
         Args:
             response: Raw response from OpenAI
             
@@ -314,32 +1382,58 @@ Here is the text that describes the table's purpose:
         # Strip whitespace
         response = response.strip()
         
-        # Try to extract JSON from markdown code block
-        json_match = re.search(r'```(?:json)?\s*(\[[\s\S]*?\])\s*```', response, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-            logger.debug("Extracted JSON from markdown code block")
-        else:
-            # Try to find JSON array directly
-            array_match = re.search(r'(\[[\s\S]*\])', response, re.DOTALL)
-            if array_match:
-                json_str = array_match.group(1)
+        # Fast path: the whole response is JSON
+        json_data = None
+        if response[:1] in ('[', '{'):
+            try:
+                json_data = _loads_json(response)
+            except json.JSONDecodeError:
+                pass  # e.g. text after the JSON; fall back to scanning
+        
+        if json_data is None:
+            # Prefer an array in a markdown code fence, else the first array/object
+            fenced_start = _find_fenced_array_start(response)
+            span = _find_json_span(response, max(fenced_start, 0))
+            if span is None:
+                raise ValueError("No valid JSON found in response")
+            span_start, span_end, is_array = span
+            json_str = response[span_start:span_end]
+            if fenced_start != -1:
+                logger.debug("Extracted JSON from markdown code block")
+            elif is_array:
                 logger.debug("Extracted JSON array from response")
-            else:
-                # Try to find single JSON object (fallback)
-                object_match = re.search(r'(\{[\s\S]*\})', response, re.DOTALL)
-                if object_match:
-                    json_str = f"[{object_match.group(1)}]"  # Wrap in array
-                    logger.warning("Found single JSON object, wrapping in array")
-                else:
-                    raise ValueError("No valid JSON found in response")
+            
+            # Parse JSON
+            try:
+                json_data = _loads_json(json_str)
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parsing failed: {e}")
+                raise ValueError(f"Invalid JSON: {e}")
         
-        # Parse JSON
-        try:
-            json_data = json.loads(json_str)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parsing failed: {e}")
-            raise ValueError(f"Invalid JSON: {e}")
+        return self._validate_rows(json_data)
+    
+    def _validate_rows(self, json_data: Any) -> List[Dict[str, Any]]:
+        """
+        Normalize parsed JSON to a list of row objects and validate it.
+        
+        A {"rows": [...]} object is unwrapped and any other single object is
+        wrapped in a list.
+        
+        Args:
+            json_data: Parsed JSON for one table
+            
+        Returns:
+            List of JSON objects (validated)
+            
+        Raises:
+            ValueError: If the JSON is not a non-empty list of objects with titles
+        """
+        if isinstance(json_data, dict):
+            if "title" not in json_data and isinstance(json_data.get("rows"), list):
+                json_data = json_data["rows"]
+            else:
+                json_data = [json_data]  # Wrap in array
+                logger.warning("Found single JSON object, wrapping in array")
         
         # Validate structure
         if not isinstance(json_data, list):
@@ -348,33 +1442,30 @@ Here is the text that describes the table's purpose:
         if len(json_data) == 0:
             raise ValueError("JSON array is empty")
         
-        # Validate each object has required fields
-        for i, obj in enumerate(json_data):
-            if not isinstance(obj, dict):
-                raise ValueError(f"Object {i} is not a dictionary")
-            if "title" not in obj:
-                raise ValueError(f"Object {i} missing required 'title' field")
+        # Validate each object has required fields (exact type check, no
+        # enumerate; the failing index is only looked up to report it)
+        for obj in json_data:
+            if type(obj) is not dict or "title" not in obj:
+                if not isinstance(obj, dict):
+                    raise ValueError(f"Object {json_data.index(obj)} is not a dictionary")
+                if "title" not in obj:
+                    raise ValueError(f"Object {json_data.index(obj)} missing required 'title' field")
         
-        logger.info(f"Validated {len(json_data)} JSON objects")
+        logger.debug("Validated %d JSON objects", len(json_data))
         return json_data
     
-    def _calculate_cost(self, tokens_used: int) -> float:
+    def _calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
         """
         Calculate cost in USD for token usage.
         
-        Approximates input/output split as 70/30 based on typical usage.
+        Uses the exact input/output split reported by the API (prompts here
+        are long and outputs comparatively short).
         
         Args:
-            tokens_used: Total tokens used
+            prompt_tokens: Input tokens used
+            completion_tokens: Output tokens used
             
         Returns:
             Cost in USD
         """
-        # Approximate split (70% input, 30% output)
-        input_tokens = tokens_used * 0.7
-        output_tokens = tokens_used * 0.3
-        
-        input_cost = (input_tokens / 1_000_000) * self.PRICE_PER_1M_INPUT_TOKENS
-        output_cost = (output_tokens / 1_000_000) * self.PRICE_PER_1M_OUTPUT_TOKENS
-        
-        return input_cost + output_cost
+        return prompt_tokens * self.PRICE_PER_INPUT_TOKEN + completion_tokens * self.PRICE_PER_OUTPUT_TOKEN
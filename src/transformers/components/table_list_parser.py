@@ -6,9 +6,10 @@ line numbers and descriptions. Handles the specific format used in
 tmp/dmg_tables_2d_matrix_lookup.md.
 """
 
+import mmap
 import re
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 import logging
 
 from ..data_models import TableRecord
@@ -21,6 +22,13 @@ class TableListParser:
 
     RECORD_DELIMITER = "\n---"
     LOCATION_PATTERN = re.compile(r'\*\*Location\*\*:\s*Lines\s*(\d+)\s*-\s*(\d+)')
+    NON_SPACE_PATTERN = re.compile(r'\S')
+    # Markdown decoration stripped from both ends of a description
+    DESCRIPTION_STRIP_CHARS = '*#-_ '
+
+    # Byte versions for scanning the memory-mapped file
+    RECORD_DELIMITER_BYTES = RECORD_DELIMITER.encode("utf-8")
+    NON_SPACE_BYTES_PATTERN = re.compile(rb'\S')
 
     def __init__(self, table_list_path: str | Path):
         """
@@ -40,6 +48,9 @@ class TableListParser:
         """
         Parse entire table list into TableRecord objects.
 
+        The file is memory-mapped and scanned for record delimiters in
+        place; only one record at a time is decoded to text.
+
         Returns:
             List of successfully parsed TableRecord objects
 
@@ -47,18 +58,32 @@ class TableListParser:
             IOError: If the file cannot be read
         """
         try:
-            with open(self.table_list_path, "r", encoding="utf-8") as f:
-                content = f.read()
+            with open(self.table_list_path, "rb") as f:
+                # mmap can't map an empty file
+                if self.table_list_path.stat().st_size == 0:
+                    return self._parse_records(b"")
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                    return self._parse_records(content)
         except IOError as e:
             raise IOError(f"Failed to read file {self.table_list_path}: {e}")
 
-        # Split into individual records
-        record_texts = self._split_records(content)
+    def _parse_records(self, content: Union[bytes, mmap.mmap]) -> List[TableRecord]:
+        """
+        Parse every record in the raw (UTF-8) file content.
+
+        Args:
+            content: File content as bytes or a memory map
+
+        Returns:
+            List of successfully parsed TableRecord objects
+        """
+        # Split into individual records (offsets into content)
+        record_spans = self._split_records(content)
 
         # Parse each record
         table_records = []
-        for i, record_text in enumerate(record_texts, 1):
-            record = self._parse_single_record(record_text)
+        for i, (start, end) in enumerate(record_spans, 1):
+            record = self._parse_single_record(content[start:end].decode("utf-8"))
             if record:
                 table_records.append(record)
             else:
@@ -67,47 +92,78 @@ class TableListParser:
                 )
 
         logger.info(
-            f"Parsed {len(table_records)} tables from {len(record_texts)} records"
+            f"Parsed {len(table_records)} tables from {len(record_spans)} records"
         )
         return table_records
 
-    def _split_records(self, content: str) -> List[str]:
+    def _split_records(
+        self,
+        content: Union[str, bytes, mmap.mmap]
+    ) -> List[Tuple[int, int]]:
         """
         Split content on delimiter.
 
+        Records are returned as (start, end) offsets into content rather
+        than copied out, skipping records that are only whitespace. The
+        start offset is at the record's first non-whitespace character.
+
         Args:
-            content: Full file content
+            content: Full file content (text, or raw bytes / memory map)
 
         Returns:
-            List of record text blocks
+            List of (start, end) offsets of record text blocks
         """
-        # Split on delimiter and filter empty strings
-        records = [
-            record.strip()
-            for record in content.split(self.RECORD_DELIMITER)
-            if record.strip()
-        ]
-        return records
-
-    def _parse_single_record(self, record_text: str) -> Optional[TableRecord]:
+        if isinstance(content, str):
+            delimiter, non_space = self.RECORD_DELIMITER, self.NON_SPACE_PATTERN
+        else:
+            delimiter, non_space = self.RECORD_DELIMITER_BYTES, self.NON_SPACE_BYTES_PATTERN
+
+        records = []
+        delimiter_length = len(delimiter)
+        start = 0
+        while True:
+            end = content.find(delimiter, start)
+            if end == -1:
+                end = len(content)
+            
+            # Filter empty records
+            first_char = non_space.search(content, start, end)
+            if first_char:
+                records.append((first_char.start(), end))
+            
+            if end == len(content):
+                return records
+            start = end + delimiter_length
+
+    def _parse_single_record(
+        self,
+        content: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> Optional[TableRecord]:
         """
         Parse individual record and extract metadata.
 
         Args:
-            record_text: Text of a single record
+            content: Text containing the record
+            start: Offset where the record starts
+            end: Offset where the record ends (default: end of content)
 
         Returns:
             TableRecord if parsing successful, None otherwise
         """
+        if end is None:
+            end = len(content)
+
         # Extract line numbers
-        line_numbers = self._extract_line_numbers(record_text)
+        line_numbers = self._extract_line_numbers(content, start, end)
         if not line_numbers:
             return None
 
         start_line, end_line = line_numbers
 
         # Extract description (first non-empty line that isn't the location)
-        description = self._extract_description(record_text)
+        description = self._extract_description(content, start, end)
 
         return TableRecord(
             start_line=start_line,
@@ -115,42 +171,68 @@ class TableListParser:
             description=description
         )
 
-    def _extract_line_numbers(self, record_text: str) -> Optional[Tuple[int, int]]:
+    def _extract_line_numbers(
+        self,
+        record_text: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> Optional[Tuple[int, int]]:
         """
         Extract start and end line numbers from location field.
 
         Args:
-            record_text: Text of a single record
+            record_text: Text of a single record (or content containing it)
+            start: Offset where the record starts
+            end: Offset where the record ends (default: end of text)
 
         Returns:
             Tuple of (start_line, end_line) or None if not found
         """
-        match = self.LOCATION_PATTERN.search(record_text)
+        if end is None:
+            end = len(record_text)
+        match = self.LOCATION_PATTERN.search(record_text, start, end)
         if match:
             start_line = int(match.group(1))
             end_line = int(match.group(2))
             return (start_line, end_line)
         return None
 
-    def _extract_description(self, record_text: str) -> str:
+    def _extract_description(
+        self,
+        record_text: str,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> str:
         """
         Extract table description from record.
 
-        Takes the first non-empty line that isn't the location line.
+        Takes the first non-empty line that isn't the location line. Lines
+        are sliced out one at a time, stopping at the description.
 
         Args:
-            record_text: Text of a single record
+            record_text: Text of a single record (or content containing it)
+            start: Offset where the record starts
+            end: Offset where the record ends (default: end of text)
 
         Returns:
             Description string (may be empty if not found)
         """
-        lines = record_text.split('\n')
-        for line in lines:
-            line = line.strip()
+        if end is None:
+            end = len(record_text)
+
+        line_start = start
+        while line_start < end:
+            line_end = record_text.find('\n', line_start, end)
+            if line_end == -1:
+                line_end = end
+            line = record_text[line_start:line_end].strip()
             # Skip empty lines and location lines
             if line and not line.startswith('**Location**'):
-                # Remove markdown formatting
-                description = line.strip('*#-_ ')
-                return description
+                # Remove markdown formatting (plain lines are returned as-is)
+                strip_chars = self.DESCRIPTION_STRIP_CHARS
+                if line[0] in strip_chars or line[-1] in strip_chars:
+                    return line.strip(strip_chars)
+                return line
+            line_start = line_end + 1
 
         return "Unknown table"
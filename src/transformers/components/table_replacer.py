@@ -8,10 +8,14 @@ followed by a JSON code block.
 """
 
 import json
-import re
 import logging
-from typing import List, Dict, Any
-from copy import deepcopy
+from bisect import bisect_left
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    import orjson  # Optional: much faster indented JSON encoding of rows
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -23,21 +27,38 @@ class TableReplacer:
     This class handles:
     - Extracting heading level from context
     - Creating heading+JSON block pairs from JSON objects
-    - Replacing tables in reverse order (to avoid line shifts)
+    - Queuing table replacements and applying them in one pass
     - Preserving document structure with blank lines
+    
+    Replacements are deferred until get_transformed_lines(), so their line
+    numbers always refer to the lines as they were before any of the queued
+    replacements (tables can be queued in any order).
     """
     
-    HEADING_PATTERN = re.compile(r'^(#{1,6})\s+')
+    # Shared encoder (json.dumps builds a new one per call when indent is set)
+    JSON_ENCODER = json.JSONEncoder(indent=2, ensure_ascii=False)
     
-    def __init__(self, markdown_lines: List[str]):
+    # "#" * level for heading levels 0-6, indexed instead of rebuilt per row
+    HEADING_PREFIXES = tuple("#" * level for level in range(7))
+    
+    def __init__(self, markdown_lines: List[str]) -> None:
         """
         Initialize table replacer with markdown content.
         
         Args:
             markdown_lines: List of lines from markdown file
         """
-        # Create a copy to avoid modifying original
-        self.markdown_lines = deepcopy(markdown_lines)
+        # Copy the list to avoid modifying the original (strings are
+        # immutable, so a shallow copy is enough)
+        self.markdown_lines = list(markdown_lines)
+        
+        # Queued (start_idx, end_idx, replacement_lines) edits, 0-indexed
+        self._pending_edits: List[Tuple[int, int, List[str]]] = []
+        
+        # Heading line numbers (1-indexed, ascending) and their levels,
+        # built on first use by extract_heading_level_from_context()
+        self._heading_lines: Optional[List[int]] = None
+        self._heading_levels: List[int] = []
         logger.info(f"TableReplacer initialized with {len(markdown_lines)} lines")
     
     def replace_table_with_json_rows(
@@ -68,7 +89,7 @@ class TableReplacer:
         logger.info(f"Replacing table at lines {table_start}-{table_end} with {len(json_objects)} heading+JSON pairs")
         
         # Generate replacement lines
-        replacement_lines = []
+        replacement_lines: List[str] = []
         
         for i, json_obj in enumerate(json_objects):
             # Create heading+JSON block for this object
@@ -82,22 +103,53 @@ class TableReplacer:
             if i < len(json_objects) - 1:
                 replacement_lines.append("")
         
-        # Replace table lines (convert to 0-indexed)
+        # Queue the replacement (convert to 0-indexed)
         start_idx = table_start - 1
         end_idx = table_end  # end_line is inclusive, so this is correct for slicing
+        self._pending_edits.append((start_idx, end_idx, replacement_lines))
+        
+        logger.debug(f"Queued replacement of {end_idx - start_idx} lines with {len(replacement_lines)} lines")
+    
+    def finalize(self) -> None:
+        """
+        Apply all queued replacements in a single pass.
+        
+        Rebuilds the lines once (unchanged ranges are copied, replacements
+        inserted), rather than slice-assigning into the list per table.
         
-        # Replace the table lines with the new content
-        self.markdown_lines[start_idx:end_idx] = replacement_lines
+        Raises:
+            ValueError: If two queued replacements overlap
+        """
+        if not self._pending_edits:
+            return
         
-        logger.debug(f"Replaced {end_idx - start_idx} lines with {len(replacement_lines)} lines")
+        edits = sorted(self._pending_edits, key=lambda edit: edit[0])
+        self._pending_edits = []
+        
+        rebuilt: List[str] = []
+        position = 0
+        for start_idx, end_idx, replacement_lines in edits:
+            if start_idx < position:
+                raise ValueError(
+                    f"Overlapping table replacements at line {start_idx + 1}"
+                )
+            rebuilt.extend(self.markdown_lines[position:start_idx])
+            rebuilt.extend(replacement_lines)
+            position = max(end_idx, start_idx)
+        rebuilt.extend(self.markdown_lines[position:])
+        
+        logger.debug(f"Applied {len(edits)} table replacements: {len(self.markdown_lines)} -> {len(rebuilt)} lines")
+        self.markdown_lines = rebuilt
+        self._heading_lines = None
     
     def get_transformed_lines(self) -> List[str]:
         """
-        Get the transformed markdown lines.
+        Get the transformed markdown lines (applying queued replacements).
         
         Returns:
             List of transformed markdown lines
         """
+        self.finalize()
         return self.markdown_lines
     
     def _create_heading_and_json_block(
@@ -115,24 +167,49 @@ class TableReplacer:
         Returns:
             List of lines for heading + JSON block
         """
-        lines = []
+        lines: List[str] = []
         
         # Extract title from JSON object
         title = json_obj.get("title", "Untitled")
         
         # Create heading line
-        heading_prefix = "#" * heading_level
+        if 0 <= heading_level <= 6:
+            heading_prefix = self.HEADING_PREFIXES[heading_level]
+        else:
+            heading_prefix = "#" * heading_level
         lines.append(f"{heading_prefix} {title}")
         lines.append("")  # Blank line after heading
         
         # Create JSON code block
         lines.append("```json")
-        json_str = json.dumps(json_obj, indent=2, ensure_ascii=False)
+        json_str = self._encode_json(json_obj)
         lines.append(json_str)
         lines.append("```")
         
         return lines
     
+    def _encode_json(self, json_obj: Dict[str, Any]) -> str:
+        """
+        Encode a row as 2-space indented JSON.
+        
+        Uses orjson when installed, which matches the stdlib encoder's
+        indentation and separators but may spell floats differently (0.00001
+        rather than 1e-05). Falls back to JSON_ENCODER for anything orjson
+        rejects, such as non-string keys.
+        
+        Args:
+            json_obj: JSON object to encode
+            
+        Returns:
+            Indented JSON text
+        """
+        if orjson is not None:
+            try:
+                return orjson.dumps(json_obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+            except TypeError:  # orjson.JSONEncodeError is a subclass
+                pass
+        return self.JSON_ENCODER.encode(json_obj)
+    
     def extract_heading_level_from_context(
         self,
         table_start: int
@@ -140,8 +217,9 @@ class TableReplacer:
         """
         Extract heading level from the nearest heading before the table.
         
-        Scans backward from table_start to find the first heading,
-        then returns its level.
+        Headings are indexed in one pass over the document on first use,
+        then each lookup is a binary search, so looking up every table
+        doesn't rescan the document per table.
         
         Args:
             table_start: 1-indexed line number where table starts
@@ -149,19 +227,37 @@ class TableReplacer:
         Returns:
             Heading level (1-6), defaults to 4 if no heading found
         """
-        # Scan backward from table_start - 1
-        for i in range(table_start - 1, 0, -1):
-            line = self.markdown_lines[i - 1]  # Convert to 0-indexed
-            level = self._get_heading_level(line)
-            if level is not None:
-                logger.debug(f"Found heading level {level} at line {i}")
-                return level
+        if self._heading_lines is None:
+            self._build_heading_index()
+        
+        # Number of headings before table_start; the last of them is nearest
+        position = bisect_left(self._heading_lines, table_start)
+        if position:
+            level = self._heading_levels[position - 1]
+            logger.debug(f"Found heading level {level} at line {self._heading_lines[position - 1]}")
+            return level
         
         # No heading found, default to level 4
         logger.debug("No heading found before table, defaulting to level 4")
         return 4
     
-    def _get_heading_level(self, line: str) -> int:
+    def _build_heading_index(self) -> None:
+        """Index the line number and level of every heading in the document."""
+        heading_lines: List[int] = []
+        heading_levels: List[int] = []
+        for line_number, line in enumerate(self.markdown_lines, 1):
+            # Most lines have no '#' at all; skip them without strip/parsing
+            if '#' not in line:
+                continue
+            level = self._get_heading_level(line)
+            if level is not None:
+                heading_lines.append(line_number)
+                heading_levels.append(level)
+        
+        self._heading_lines = heading_lines
+        self._heading_levels = heading_levels
+    
+    def _get_heading_level(self, line: str) -> Optional[int]:
         """
         Get heading level from a line.
         
@@ -171,7 +267,12 @@ class TableReplacer:
         Returns:
             Heading level (1-6) or None if not a heading
         """
-        match = self.HEADING_PATTERN.match(line.strip())
-        if match:
-            return len(match.group(1))
+        # 1-6 leading '#' followed by whitespace (counted, no regex)
+        stripped = line.strip()
+        length = len(stripped)
+        level = 0
+        while level < 6 and level < length and stripped[level] == '#':
+            level += 1
+        if 0 < level < length and stripped[level].isspace():
+            return level
         return None
@@ -9,7 +9,7 @@ from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class TableRecord:
     """
     Represents a single table to be transformed.
@@ -37,7 +37,7 @@ class TableRecord:
             )
 
 
-@dataclass
+@dataclass(slots=True)
 class TransformationResult:
     """
     Result of a single table transformation.
@@ -63,7 +63,7 @@ class TransformationResult:
         return len(self.json_objects)
 
 
-@dataclass
+@dataclass(slots=True)
 class TransformationReport:
     """
     Summary of entire transformation process.
@@ -5,11 +5,12 @@ TableTransformer - Main orchestrator for table transformation pipeline.
 Coordinates all components to transform markdown tables to JSON using OpenAI.
 """
 
+import asyncio
 import logging
 import time
 import sys
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 from .data_models import (
     TableRecord,
@@ -40,6 +41,9 @@ class TableTransformer:
     6. Write transformed markdown to output file
     """
     
+    # Share of the input price saved on prompt-cached tokens
+    CACHED_INPUT_DISCOUNT = 0.5
+    
     def __init__(
         self,
         markdown_file: str,
@@ -48,7 +52,12 @@ class TableTransformer:
         api_key: Optional[str] = None,
         model: str = "gpt-4o-mini",
         delay_seconds: float = 1.0,
-        cost_limit_usd: float = 5.0
+        cost_limit_usd: float = 5.0,
+        cache_dir: Optional[str] = None,
+        max_concurrent: int = 8,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        tables_per_batch: int = 1
     ):
         """
         Initialize transformer with configuration.
@@ -59,8 +68,16 @@ class TableTransformer:
             output_dir: Output directory (default: data/markdown/docling/good_pdfs/)
             api_key: OpenAI API key (if None, loads from .env)
             model: OpenAI model to use
-            delay_seconds: Delay between API calls
+            delay_seconds: Average delay between API calls, applied as a
+                requests-per-minute limit when requests_per_minute is not
+                given (0 = no limit)
             cost_limit_usd: Maximum cost in USD
+            cache_dir: Directory for cached OpenAI transformations (default: no cache)
+            max_concurrent: Maximum number of tables transformed at once
+            requests_per_minute: OpenAI requests-per-minute limit
+            tokens_per_minute: OpenAI tokens-per-minute limit (default: no limit)
+            tables_per_batch: Maximum tables sent in one API request; more than
+                1 shares the instruction prompt across tables (default: 1)
         """
         self.markdown_file = Path(markdown_file)
         self.table_list_file = Path(table_list_file)
@@ -74,6 +91,11 @@ class TableTransformer:
         self.model = model
         self.delay_seconds = delay_seconds
         self.cost_limit_usd = cost_limit_usd
+        self.max_concurrent = max(1, max_concurrent)
+        self.tables_per_batch = max(1, tables_per_batch)
+        
+        if requests_per_minute is None and delay_seconds > 0:
+            requests_per_minute = max(1, int(60 / delay_seconds))
         
         # Get API key
         if api_key is None:
@@ -86,16 +108,23 @@ class TableTransformer:
         self.openai_transformer = OpenAITransformer(
             api_key=api_key,
             model=model,
-            temperature=0.0
+            temperature=0.0,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            cache_dir=cache_dir
         )
         self.file_writer = FileWriter(self.output_dir)
+        self._context_extractor: Optional[ContextExtractor] = None
     
-    def transform(self, dry_run: bool = False) -> TransformationReport:
+    def transform(self, dry_run: bool = False, batch_mode: bool = False) -> TransformationReport:
         """
         Execute transformation pipeline.
         
         Args:
             dry_run: If True, estimate cost without executing
+            batch_mode: If True, submit the tables through the OpenAI Batch
+                API and wait for the batch to finish (half the cost, results
+                within 24 hours)
             
         Returns:
             TransformationReport with statistics
@@ -115,7 +144,9 @@ class TableTransformer:
         
         # Estimate cost
         print("\n[2/6] Estimating cost...")
-        estimated_cost = self._estimate_cost(markdown_lines, table_records)
+        # Contexts are extracted once and shared by the estimate and processing
+        contexts = self._extract_contexts(markdown_lines, table_records)
+        estimated_cost = self._estimate_cost(markdown_lines, table_records, batch_mode, contexts)
         print(f"  ✓ Estimated cost: ${estimated_cost:.4f}")
         
         if dry_run:
@@ -141,7 +172,7 @@ class TableTransformer:
         
         # Process tables
         print("\n[3/6] Processing tables with OpenAI...")
-        results = self._process_tables(markdown_lines, table_records)
+        results = self._process_tables(markdown_lines, table_records, batch_mode, contexts)
         
         # Apply transformations
         print("\n[4/6] Applying transformations...")
@@ -184,10 +215,67 @@ class TableTransformer:
         
         return markdown_lines, table_records
     
-    def _estimate_cost(
+    def _get_context_extractor(self, markdown_lines: List[str]) -> ContextExtractor:
+        """
+        Get a ContextExtractor for the markdown lines, reusing it across steps.
+        
+        When the lines are the reader's own, the reader's cached line
+        classification is passed along so the extractor does not re-parse them.
+        
+        Args:
+            markdown_lines: Markdown file lines
+            
+        Returns:
+            ContextExtractor for these lines
+        """
+        if self._context_extractor is None or self._context_extractor.markdown_lines is not markdown_lines:
+            line_classes = None
+            if markdown_lines is self.file_reader.read_lines():
+                line_classes = self.file_reader.classify_lines()
+            self._context_extractor = ContextExtractor(markdown_lines, line_classes)
+        return self._context_extractor
+    
+    def _extract_contexts(
         self,
         markdown_lines: List[str],
         table_records: List[TableRecord]
+    ) -> List[Any]:
+        """
+        Extract the context of every table, in one sweep where possible.
+        
+        If any table's range is invalid, falls back to per-table extraction
+        so only that table is affected.
+        
+        Args:
+            markdown_lines: Markdown file lines
+            table_records: Tables to extract context for
+            
+        Returns:
+            One entry per table: its context, or the exception raised
+            extracting it
+        """
+        context_extractor = self._get_context_extractor(markdown_lines)
+        try:
+            return context_extractor.extract_contexts(
+                [(record.start_line, record.end_line) for record in table_records]
+            )
+        except ValueError:
+            pass
+        
+        contexts: List[Any] = []
+        for record in table_records:
+            try:
+                contexts.append(context_extractor.extract_context(record.start_line, record.end_line))
+            except Exception as e:
+                contexts.append(e)
+        return contexts
+    
+    def _estimate_cost(
+        self,
+        markdown_lines: List[str],
+        table_records: List[TableRecord],
+        batch_mode: bool = False,
+        contexts: Optional[List[Any]] = None
     ) -> float:
         """
         Estimate total cost based on table sizes.
@@ -198,33 +286,41 @@ class TableTransformer:
         Args:
             markdown_lines: Markdown file lines
             table_records: List of tables to transform
+            batch_mode: Price at the Batch API's discounted rates
+            contexts: Result of _extract_contexts() for these tables
+                (default: extracted here)
             
         Returns:
             Estimated cost in USD
         """
         total_chars = 0
-        context_extractor = ContextExtractor(markdown_lines)
+        if contexts is None:
+            contexts = self._extract_contexts(markdown_lines, table_records)
         
-        for record in table_records:
+        for record, context in zip(table_records, contexts):
             # Estimate table size after preprocessing
             table_chars = len(record.table_markdown)
             preprocessing_factor = 0.65  # 35% reduction on average
             preprocessed_chars = table_chars * preprocessing_factor
             
             # Estimate context size
-            try:
-                context = context_extractor.extract_context(
-                    record.start_line,
-                    record.end_line
-                )
-                context_chars = len(context)
-            except Exception:
+            if isinstance(context, Exception):
                 context_chars = 1000  # Conservative fallback
+            else:
+                context_chars = len(context)
             
-            # Prompt overhead (template text)
-            prompt_overhead = 1500
-            
-            total_chars += preprocessed_chars + context_chars + prompt_overhead
+            total_chars += preprocessed_chars + context_chars
+        
+        # Prompt overhead (template text), sent once per request; batched
+        # tables share it (the Batch API path sends one request per table)
+        prompt_overhead = (
+            len(OpenAITransformer.SYSTEM_INSTRUCTIONS) + len(OpenAITransformer.USER_TEMPLATE)
+        )
+        if batch_mode:
+            request_count = len(table_records)
+        else:
+            request_count = -(-len(table_records) // self.tables_per_batch)
+        total_chars += prompt_overhead * request_count
         
         # Convert to tokens (rough approximation)
         estimated_tokens = total_chars / 4
@@ -241,89 +337,272 @@ class TableTransformer:
             (input_tokens / 1000) * INPUT_COST_PER_1K +
             (output_tokens / 1000) * OUTPUT_COST_PER_1K
         )
+
+        # The system instructions are an identical prefix on every request,
+        # so after the first request OpenAI's prompt caching bills them at
+        # half the input price
+        cached_overhead_tokens = (
+            len(OpenAITransformer.SYSTEM_INSTRUCTIONS) * (request_count - 1) / 4
+        )
+        if cached_overhead_tokens > 0:
+            cost -= (cached_overhead_tokens / 1000) * INPUT_COST_PER_1K * self.CACHED_INPUT_DISCOUNT
         
+        if batch_mode:
+            cost *= OpenAITransformer.BATCH_API_PRICE_FACTOR
+
         return cost
     
     def _process_tables(
         self,
         markdown_lines: List[str],
-        table_records: List[TableRecord]
+        table_records: List[TableRecord],
+        batch_mode: bool = False,
+        contexts: Optional[List[Any]] = None
     ) -> List[TransformationResult]:
         """
         Process all tables through OpenAI transformation.
         
+        The work is bound by OpenAI latency, so up to max_concurrent tables
+        are in flight at once; the OpenAI transformer's rate limiter keeps
+        the requests within the requests/tokens-per-minute limits.
+        
         Args:
             markdown_lines: Markdown file lines
             table_records: List of tables to transform
+            batch_mode: Submit the tables as one OpenAI Batch API job and
+                wait for it instead of calling the API directly
+            contexts: Result of _extract_contexts() for these tables
+                (default: extracted here)
             
         Returns:
-            List of transformation results
+            List of transformation results, in table_records order
         """
-        results = []
-        context_extractor = ContextExtractor(markdown_lines)
-        
-        for i, record in enumerate(table_records, 1):
-            # Progress indicator
-            desc = record.description[:50] if record.description else "Unnamed table"
-            print(f"  [{i}/{len(table_records)}] {desc}...")
-            
+        results: List[Optional[TransformationResult]] = [None] * len(table_records)
+        
+        # Extract context and preprocess every table up front, so none of
+        # this CPU work sits between API calls
+        if contexts is None:
+            contexts = self._extract_contexts(markdown_lines, table_records)
+        overlap_errors = self._find_overlapping_tables(table_records)
+        prepared = []
+        for index, (record, context) in enumerate(zip(table_records, contexts)):
             try:
-                # Extract context
-                context = context_extractor.extract_context(
-                    record.start_line,
-                    record.end_line
-                )
+                if index in overlap_errors:
+                    raise overlap_errors[index]
+                if isinstance(context, Exception):
+                    raise context
                 record.table_context = context
-                
-                # Preprocess table
-                preprocessed_table = self.preprocessor.preprocess_table(
+                preprocessed_table, _ = self.preprocessor.preprocess_table(
                     record.table_markdown
                 )
-                
-                # Transform with OpenAI
-                json_objects, tokens_used, cost_usd = self.openai_transformer.transform_table(
-                    preprocessed_table,
-                    context
-                )
-                
-                # Create result
-                result = TransformationResult(
-                    table_record=record,
-                    json_objects=json_objects,
-                    success=True,
-                    tokens_used=tokens_used,
-                    cost_usd=cost_usd
-                )
-                
-                results.append(result)
-                
-                if result.success:
-                    print(f"    ✓ Success ({len(result.json_objects)} rows, {result.tokens_used} tokens, ${result.cost_usd:.4f})")
-                else:
-                    print(f"    ✗ Failed: {result.error_message}")
-                
-                # Rate limiting delay
-                if i < len(table_records):
-                    time.sleep(self.delay_seconds)
-                
-            except KeyboardInterrupt:
-                print("\n\n⚠️  Interrupted by user")
-                print(f"Processed {i-1}/{len(table_records)} tables")
-                raise
             except Exception as e:
-                logger.error(f"Error processing table at lines {record.start_line}-{record.end_line}: {e}")
-                results.append(TransformationResult(
-                    table_record=record,
-                    json_objects=[],
-                    success=False,
-                    error_message=str(e),
-                    tokens_used=0,
-                    cost_usd=0.0
-                ))
-                print(f"    ✗ Error: {e}")
+                self._print_progress(index, len(table_records), record)
+                results[index] = self._failed_result(record, e)
+                continue
+            prepared.append((index, preprocessed_table, context))
+        
+        try:
+            if batch_mode:
+                self._process_tables_batch_api(table_records, prepared, results)
+            else:
+                asyncio.run(self._process_tables_async(table_records, prepared, results))
+        except KeyboardInterrupt:
+            print("\n\n⚠️  Interrupted by user")
+            print(f"Processed {sum(1 for r in results if r is not None)}/{len(table_records)} tables")
+            raise
         
         return results
     
+    def _find_overlapping_tables(self, table_records: List[TableRecord]) -> Dict[int, ValueError]:
+        """
+        Find tables whose line range overlaps an earlier table's.
+        
+        TableReplacer can't apply overlapping replacements, so these tables
+        are failed before any API call is paid for, rather than failing the
+        whole run when the results are applied. The table starting first
+        (first listed, for identical ranges) is kept.
+        
+        Args:
+            table_records: Tables to transform
+            
+        Returns:
+            Error for each overlapping table, by index in table_records
+        """
+        errors: Dict[int, ValueError] = {}
+        kept_end = 0
+        kept: Optional[TableRecord] = None
+        for index in sorted(range(len(table_records)), key=lambda i: table_records[i].start_line):
+            record = table_records[index]
+            if kept is not None and record.start_line <= kept_end:
+                errors[index] = ValueError(
+                    f"Table at lines {record.start_line}-{record.end_line} overlaps "
+                    f"table at lines {kept.start_line}-{kept.end_line}"
+                )
+                continue
+            kept, kept_end = record, record.end_line
+        return errors
+    
+    async def _process_tables_async(
+        self,
+        table_records: List[TableRecord],
+        prepared: List[Tuple[int, str, str]],
+        results: List[Optional[TransformationResult]]
+    ) -> None:
+        """
+        Transform prepared tables concurrently, filling in results by index.
+        
+        Args:
+            table_records: All tables being transformed
+            prepared: (index, preprocessed_table, context) for each table to send
+            results: Pre-sized result list, one slot per table record
+        """
+        total = len(table_records)
+        if self.tables_per_batch > 1:
+            await self._process_table_batches(table_records, prepared, results)
+            return
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        
+        async def _process(index: int, preprocessed_table: str, context: str) -> None:
+            record = table_records[index]
+            async with semaphore:
+                self._print_progress(index, total, record)
+                try:
+                    json_objects, tokens_used, cost_usd = await self.openai_transformer.atransform_table(
+                        preprocessed_table,
+                        context
+                    )
+                except Exception as e:
+                    results[index] = self._failed_result(record, e)
+                    return
+            
+            result = TransformationResult(
+                table_record=record,
+                json_objects=json_objects,
+                success=True,
+                tokens_used=tokens_used,
+                cost_usd=cost_usd
+            )
+            results[index] = result
+            print(f"    ✓ [{index + 1}/{total}] Success ({len(result.json_objects)} rows, {result.tokens_used} tokens, ${result.cost_usd:.4f})")
+        
+        await asyncio.gather(*(_process(*item) for item in prepared))
+    
+    async def _process_table_batches(
+        self,
+        table_records: List[TableRecord],
+        prepared: List[Tuple[int, str, str]],
+        results: List[Optional[TransformationResult]]
+    ) -> None:
+        """
+        Transform prepared tables several per API request.
+        
+        Tables are packed into requests of up to tables_per_batch tables
+        (within the transformer's token budget) and the combined response
+        is split back into one result per table.
+        
+        Args:
+            table_records: All tables being transformed
+            prepared: (index, preprocessed_table, context) for each table to send
+            results: Pre-sized result list, one slot per table record
+        """
+        total = len(table_records)
+        for index, _, _ in prepared:
+            self._print_progress(index, total, table_records[index])
+        
+        outcomes = await self.openai_transformer.transform_tables_batched(
+            [(preprocessed_table, context) for _, preprocessed_table, context in prepared],
+            max_tables_per_batch=self.tables_per_batch,
+            max_concurrent=self.max_concurrent
+        )
+        self._store_outcomes(table_records, prepared, outcomes, results)
+    
+    def _process_tables_batch_api(
+        self,
+        table_records: List[TableRecord],
+        prepared: List[Tuple[int, str, str]],
+        results: List[Optional[TransformationResult]]
+    ) -> None:
+        """
+        Transform prepared tables as one OpenAI Batch API job.
+        
+        Blocks until the batch finishes, polling its status.
+        
+        Args:
+            table_records: All tables being transformed
+            prepared: (index, preprocessed_table, context) for each table to send
+            results: Pre-sized result list, one slot per table record
+        """
+        total = len(table_records)
+        for index, _, _ in prepared:
+            self._print_progress(index, total, table_records[index])
+        
+        print(f"  Submitting {len(prepared)} tables to the OpenAI Batch API and waiting for the batch...")
+        outcomes = self.openai_transformer.transform_tables_batch_api(
+            [(preprocessed_table, context) for _, preprocessed_table, context in prepared]
+        )
+        self._store_outcomes(table_records, prepared, outcomes, results)
+    
+    def _store_outcomes(
+        self,
+        table_records: List[TableRecord],
+        prepared: List[Tuple[int, str, str]],
+        outcomes: List[Any],
+        results: List[Optional[TransformationResult]]
+    ) -> None:
+        """
+        Turn the OpenAI transformer's per-table outcomes into results.
+        
+        Args:
+            table_records: All tables being transformed
+            prepared: (index, preprocessed_table, context) for each table sent
+            outcomes: (json_objects, tokens_used, cost_usd) or the exception,
+                one per prepared table
+            results: Pre-sized result list, one slot per table record
+        """
+        total = len(table_records)
+        for (index, _, _), outcome in zip(prepared, outcomes):
+            record = table_records[index]
+            if isinstance(outcome, Exception):
+                results[index] = self._failed_result(record, outcome)
+                continue
+            json_objects, tokens_used, cost_usd = outcome
+            results[index] = TransformationResult(
+                table_record=record,
+                json_objects=json_objects,
+                success=True,
+                tokens_used=tokens_used,
+                cost_usd=cost_usd
+            )
+            print(f"    ✓ [{index + 1}/{total}] Success ({len(json_objects)} rows, {tokens_used} tokens, ${cost_usd:.4f})")
+    
+    def _print_progress(self, index: int, total: int, record: TableRecord) -> None:
+        """Print the progress line for a table (index is 0-based)."""
+        desc = record.description[:50] if record.description else "Unnamed table"
+        print(f"  [{index + 1}/{total}] {desc}...")
+    
+    def _failed_result(self, record: TableRecord, error: Exception) -> TransformationResult:
+        """
+        Log a table's failure and build its result.
+        
+        Args:
+            record: Table that failed
+            error: Exception raised while processing it
+            
+        Returns:
+            Unsuccessful TransformationResult
+        """
+        logger.error(f"Error processing table at lines {record.start_line}-{record.end_line}: {error}")
+        print(f"    ✗ Error (lines {record.start_line}-{record.end_line}): {error}")
+        return TransformationResult(
+            table_record=record,
+            json_objects=[],
+            success=False,
+            error_message=str(error),
+            tokens_used=0,
+            cost_usd=0.0
+        )
+    
     def _apply_transformations(
         self,
         markdown_lines: List[str],
@@ -332,7 +611,9 @@ class TableTransformer:
         """
         Apply successful transformations to markdown.
         
-        CRITICAL: Process in reverse order to avoid line number shifts.
+        TableReplacer queues each replacement against the original line
+        numbers and merges them all into the document in one pass, so the
+        results can be applied in any order.
         
         Args:
             markdown_lines: Original markdown lines
@@ -344,15 +625,10 @@ class TableTransformer:
         # Create replacer
         replacer = TableReplacer(markdown_lines)
         
-        # Sort by start_line descending (reverse order)
-        sorted_results = sorted(
-            [r for r in results if r.success],
-            key=lambda r: r.table_record.start_line,
-            reverse=True
-        )
-        
-        # Apply each replacement
-        for result in sorted_results:
+        # Queue each replacement
+        for result in results:
+            if not result.success:
+                continue
             record = result.table_record
             
             # Determine heading level from context
@@ -385,11 +661,17 @@ class TableTransformer:
         Returns:
             TransformationReport
         """
-        successful = sum(1 for r in results if r.success)
-        failed = sum(1 for r in results if not r.success)
-        total_tokens = sum(r.tokens_used for r in results)
-        total_cost = sum(r.cost_usd for r in results)
-        failures = [r for r in results if not r.success]
+        # Tally everything in one pass over the results
+        total_tokens = 0
+        total_cost = 0.0
+        failures = []
+        for result in results:
+            if not result.success:
+                failures.append(result)
+            total_tokens += result.tokens_used
+            total_cost += result.cost_usd
+        failed = len(failures)
+        successful = len(results) - failed
         execution_time = time.time() - start_time
         
         report = TransformationReport(
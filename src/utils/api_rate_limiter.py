@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Client-side request/token rate limiter for API calls.
+
+Keeps a 60-second sliding window of the requests sent and the tokens they
+used, and makes callers wait until both the requests-per-minute and the
+tokens-per-minute budgets have room. Gating calls up front avoids hitting
+429 rate-limit errors (and the retry backoff that follows) on bulk runs.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+
+class ApiRateLimiter:
+    """Sliding-window RPM/TPM limiter for asyncio callers."""
+    
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        window_seconds: float = 60.0
+    ):
+        """
+        Initialize rate limiter.
+        
+        Args:
+            requests_per_minute: Max requests per window (None = unlimited)
+            tokens_per_minute: Max tokens per window (None = unlimited)
+            window_seconds: Length of the sliding window
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window_seconds = window_seconds
+        
+        # One [timestamp, tokens] entry per request still inside the window
+        self._entries: Deque[List[float]] = deque()
+        self._tokens_in_window = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _purge(self, now: float) -> None:
+        """Drop entries that have left the window."""
+        cutoff = now - self.window_seconds
+        while self._entries and self._entries[0][0] <= cutoff:
+            self._tokens_in_window -= self._entries.popleft()[1]
+    
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """
+        Seconds until a request of this size fits in the window.
+        
+        Returns 0 when it fits now. A request larger than the whole token
+        budget is let through once the window is empty, rather than never.
+        """
+        self._purge(now)
+        if not self._entries:
+            return 0.0
+        
+        fits_requests = (self.requests_per_minute is None
+                         or len(self._entries) < self.requests_per_minute)
+        fits_tokens = (self.tokens_per_minute is None
+                       or self._tokens_in_window + tokens <= self.tokens_per_minute)
+        if fits_requests and fits_tokens:
+            return 0.0
+        
+        # Wait for the oldest entry to expire, then check again
+        return max(self._entries[0][0] + self.window_seconds - now, 0.001)
+    
+    def _get_lock(self) -> asyncio.Lock:
+        """Get a lock for the running event loop (transformers may outlive a loop)."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+    
+    async def acquire(self, tokens: int) -> List[float]:
+        """
+        Wait until a request using `tokens` tokens fits, then reserve it.
+        
+        Waiters are served in arrival order.
+        
+        Args:
+            tokens: Estimated tokens for the request (prompt + expected output)
+        
+        Returns:
+            Reservation to pass to record_usage() once actual usage is known
+        """
+        async with self._get_lock():
+            while True:
+                now = time.monotonic()
+                wait_time = self._wait_time(tokens, now)
+                if wait_time <= 0:
+                    break
+                await asyncio.sleep(wait_time)
+            
+            reservation = [now, tokens]
+            self._entries.append(reservation)
+            self._tokens_in_window += tokens
+            return reservation
+    
+    def record_usage(self, reservation: List[float], actual_tokens: int) -> None:
+        """
+        Replace a reservation's estimated tokens with the actual usage.
+        
+        Args:
+            reservation: Value returned by acquire()
+            actual_tokens: Tokens the API reported for the request
+        """
+        if reservation[0] > time.monotonic() - self.window_seconds:
+            self._tokens_in_window += actual_tokens - reservation[1]
+        reservation[1] = actual_tokens
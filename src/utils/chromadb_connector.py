@@ -10,9 +10,15 @@ Provides a single source of truth for all ChromaDB interactions:
 
 import chromadb
 import os
-from typing import Optional, List, Dict, Any
+import threading
+import time
+from typing import Optional, List, Dict, Any, Set, Tuple
 from ..utils.config import get_chroma_connection_params
 
+# Connectors shared through ChromaDBConnector.get_instance(), by arguments
+_shared_connectors: Dict[Tuple[Optional[str], Optional[int], Optional[bool]], "ChromaDBConnector"] = {}
+_shared_connectors_lock = threading.Lock()
+
 
 class ChromaDBConnector:
     """
@@ -26,8 +32,15 @@ class ChromaDBConnector:
         collection = connector.get_or_create_collection("dnd_monsters")
         connector.truncate_collection("dnd_monsters")
         collections = connector.list_collections()
+    
+    Long-lived components should use ChromaDBConnector.get_instance(), which
+    returns one shared connector per connection, instead of connecting (and
+    checking the connection) again for each object.
     """
     
+    # Seconds a fetched list of collection names answers collection_exists()
+    COLLECTION_NAMES_TTL_SECONDS = 5.0
+    
     def __init__(
         self,
         chroma_host: Optional[str] = None,
@@ -55,6 +68,12 @@ class ChromaDBConnector:
         
         self.use_cloud = use_cloud
         
+        # Collection handles by name, so repeated lookups skip the round-trip
+        self._collections: Dict[str, Any] = {}
+        # Collection names from the last list_collections() and when fetched
+        self._collection_names: Optional[Set[str]] = None
+        self._collection_names_time = 0.0
+        
         if use_cloud:
             # ChromaCloud mode
             if not cloud_api_key or not cloud_tenant:
@@ -103,10 +122,46 @@ class ChromaDBConnector:
                     f"Make sure ChromaDB is running (./scripts/start_chroma.sh)"
                 ) from e
     
+    @classmethod
+    def get_instance(
+        cls,
+        chroma_host: Optional[str] = None,
+        chroma_port: Optional[int] = None,
+        use_cloud: Optional[bool] = None
+    ) -> "ChromaDBConnector":
+        """
+        Get the process-wide connector for these connection arguments.
+        
+        The first call connects; later calls with the same arguments return
+        the same connector, with its cached collection handles.
+        
+        Args:
+            chroma_host: ChromaDB host (optional, uses config default)
+            chroma_port: ChromaDB port (optional, uses config default)
+            use_cloud: Force cloud mode (optional, auto-detects from env)
+            
+        Returns:
+            Shared ChromaDBConnector
+            
+        Raises:
+            ConnectionError: If ChromaDB can't be reached
+        """
+        key = (chroma_host, chroma_port, use_cloud)
+        with _shared_connectors_lock:
+            connector = _shared_connectors.get(key)
+            if connector is None:
+                connector = cls(chroma_host, chroma_port, use_cloud)
+                _shared_connectors[key] = connector
+            return connector
+    
     def get_collection(self, name: str):
         """
         Get an existing collection.
         
+        Handles are cached per connector: only the first lookup of a name
+        asks the server (a handle stays valid until the collection is
+        deleted).
+        
         Args:
             name: Collection name
             
@@ -116,7 +171,11 @@ class ChromaDBConnector:
         Raises:
             Exception: If collection doesn't exist
         """
-        return self.client.get_collection(name=name)
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self.client.get_collection(name=name)
+            self._collections[name] = collection
+        return collection
     
     def create_collection(
         self,
@@ -139,7 +198,11 @@ class ChromaDBConnector:
         if metadata is None:
             metadata = {"description": f"D&D 1st Edition - {name}"}
         
-        return self.client.create_collection(name=name, metadata=metadata)
+        collection = self.client.create_collection(name=name, metadata=metadata)
+        self._collections[name] = collection
+        if self._collection_names is not None:
+            self._collection_names.add(name)
+        return collection
     
     def get_or_create_collection(
         self,
@@ -156,13 +219,11 @@ class ChromaDBConnector:
         Returns:
             ChromaDB collection object
         """
-        try:
-            collection = self.get_collection(name)
-            return collection
-        except Exception:
-            if metadata is None:
-                metadata = {"description": f"D&D 1st Edition - {name}"}
-            return self.create_collection(name, metadata)
+        if self.collection_exists(name):
+            return self.get_collection(name)
+        if metadata is None:
+            metadata = {"description": f"D&D 1st Edition - {name}"}
+        return self.create_collection(name, metadata)
     
     def delete_collection(self, name: str):
         """
@@ -174,6 +235,8 @@ class ChromaDBConnector:
         Raises:
             Exception: If collection doesn't exist
         """
+        self._collections.pop(name, None)
+        self._collection_names = None
         self.client.delete_collection(name=name)
     
     def truncate_collection(self, name: str, batch_size: int = 500) -> int:
@@ -206,8 +269,9 @@ class ChromaDBConnector:
         print(f"Truncating {count_before} items in batches of {batch_size}...")
         
         while True:
-            # Get a batch of IDs
-            result = collection.get(limit=batch_size)
+            # Get a batch of IDs only (include=[] skips the embeddings,
+            # documents and metadatas, which are most of the payload)
+            result = collection.get(limit=batch_size, include=[])
             
             if not result or not result['ids']:
                 break
@@ -238,17 +302,31 @@ class ChromaDBConnector:
         """
         Check if a collection exists.
         
+        Answered from the cached collection handles, or a membership test
+        on the collection names, which are listed at most once per
+        COLLECTION_NAMES_TTL_SECONDS.
+        
         Args:
             name: Collection name
             
         Returns:
             True if collection exists, False otherwise
+            
+        Raises:
+            Exception: If the collections can't be listed (e.g. connection
+                or authentication errors)
         """
-        try:
-            self.get_collection(name)
+        if name in self._collections:
             return True
-        except Exception:
-            return False
+        
+        now = time.monotonic()
+        if (self._collection_names is None
+                or now - self._collection_names_time > self.COLLECTION_NAMES_TTL_SECONDS):
+            self._collection_names = {
+                getattr(collection, "name", collection) for collection in self.list_collections()
+            }
+            self._collection_names_time = now
+        return name in self._collection_names
     
     def get_collection_count(self, name: str) -> int:
         """
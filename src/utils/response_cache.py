@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for OpenAI responses.
+
+Stores one JSON file per entry, keyed by a SHA-256 hash of everything that
+determines the response (model, prompts, sampling parameters). Repeated
+requests with identical inputs are served from disk instead of the API.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+
+class ResponseCache:
+    """File-based response cache (one JSON file per key)."""
+    
+    def __init__(self, cache_dir: str):
+        """
+        Initialize response cache.
+        
+        Args:
+            cache_dir: Directory to store cache entries (created if missing)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from the inputs that determine a response.
+        
+        Args:
+            *parts: Values to hash (converted with str(); order matters)
+        
+        Returns:
+            Hex SHA-256 digest
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode('utf-8'))
+            digest.update(b'\0')  # Separator so ("ab", "c") != ("a", "bc")
+        return digest.hexdigest()
+    
+    def _get_entry_file(self, key: str) -> Path:
+        """Get path to a cache entry file."""
+        return self.cache_dir / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Cache key from make_key()
+        
+        Returns:
+            Cached value, or None on a miss (or unreadable entry)
+        """
+        entry_file = self._get_entry_file(key)
+        try:
+            with open(entry_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a response.
+        
+        Writes to a uniquely named temporary file and renames it into place,
+        so concurrent readers never see a partially written entry and
+        concurrent writers of the same key (other threads or processes)
+        don't share a temporary file.
+        
+        Args:
+            key: Cache key from make_key()
+            value: JSON-serializable value
+        """
+        entry_file = self._get_entry_file(key)
+        fd, tmp_file = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp")
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_file, entry_file)
+        except BaseException:
+            os.unlink(tmp_file)
+            raise
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Unit tests for ApiRateLimiter sliding-window limiter."""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+from src.utils.api_rate_limiter import ApiRateLimiter
+
+
+class FakeClock:
+    """Monotonic clock that only moves when asyncio.sleep is awaited."""
+    
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """Patch the limiter's clock and sleep with a fake clock."""
+    fake = FakeClock()
+    with patch('src.utils.api_rate_limiter.time.monotonic', fake.monotonic), \
+            patch('src.utils.api_rate_limiter.asyncio.sleep', fake.sleep):
+        yield fake
+
+
+class TestApiRateLimiter:
+    """Test request and token budgets."""
+    
+    def test_unlimited_never_waits(self, clock):
+        """Test a limiter without budgets lets everything through."""
+        limiter = ApiRateLimiter()
+        
+        async def run():
+            for _ in range(50):
+                await limiter.acquire(100000)
+        
+        asyncio.run(run())
+        assert clock.sleeps == []
+    
+    def test_requests_per_minute(self, clock):
+        """Test the request after the RPM budget waits for the window to slide."""
+        limiter = ApiRateLimiter(requests_per_minute=3)
+        
+        async def run():
+            for _ in range(4):
+                await limiter.acquire(10)
+        
+        asyncio.run(run())
+        assert clock.sleeps == [60.0]
+    
+    def test_tokens_per_minute(self, clock):
+        """Test requests wait when the token budget would be exceeded."""
+        limiter = ApiRateLimiter(tokens_per_minute=1000)
+        
+        async def run():
+            await limiter.acquire(600)
+            clock.now += 10
+            await limiter.acquire(600)
+        
+        asyncio.run(run())
+        assert clock.sleeps == [50.0]
+    
+    def test_oversized_request_allowed_when_window_empty(self, clock):
+        """Test a request bigger than the whole budget is not blocked forever."""
+        limiter = ApiRateLimiter(tokens_per_minute=100)
+        asyncio.run(limiter.acquire(500))
+        assert clock.sleeps == []
+    
+    def test_record_usage_corrects_estimate(self, clock):
+        """Test actual usage replaces the reserved estimate."""
+        limiter = ApiRateLimiter(tokens_per_minute=1000)
+        
+        async def run():
+            reservation = await limiter.acquire(900)
+            limiter.record_usage(reservation, 300)
+            await limiter.acquire(600)
+        
+        asyncio.run(run())
+        assert clock.sleeps == []
+    
+    def test_record_usage_after_window_expired(self, clock):
+        """Test late usage reports don't corrupt the window total."""
+        limiter = ApiRateLimiter(tokens_per_minute=1000)
+        
+        async def run():
+            reservation = await limiter.acquire(900)
+            clock.now += 61
+            await limiter.acquire(100)  # Purges the expired reservation
+            limiter.record_usage(reservation, 300)
+        
+        asyncio.run(run())
+        assert limiter._tokens_in_window == 100
+    
+    def test_reusable_across_event_loops(self, clock):
+        """Test the limiter works when used from successive asyncio.run calls."""
+        limiter = ApiRateLimiter(requests_per_minute=10)
+        asyncio.run(limiter.acquire(1))
+        asyncio.run(limiter.acquire(1))
+        assert len(limiter._entries) == 2
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for ChromaDBConnector.
+
+Tests collection operations against a mocked ChromaDB client.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from src.utils.chromadb_connector import ChromaDBConnector
+
+
+@pytest.fixture
+def chroma_client():
+    """Mocked chromadb.HttpClient instance."""
+    with patch('src.utils.chromadb_connector.chromadb.HttpClient') as http_client:
+        yield http_client.return_value
+
+
+@pytest.fixture
+def connector(chroma_client):
+    """Local-mode connector on the mocked client."""
+    return ChromaDBConnector(chroma_host="localhost", chroma_port=8060, use_cloud=False)
+
+
+class TestTruncateCollection:
+    """Test emptying a collection."""
+
+    def test_deletes_in_batches_fetching_ids_only(self, connector, chroma_client):
+        """Test each batch fetches only IDs and is deleted until empty."""
+        collection = chroma_client.get_collection.return_value
+        collection.count.return_value = 5
+        collection.get.side_effect = [
+            {"ids": ["a", "b"]},
+            {"ids": ["c", "d"]},
+            {"ids": ["e"]},
+        ]
+
+        assert connector.truncate_collection("rules", batch_size=2) == 5
+
+        for call in collection.get.call_args_list:
+            assert call.kwargs == {"limit": 2, "include": []}
+        assert [call.kwargs["ids"] for call in collection.delete.call_args_list] == [
+            ["a", "b"], ["c", "d"], ["e"]
+        ]
+
+    def test_empty_collection_not_fetched(self, connector, chroma_client):
+        """Test an empty collection returns 0 without fetching."""
+        collection = chroma_client.get_collection.return_value
+        collection.count.return_value = 0
+
+        assert connector.truncate_collection("rules") == 0
+        collection.get.assert_not_called()
+
+
+class TestCollectionCache:
+    """Test collection handles are reused instead of re-fetched."""
+
+    def test_repeated_lookups_fetch_once(self, connector, chroma_client):
+        """Test exists/count/info on one collection cost a single get_collection."""
+        chroma_client.list_collections.return_value = [SimpleNamespace(name="rules")]
+        assert connector.collection_exists("rules")
+        connector.get_collection_count("rules")
+        connector.get_collection_info("rules")
+        connector.get_or_create_collection("rules")
+
+        chroma_client.get_collection.assert_called_once_with(name="rules")
+
+    def test_created_collection_is_cached(self, connector, chroma_client):
+        """Test a created collection is returned without fetching it."""
+        created = connector.create_collection("monsters")
+
+        assert connector.get_collection("monsters") is created
+        chroma_client.get_collection.assert_not_called()
+
+    def test_delete_invalidates_cache(self, connector, chroma_client):
+        """Test a deleted collection is looked up again afterwards."""
+        connector.get_collection("rules")
+        connector.delete_collection("rules")
+        connector.get_collection("rules")
+
+        assert chroma_client.get_collection.call_count == 2
+
+
+class TestCollectionExists:
+    """Test existence checks against the listed collection names."""
+
+    def test_names_listed_once_within_ttl(self, connector, chroma_client):
+        """Test several checks share one listing and never call get_collection."""
+        chroma_client.list_collections.reset_mock()
+        chroma_client.list_collections.return_value = [
+            SimpleNamespace(name="rules"), SimpleNamespace(name="monsters")
+        ]
+
+        assert connector.collection_exists("rules")
+        assert connector.collection_exists("monsters")
+        assert not connector.collection_exists("spells")
+
+        chroma_client.list_collections.assert_called_once()
+        chroma_client.get_collection.assert_not_called()
+
+    def test_names_relisted_after_ttl(self, connector, chroma_client):
+        """Test the name list is refreshed once it is older than the TTL."""
+        chroma_client.list_collections.reset_mock()
+        chroma_client.list_collections.return_value = []
+        expired = 100.0 + ChromaDBConnector.COLLECTION_NAMES_TTL_SECONDS + 1
+        with patch('src.utils.chromadb_connector.time.monotonic', side_effect=[100.0, expired]):
+            connector.collection_exists("rules")
+            connector.collection_exists("rules")
+
+        assert chroma_client.list_collections.call_count == 2
+
+    def test_connection_errors_propagate(self, connector, chroma_client):
+        """Test a failing server is an error, not a missing collection."""
+        chroma_client.list_collections.side_effect = ConnectionError("server down")
+
+        with pytest.raises(ConnectionError):
+            connector.collection_exists("rules")
+
+    def test_get_or_create_creates_missing_collection(self, connector, chroma_client):
+        """Test a missing collection is created without a failing get_collection."""
+        chroma_client.list_collections.return_value = []
+
+        collection = connector.get_or_create_collection("spells")
+
+        assert collection is chroma_client.create_collection.return_value
+        chroma_client.get_collection.assert_not_called()
+        assert connector.collection_exists("spells")
+
+
+class TestSharedInstance:
+    """Test the process-wide connectors from get_instance()."""
+
+    def test_same_arguments_share_one_connector(self, chroma_client):
+        """Test one connection per set of arguments."""
+        with patch.dict('src.utils.chromadb_connector._shared_connectors', clear=True):
+            first = ChromaDBConnector.get_instance("localhost", 8060, False)
+            second = ChromaDBConnector.get_instance("localhost", 8060, False)
+            other = ChromaDBConnector.get_instance("localhost", 8061, False)
+
+        assert first is second
+        assert other is not first
+        assert chroma_client.list_collections.call_count == 2  # One connection check each
@@ -6,6 +6,7 @@ Tests context extraction bounded by markdown headings, including
 edge cases like tables at file boundaries and nested headings.
 """
 
+import re
 import pytest
 from pathlib import Path
 from src.transformers.components.context_extractor import ContextExtractor
@@ -36,6 +37,13 @@ class TestContextExtractorInitialization:
         extractor = ContextExtractor(context_test_file)
         assert extractor.markdown_lines == context_test_file
         assert len(extractor.markdown_lines) > 0
+    
+    def test_heading_levels_precomputed(self):
+        """Test headings are indexed once with their line numbers and levels."""
+        lines = ["# Title", "text", "  ### Sub  ", "#hashtag", "| # | x |", "####### Too deep"]
+        extractor = ContextExtractor(lines)
+        assert extractor._heading_line_numbers == [1, 3]
+        assert extractor._heading_line_levels == [1, 3]
 
 
 class TestContextExtractorHeadingDetection:
@@ -73,6 +81,15 @@ class TestContextExtractorHeadingDetection:
         """Test table line returns None."""
         assert extractor.get_heading_level("| Column | Data |") is None
     
+    @pytest.mark.parametrize("line", [
+        "#", "# ", "#hashtag", "####### Seven", "##\tTabbed", " # x", "#  ", "#\u00a0nbsp", "",
+    ])
+    def test_get_heading_level_matches_markdown_regex(self, extractor, line):
+        """Test hand-written detection agrees with the heading regex it replaces."""
+        match = re.match(r'^(#{1,6})\s+(.+)$', line.strip())
+        expected = len(match.group(1)) if match else None
+        assert extractor.get_heading_level(line) == expected
+    
     def test_get_heading_level_with_whitespace(self, extractor):
         """Test heading detection with leading/trailing whitespace."""
         assert extractor.get_heading_level("  ## Section A  ") == 2
@@ -278,6 +295,54 @@ class TestContextExtractorExtractContext:
         assert "| Test | Data |" not in context
 
 
+class TestContextExtractorHeadingIndex:
+    """Test indexed boundary lookups against a plain line scan."""
+    
+    def test_lookups_match_linear_scan(self, extractor):
+        """Test every line's boundaries agree with scanning line by line."""
+        lines = extractor.markdown_lines
+        levels = [extractor.get_heading_level(line) for line in lines]
+        for line_number in range(1, len(lines) + 1):
+            before = next(
+                ((i, levels[i - 1]) for i in range(line_number - 1, 0, -1) if levels[i - 1]),
+                (1, 6)
+            )
+            assert extractor.find_heading_before(line_number) == before
+            for min_level in range(1, 7):
+                after = next(
+                    (i for i in range(line_number + 1, len(lines) + 1)
+                     if levels[i - 1] and levels[i - 1] <= min_level),
+                    len(lines) + 1
+                )
+                assert extractor.find_next_heading(line_number, min_level) == after
+
+
+class TestContextExtractorBatch:
+    """Test batch context extraction."""
+    
+    def test_matches_single_extraction(self, extractor):
+        """Test batch results equal per-table extract_context, in input order."""
+        line_count = len(extractor.markdown_lines)
+        tables = [(15, 18), (3, 4), (line_count, line_count), (1, 1), (11, 13), (3, 4)]
+        expected = [extractor.extract_context(start, end) for start, end in tables]
+        assert extractor.extract_contexts(tables) == expected
+    
+    def test_every_line_as_table(self, extractor):
+        """Test batch results equal per-table extraction for every single-line table."""
+        tables = [(n, n) for n in range(len(extractor.markdown_lines), 0, -1)]
+        expected = [extractor.extract_context(start, end) for start, end in tables]
+        assert extractor.extract_contexts(tables) == expected
+    
+    def test_invalid_range_raises(self, extractor):
+        """Test an invalid table range fails the whole batch."""
+        with pytest.raises(ValueError):
+            extractor.extract_contexts([(3, 4), (0, 2)])
+    
+    def test_empty_batch(self, extractor):
+        """Test no tables yields no contexts."""
+        assert extractor.extract_contexts([]) == []
+
+
 class TestContextExtractorEdgeCases:
     """Test edge cases and boundary conditions."""
     
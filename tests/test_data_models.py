@@ -49,6 +49,15 @@ class TestTableRecord:
         """Test that end_line must be >= start_line."""
         with pytest.raises(ValueError, match="end_line .* must be >= start_line"):
             TableRecord(start_line=10, end_line=5, description="Test")
+    
+    def test_uses_slots(self):
+        """Test records have no per-instance __dict__ but stay mutable."""
+        record = TableRecord(start_line=1, end_line=2, description="Test")
+        assert not hasattr(record, "__dict__")
+        record.table_markdown = "| A |"
+        assert record.table_markdown == "| A |"
+        with pytest.raises(AttributeError):
+            record.unknown_field = "x"
 
 
 class TestTransformationResult:
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Unit tests for DnDRAG retrieval helpers.
+
+DnDRAG.__init__ connects to OpenAI and ChromaDB, so most tests build the
+instance without running it and exercise the pure helper methods only.
+"""
+
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.query.docling_query import DnDRAG, _extract_comparison_entities
+from src.utils.rag_output import RAGOutput
+from src.utils.response_cache import ResponseCache
+
+
+class FakeCollection:
+    """In-memory stand-in for a ChromaDB collection with fixed distances."""
+    
+    def __init__(self, items):
+        # items: list of (id, metadata, document, distance)
+        self.items = sorted(items, key=lambda item: item[3])
+        self.query_calls = []
+        self.get_calls = 0
+    
+    def query(self, query_embeddings, n_results, where=None, **kwargs):
+        self.query_calls.append(where)
+        excluded = set(where["uid"]["$nin"]) if where else set()
+        hits = [item for item in self.items if item[1].get("uid", item[0]) not in excluded][:n_results]
+        return {
+            'ids': [[item[0] for item in hits]],
+            'metadatas': [[item[1] for item in hits]],
+            'documents': [[item[2] for item in hits]],
+            'distances': [[item[3] for item in hits]],
+        }
+    
+    def get(self, ids=None, limit=None, offset=0, **kwargs):
+        self.get_calls += 1
+        hits = [item for item in self.items if ids is None or item[0] in ids]
+        hits = hits[offset:offset + limit] if limit is not None else hits[offset:]
+        return {
+            'ids': [item[0] for item in hits],
+            'metadatas': [item[1] for item in hits],
+            'documents': [item[2] for item in hits],
+        }
+
+
+@pytest.fixture
+def rag():
+    """DnDRAG instance without OpenAI/ChromaDB connections."""
+    instance = DnDRAG.__new__(DnDRAG)
+    instance.output = RAGOutput()
+    instance.get_embedding = lambda text: [0.0]
+    instance._has_query_must = True
+    instance.response_cache = None
+    instance.model = "gpt-4o-mini"
+    return instance
+
+
+def make_completion(content):
+    """Build a minimal chat completion response object."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120)
+    )
+
+
+def make_chunk(n, distance, query_must=None):
+    """Build a (id, metadata, document, distance) tuple for FakeCollection."""
+    metadata = {"uid": f"uid{n}", "title": f"Chunk {n}"}
+    if query_must is not None:
+        metadata["query_must"] = query_must
+    return (f"id{n}", metadata, f"doc {n}", distance)
+
+
+class TestApplyGapCutoff:
+    """Tests for adaptive gap detection cutoff."""
+    
+    def test_cuts_at_large_gap(self, rag):
+        """A gap >= 0.06 should cut at the cliff position."""
+        distances = [0.10, 0.12, 0.13, 0.30, 0.31]
+        assert rag._apply_gap_cutoff(distances, k=15, distance_threshold=0.4) == 3
+    
+    def test_distance_threshold_when_no_cliff(self, rag):
+        """Without a cliff, results beyond best + threshold are dropped."""
+        distances = [0.10, 0.13, 0.16, 0.19, 0.22, 0.25]
+        assert rag._apply_gap_cutoff(distances, k=15, distance_threshold=0.1) == 4
+    
+    def test_presorted_matches_linear_scan(self, rag):
+        """Binary-search cutoff agrees with the linear scan on sorted input."""
+        distances = [0.10, 0.13, 0.16, 0.19, 0.22, 0.25]
+        for threshold in (0.0, 0.05, 0.1, 0.12, 0.2, 1.0):
+            assert (rag._apply_gap_cutoff(distances, 15, threshold, presorted=True)
+                    == rag._apply_gap_cutoff(distances, 15, threshold))
+    
+    def test_unsorted_stops_at_first_beyond_cutoff(self, rag):
+        """Reordered base results stop counting at the first distance over the cutoff."""
+        distances = [0.10, 0.15, 0.60, 0.16, 0.17]
+        assert rag._apply_gap_cutoff(distances, k=15, distance_threshold=0.1, gap_threshold=1.0) == 2
+    
+    def test_keeps_minimum_of_two(self, rag):
+        """At least two results are kept when available."""
+        distances = [0.10, 0.90]
+        assert rag._apply_gap_cutoff(distances, k=15, distance_threshold=0.1) == 2
+    
+    def test_single_result(self, rag):
+        """A single result is always kept."""
+        assert rag._apply_gap_cutoff([0.5], k=15, distance_threshold=0.4) == 1
+    
+    def test_respects_k(self, rag):
+        """Keep count never exceeds k."""
+        distances = [0.10, 0.11, 0.12, 0.13, 0.14]
+        assert rag._apply_gap_cutoff(distances, k=3, distance_threshold=0.4) == 3
+    
+    def test_debug_output(self, rag):
+        """Debug mode should record the strategy used."""
+        distances = [0.10, 0.12, 0.13, 0.30]
+        rag._apply_gap_cutoff(distances, k=15, distance_threshold=0.4, debug=True,
+                              label=" on filtered results")
+        assert "  [DEBUG] Gap analysis on filtered results:" in rag.output.diagnostics
+        assert any("Strategy: gap detection" in msg for msg in rag.output.diagnostics)
+
+
+
+class TestExtractComparisonEntities:
+    """Tests for comparison query entity detection."""
+    
+    def test_non_comparison_query(self):
+        """Queries without trigger tokens return no entities."""
+        assert _extract_comparison_entities("fireball damage") == []
+    
+    def test_and_without_comparison(self):
+        """A bare 'and' is not a comparison."""
+        assert _extract_comparison_entities("Tell me about owlbears and their abilities") == []
+    
+    def test_difference_between(self):
+        """'difference between X and Y' extracts both entities."""
+        query = "What is the difference between a red dragon and a white dragon?"
+        assert _extract_comparison_entities(query) == ["a red dragon", "a white dragon"]
+    
+    def test_versus(self):
+        """'X vs Y' extracts both entities."""
+        assert _extract_comparison_entities("orc vs goblin") == ["orc", "goblin"]
+    
+    def test_compare_strips_trailing_words(self):
+        """Trailing instructions are stripped from the second entity."""
+        query = "compare the lich and the vampire summarize their powers"
+        assert _extract_comparison_entities(query) == ["lich", "vampire"]
+
+
+
+class TestRetrieveBase:
+    """Tests for base retrieval enhancements."""
+    
+    def test_comparison_entities_moved_to_front(self, rag):
+        """Matched comparison entities are moved ahead of other results."""
+        items = [make_chunk(n, 0.10 + n * 0.01) for n in range(4)]
+        items[2][1]["name"] = "Orc"
+        items[3][1]["name"] = "Goblin"
+        rag.collection = FakeCollection(items)
+        results = rag._retrieve_base("orc vs goblin", k=15, distance_threshold=0.4)
+        assert results['ids'][0] == ["id3", "id2", "id0", "id1"]
+    
+    def test_parent_category_inserted_second(self, rag):
+        """A top monster's parent category is injected at position 1."""
+        items = [make_chunk(n, 0.10 + n * 0.01) for n in range(3)]
+        items[0][1]["parent_category_id"] = "cat"
+        category = ("cat", {"uid": "cat", "title": "Dragons"}, "category doc", 0.90)
+        rag.collection = FakeCollection(items + [category])
+        results = rag._retrieve_base("red dragon", k=3, distance_threshold=0.4)
+        assert results['ids'][0] == ["id0", "cat", "id1"]
+        assert results['distances'][0][1] == pytest.approx(0.15)
+
+
+class TestRetrieveWithFiltering:
+    """Tests for iterative query_must filtering."""
+    
+    def test_no_query_must_single_query(self, rag):
+        """Batches without query_must stop after one query and never prefetch."""
+        rag.collection = FakeCollection([make_chunk(n, 0.1 + n * 0.01) for n in range(5)])
+        results = rag._retrieve_with_filtering("fireball", k=3)
+        assert results['ids'][0] == ["id0", "id1", "id2"]
+        assert rag.collection.query_calls == [None]
+    
+    def test_unrestricted_batch_skips_filter_scan(self, rag, monkeypatch):
+        """filter_chunks is not called when no chunk in the batch has query_must."""
+        from src.query import docling_query
+        calls = []
+        monkeypatch.setattr(docling_query, "filter_chunks", lambda *args: calls.append(args))
+        rag.collection = FakeCollection([make_chunk(n, 0.1 + n * 0.01) for n in range(3)])
+        results = rag._retrieve_with_filtering("fireball", k=3)
+        assert results['ids'][0] == ["id0", "id1", "id2"]
+        assert calls == []
+    
+    def test_excluded_chunks_are_replaced(self, rag):
+        """Excluded chunks trigger a re-query that skips every seen uid."""
+        fighter_only = '{"contain": "fighter"}'
+        rag.collection = FakeCollection([
+            make_chunk(0, 0.10),
+            make_chunk(1, 0.11, fighter_only),
+            make_chunk(2, 0.12),
+            make_chunk(3, 0.13),
+            make_chunk(4, 0.14),
+        ])
+        results = rag._retrieve_with_filtering("cleric spells", k=3, distance_threshold=0.4)
+        assert results['ids'][0] == ["id0", "id2", "id3"]
+        assert len(rag.collection.query_calls) == 2
+        assert set(rag.collection.query_calls[1]["uid"]["$nin"]) == {"uid0", "uid1", "uid2"}
+    
+    def test_malformed_query_must_fails_open(self, rag):
+        """Malformed query_must JSON keeps the chunk."""
+        rag.collection = FakeCollection([make_chunk(0, 0.10), make_chunk(1, 0.11, '{"contain": ')])
+        results = rag._retrieve_with_filtering("anything", k=2)
+        assert results['ids'][0] == ["id0", "id1"]
+
+
+
+class TestRetrieveFastPath:
+    """Tests for routing when the collection has no query_must metadata."""
+    
+    def test_matches_filtering_path(self, rag):
+        """The fast path returns the same results as the filtering loop."""
+        rag.collection = FakeCollection([make_chunk(n, 0.1 + n * 0.02) for n in range(6)])
+        filtered = rag.retrieve("fireball", k=4)
+        rag._has_query_must = False
+        fast = rag.retrieve("fireball", k=4)
+        assert fast['ids'] == filtered['ids']
+        assert fast['distances'] == filtered['distances']
+
+
+
+class TestQueryMustProbe:
+    """Tests for the query_must probe run by __init__."""
+    
+    def build(self, collection):
+        """Run DnDRAG.__init__ against a fake collection with patched clients."""
+        chroma = MagicMock()
+        chroma.get_collection.return_value = collection
+        with patch('src.query.docling_query.get_openai_api_key', return_value="sk-test"), \
+                patch('openai.OpenAI'), patch('openai.AsyncOpenAI'), \
+                patch('src.utils.chromadb_connector.ChromaDBConnector.get_instance', return_value=chroma):
+            return DnDRAG(collection_name="rules", cache_dir="", output=RAGOutput())
+    
+    def test_without_query_must_uses_fast_path(self):
+        """A collection with no query_must keys routes retrieve() to the single query."""
+        rag = self.build(FakeCollection([make_chunk(n, 0.1) for n in range(3)]))
+        assert rag._has_query_must is False
+        with patch.object(rag, '_retrieve_unfiltered') as unfiltered, \
+                patch.object(rag, '_retrieve_with_filtering') as filtering:
+            rag.retrieve("fireball")
+        unfiltered.assert_called_once()
+        filtering.assert_not_called()
+    
+    def test_with_query_must_uses_filtering(self):
+        """A single chunk with query_must routes retrieve() to the filtering loop."""
+        rag = self.build(FakeCollection([make_chunk(0, 0.1), make_chunk(1, 0.2, '{"contain": "cleric"}')]))
+        assert rag._has_query_must is True
+        with patch.object(rag, '_retrieve_unfiltered') as unfiltered, \
+                patch.object(rag, '_retrieve_with_filtering') as filtering:
+            rag.retrieve("fireball")
+        filtering.assert_called_once()
+        unfiltered.assert_not_called()
+    
+    def test_pages_past_chunks_without_query_must(self):
+        """The probe keeps paging until it finds a chunk with the key."""
+        items = [make_chunk(n, 0.1) for n in range(5)] + [make_chunk(5, 0.2, '{"contain": "cleric"}')]
+        collection = FakeCollection(items)
+        with patch.object(DnDRAG, 'QUERY_MUST_PROBE_PAGE_SIZE', 2):
+            rag = self.build(collection)
+        assert rag._has_query_must is True
+        assert collection.get_calls == 3
+
+
+
+class TestGenerateCache:
+    """Tests for the on-disk answer cache in generate()."""
+    
+    def test_no_cache_calls_api_each_time(self, rag):
+        """Without a cache every call reaches OpenAI."""
+        rag.openai_client = MagicMock()
+        rag.openai_client.chat.completions.create.return_value = make_completion("answer")
+        rag.generate("q", "ctx")
+        rag.generate("q", "ctx")
+        assert rag.openai_client.chat.completions.create.call_count == 2
+    
+    def test_repeat_served_from_cache(self, rag, tmp_path):
+        """An identical request is answered from disk with zero billed tokens."""
+        rag.response_cache = ResponseCache(str(tmp_path))
+        rag.openai_client = MagicMock()
+        rag.openai_client.chat.completions.create.return_value = make_completion("answer")
+        first = rag.generate("q", "ctx")
+        second = rag.generate("q", "ctx")
+        assert rag.openai_client.chat.completions.create.call_count == 1
+        assert first['usage']['total_tokens'] == 120
+        assert second['content'] == "answer"
+        assert second['usage'] == {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'cached': True}
+    
+    def test_different_context_misses(self, rag, tmp_path):
+        """A different context is a cache miss."""
+        rag.response_cache = ResponseCache(str(tmp_path))
+        rag.openai_client = MagicMock()
+        rag.openai_client.chat.completions.create.return_value = make_completion("answer")
+        rag.generate("q", "ctx one")
+        rag.generate("q", "ctx two")
+        assert rag.openai_client.chat.completions.create.call_count == 2
+
+
+
+class TestGenerateStreaming:
+    """Tests for streamed generation via on_delta."""
+    
+    def test_stream_accumulates_content_and_usage(self, rag):
+        """Deltas are forwarded in order and the full answer is returned."""
+        def chunk(text=None, usage=None):
+            choices = [SimpleNamespace(delta=SimpleNamespace(content=text))] if text is not None else []
+            return SimpleNamespace(choices=choices, usage=usage)
+        
+        rag.openai_client = MagicMock()
+        rag.openai_client.chat.completions.create.return_value = iter([
+            chunk("Roll "), chunk("a 14."), chunk(""),
+            chunk(usage=SimpleNamespace(prompt_tokens=50, completion_tokens=4, total_tokens=54)),
+        ])
+        received = []
+        result = rag.generate("q", "ctx", on_delta=received.append)
+        
+        assert received == ["Roll ", "a 14."]
+        assert result == {
+            'content': "Roll a 14.",
+            'usage': {'prompt_tokens': 50, 'completion_tokens': 4, 'total_tokens': 54}
+        }
+        kwargs = rag.openai_client.chat.completions.create.call_args.kwargs
+        assert kwargs['stream'] is True
+        assert kwargs['stream_options'] == {"include_usage": True}
+    
+    def test_cached_answer_delivered_to_callback(self, rag, tmp_path):
+        """A cache hit still reaches the streaming callback."""
+        rag.response_cache = ResponseCache(str(tmp_path))
+        rag.openai_client = MagicMock()
+        rag.openai_client.chat.completions.create.return_value = make_completion("answer")
+        rag.generate("q", "ctx")
+        received = []
+        rag.generate("q", "ctx", on_delta=received.append)
+        assert received == ["answer"]
+
+
+class TestFormatChunkInfo:
+    """Tests for diagnostic chunk labels."""
+    
+    def test_full_label(self, rag):
+        metadata = {"title": "Owlbear", "book": "Monster Manual", "hierarchy": "MONSTERS > O"}
+        assert rag._format_chunk_info(metadata, 2, 5) == "Owlbear [book: Monster Manual] [MONSTERS > O] [chunk 2/5]"
+    
+    def test_defaults_without_numbering(self, rag):
+        assert rag._format_chunk_info({"name": "Fireball"}) == "Fireball [book: Unknown]"
+
+
+class TestEstimateMaxTokens:
+    """Tests for the adaptive completion budget."""
+    
+    def test_lookup_question_gets_short_budget(self, rag):
+        assert rag._estimate_max_tokens("How many XP does a 9th level fighter need?", "ctx") == 300
+    
+    def test_descriptive_question_gets_ceiling(self, rag):
+        assert rag._estimate_max_tokens("Tell me about owlbears", "ctx") == 800
+        assert rag._estimate_max_tokens("What is the difference between a red and white dragon?", "ctx") == 800
+    
+    def test_other_question_gets_medium_budget(self, rag):
+        assert rag._estimate_max_tokens("Can paladins use poison?", "ctx") == 600
+    
+    def test_large_context_raises_budget_up_to_ceiling(self, rag):
+        assert rag._estimate_max_tokens("How many attacks?", "x" * 16000) == 400
+        assert rag._estimate_max_tokens("How many attacks?", "x" * 100000, max_tokens=500) == 500
+
+
+class TestAsyncQuery:
+    """Tests for the async query path."""
+    
+    def test_concurrent_queries_keep_separate_output(self, rag):
+        """Each aquery() gets its own output buffer and answer."""
+        rag.collection = FakeCollection([make_chunk(1, 0.1), make_chunk(2, 0.12)])
+        rag.async_openai_client = MagicMock()
+        rag.async_openai_client.chat.completions.create = AsyncMock(
+            side_effect=lambda **kwargs: make_completion(kwargs['messages'][1]['content'].split('Question: ')[1])
+        )
+        
+        async def run():
+            return await asyncio.gather(
+                rag.aquery("first question", enable_filtering=False),
+                rag.aquery("second question", enable_filtering=False),
+            )
+        
+        first, second = asyncio.run(run())
+        assert "first question" in first['answer']
+        assert "second question" in second['answer']
+        assert any("QUESTION: first question" in line for line in first['diagnostics'])
+        assert not any("second question" in line for line in first['diagnostics'])
+        assert first['usage']['total_tokens'] == 120
+        assert rag.output.diagnostics == []
+    
+    def test_retrieved_chunks_logged_as_one_entry(self, rag):
+        """The retrieved-chunk listing is a single diagnostics entry."""
+        rag.collection = FakeCollection([make_chunk(1, 0.1), make_chunk(2, 0.12)])
+        rag.async_openai_client = MagicMock()
+        rag.async_openai_client.chat.completions.create = AsyncMock(return_value=make_completion("answer"))
+        result = asyncio.run(rag.aquery("question", enable_filtering=False))
+        chunk_lists = [line for line in result['diagnostics'] if line.startswith("\nRetrieved chunks:")]
+        assert len(chunk_lists) == 1
+        assert chunk_lists[0].count("(distance: ") == 2
+
+
+class TestFormatContext:
+    """Tests for context formatting and deduplication."""
+    
+    @staticmethod
+    def results(*chunks):
+        return {
+            'documents': [[doc for doc, _ in chunks]],
+            'metadatas': [[meta for _, meta in chunks]],
+        }
+    
+    def test_formats_by_type(self, rag):
+        """Headers depend on chunk type."""
+        context = rag.format_context(self.results(
+            ("Fire spell text", {"name": "Fireball", "type": "spell", "spell_school": "Evocation"}),
+            ("Rule text", {"title": "Surprise", "type": "rule"}),
+        ))
+        assert context == "## Fireball\nEvocation\n\nFire spell text\n\n---\n\n### Surprise\n\nRule text"
+    
+    def test_monster_and_table_types(self, rag):
+        """Monster docs pass through unchanged; any table* type gets a ## header."""
+        context = rag.format_context(self.results(
+            ("## Owlbear\nAC 5", {"name": "Owlbear", "type": "monster"}),
+            ("| a | b |", {"name": "Saving Throws", "type": "table_row"}),
+        ))
+        assert context == "## Owlbear\nAC 5\n\n---\n\n## Saving Throws\n\n| a | b |"
+    
+    def test_exact_duplicates_dropped(self, rag):
+        """Identical documents (modulo whitespace) appear once."""
+        context = rag.format_context(self.results(
+            ("Owlbears hug for 2-16", {"name": "Owlbear", "type": "monster"}),
+            ("Owlbears  hug for\n2-16", {"name": "Owlbear", "type": "monster"}),
+        ))
+        assert context == "Owlbears hug for 2-16"
+    
+    def test_near_duplicates_of_same_entity_dropped(self, rag):
+        """Heavily overlapping chunks of the same entity keep only the first."""
+        base = " ".join(f"word{n}" for n in range(20))
+        context = rag.format_context(self.results(
+            (base, {"name": "Combat", "type": "rule"}),
+            (base + " extra", {"name": "Combat", "type": "rule"}),
+        ))
+        assert context == f"### Combat\n\n{base}"
+    
+    def test_similar_chunks_of_different_entities_kept(self, rag):
+        """Overlap across different names is not treated as duplication."""
+        base = " ".join(f"word{n}" for n in range(20))
+        context = rag.format_context(self.results(
+            (base, {"name": "Cleric Attack Matrix", "type": "table"}),
+            (base + " extra", {"name": "Druid Attack Matrix", "type": "table"}),
+        ))
+        assert context.count("---") == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -109,6 +109,16 @@ class TestFileWriterBackupCreation:
         backup_content = backup_path.read_text(encoding='utf-8')
         assert original_content == backup_content
     
+    def test_backup_is_byte_identical(self, temp_output_dir, tmp_path):
+        """Test backup preserves bytes that are not valid UTF-8 or use CRLF."""
+        writer = FileWriter(temp_output_dir)
+        original = tmp_path / "raw.md"
+        original.write_bytes(b"# Title\r\n\xff\xfe stray bytes\r\n")
+        
+        backup_path = writer.create_backup(original)
+        
+        assert backup_path.read_bytes() == original.read_bytes()
+    
     def test_backup_has_timestamp(self, temp_output_dir, temp_input_file):
         """Test that backup filename includes timestamp."""
         writer = FileWriter(temp_output_dir)
@@ -130,6 +140,20 @@ class TestFileWriterBackupCreation:
         
         assert writer.backup_dir.exists()
     
+    def test_backup_directory_created_once(self, temp_output_dir, temp_input_file, monkeypatch):
+        """Test that repeated backups do not re-issue mkdir."""
+        writer = FileWriter(temp_output_dir)
+        writer.create_backup(temp_input_file, timestamp="20240101_000000")
+        
+        calls = []
+        monkeypatch.setattr(Path, "mkdir", lambda self, *args, **kwargs: calls.append(self))
+        writer.create_backup(temp_input_file, timestamp="20240101_000001")
+        writer.write_transformed_file(temp_input_file, ["x"], create_backup=False)
+        writer.write_transformed_file(temp_input_file, ["y"], create_backup=False)
+        
+        # Only the first write creates the output directory
+        assert calls == [temp_output_dir]
+    
     def test_multiple_backups_different_timestamps(self, temp_output_dir, temp_input_file):
         """Test that multiple backups get different filenames."""
         writer = FileWriter(temp_output_dir)
@@ -173,6 +197,37 @@ class TestFileWriterFileWriting:
         expected = '\n'.join(sample_transformed_lines)
         assert content == expected
     
+    @pytest.mark.parametrize("lines", [[], [""], ["only"], ["a", "", "b", ""], ["ünïcode ✓", "| x |"]])
+    def test_write_matches_joined_content(self, temp_output_dir, temp_input_file, lines):
+        """Test streamed output equals the lines joined with newlines."""
+        writer = FileWriter(temp_output_dir)
+        
+        output_path = writer.write_transformed_file(temp_input_file, lines, create_backup=False)
+        
+        assert output_path.read_bytes() == '\n'.join(lines).encode('utf-8')
+    
+    def test_write_transformed_files_batch(self, temp_output_dir, tmp_path):
+        """Test concurrent batch writes return paths in input order."""
+        writer = FileWriter(temp_output_dir)
+        items = []
+        for n in range(10):
+            original = tmp_path / f"doc{n}.md"
+            original.write_text(f"original {n}", encoding='utf-8')
+            items.append((original, [f"# Doc {n}", f"line {n}"]))
+        
+        output_paths = writer.write_transformed_files(items, fsync=True)
+        
+        assert output_paths == [writer.generate_output_filename(original) for original, _ in items]
+        for n, output_path in enumerate(output_paths):
+            assert output_path.read_text(encoding='utf-8') == f"# Doc {n}\nline {n}"
+        assert len(list(writer.backup_dir.iterdir())) == 10
+    
+    def test_write_transformed_files_empty(self, temp_output_dir):
+        """Test empty batch writes nothing."""
+        writer = FileWriter(temp_output_dir)
+        assert writer.write_transformed_files([]) == []
+        assert not temp_output_dir.exists()
+    
     def test_write_creates_output_directory(
         self,
         temp_output_dir,
@@ -309,6 +364,16 @@ class TestFileWriterEdgeCases:
         # Path should not exist yet
         assert not backup_path.exists()
     
+    def test_backup_uses_given_timestamp(self, temp_output_dir, temp_input_file):
+        """Test backup created with a timestamp lands at the predicted path."""
+        writer = FileWriter(temp_output_dir)
+        
+        predicted = writer.get_backup_path(temp_input_file, timestamp="20240101_120000")
+        backup_path = writer.create_backup(temp_input_file, timestamp="20240101_120000")
+        
+        assert backup_path == predicted
+        assert backup_path.name == f"{temp_input_file.stem}_20240101_120000{temp_input_file.suffix}"
+    
     def test_write_to_nested_output_directory(
         self,
         tmp_path,
@@ -200,3 +200,64 @@ class TestMarkdownFileReaderEdgeCases:
         
         assert extract1 == extract3  # Same extraction should be identical
         assert extract1 != extract2  # Different extractions should differ
+
+
+class TestMarkdownFileReaderLineIndex:
+    """Test offset-based extraction against readlines()."""
+
+    @pytest.mark.parametrize(
+        "content",
+        ["a\nb\nc\n", "a\nb\nno trailing newline", "\n\n\n", "x", "crlf\r\nlines\r\n", "form\x0cfeed sep\n"],
+    )
+    def test_matches_readlines(self, tmp_path, content):
+        """Lines, counts and extracted ranges should match readlines() splitting."""
+        path = tmp_path / "doc.md"
+        path.write_bytes(content.encode("utf-8"))
+        with open(path, "r", encoding="utf-8") as f:
+            expected = f.readlines()
+
+        reader = MarkdownFileReader(path)
+        assert reader.read_lines() == expected
+        assert reader.get_line_count() == len(expected)
+        for start in range(1, len(expected) + 1):
+            for end in range(start, len(expected) + 1):
+                assert reader.extract_lines(start, end) == "".join(expected[start - 1 : end])
+
+
+class TestMarkdownFileReaderClassifyLines:
+    """Test per-line heading/table classification."""
+
+    def test_classes_match_context_extractor_rules(self, tmp_path):
+        """Classes should agree with ContextExtractor's heading and table checks."""
+        from src.transformers.components.context_extractor import ContextExtractor
+        from src.transformers.components.markdown_file_reader import LINE_OTHER, LINE_TABLE
+
+        path = tmp_path / "doc.md"
+        path.write_text(
+            "# Title\ntext\n  ### Sub  \n#hashtag\n####### deep\n| a | b |\n  |---|\n\n## Next\n",
+            encoding="utf-8",
+        )
+        reader = MarkdownFileReader(path)
+        lines = reader.read_lines()
+        extractor = ContextExtractor(lines)
+
+        classes = reader.classify_lines()
+        assert classes == [1, LINE_OTHER, 3, LINE_OTHER, LINE_OTHER, LINE_TABLE, LINE_TABLE, LINE_OTHER, 2]
+        for line, line_class in zip(lines, classes):
+            assert (extractor.get_heading_level(line) or LINE_OTHER) == (
+                line_class if line_class != LINE_TABLE else LINE_OTHER
+            )
+
+    def test_extractor_from_classes_matches(self):
+        """ContextExtractor built from classes should extract identical contexts."""
+        from src.transformers.components.context_extractor import ContextExtractor
+
+        reader = MarkdownFileReader(SAMPLE_FILE)
+        lines = reader.read_lines()
+        plain = ContextExtractor(lines)
+        classified = ContextExtractor(lines, reader.classify_lines())
+        tables = [(n, n) for n in range(1, len(lines) + 1)]
+        assert classified.extract_contexts(tables) == plain.extract_contexts(tables)
+        assert [classified.extract_context(s, e) for s, e in tables] == [
+            plain.extract_context(s, e) for s, e in tables
+        ]
@@ -6,9 +6,10 @@ Tests OpenAI API integration with mocking, including retry logic,
 JSON extraction, validation, and cost calculation.
 """
 
+import asyncio
 import pytest
 import json
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from openai import APIError, RateLimitError, APITimeoutError
 from src.transformers.components.openai_transformer import OpenAITransformer
 
@@ -71,6 +72,58 @@ class TestOpenAITransformerInitialization:
         """Test initialization with custom temperature."""
         transformer = OpenAITransformer(api_key="test-key", temperature=0.7)
         assert transformer.temperature == 0.7
+    
+    def test_clients_created_on_first_use(self):
+        """Test no OpenAI client is built until one is needed."""
+        transformer = OpenAITransformer(api_key="test-key")
+        assert "client" not in vars(transformer)
+        assert transformer._async_client is None
+        assert transformer.client is transformer.client
+        assert transformer.client.api_key == "test-key"
+    
+    def test_clients_share_connection_pool(self):
+        """Test transformers reuse one HTTP connection pool."""
+        first = OpenAITransformer(api_key="key-1")
+        second = OpenAITransformer(api_key="key-2")
+        assert first.client._client is second.client._client
+    
+    def test_async_clients_share_pool_per_event_loop(self):
+        """Test async clients share a pool within a loop and get a new one per loop."""
+        first = OpenAITransformer(api_key="key-1")
+        second = OpenAITransformer(api_key="key-2")
+        
+        async def pools():
+            return first.async_client._client, second.async_client._client, first.async_client
+        
+        pool_a, pool_b, client = asyncio.run(pools())
+        assert pool_a is pool_b
+        pool_c, _, client_again = asyncio.run(pools())
+        assert pool_c is not pool_a
+        assert client_again is not client
+    
+    def test_assigned_async_client_is_kept(self):
+        """Test an explicitly assigned async client is used in every loop."""
+        transformer = OpenAITransformer(api_key="key")
+        fake = MagicMock()
+        transformer.async_client = fake
+        
+        async def current():
+            return transformer.async_client
+        
+        assert asyncio.run(current()) is fake
+        assert asyncio.run(current()) is fake
+    
+    def test_module_import_does_not_load_openai(self):
+        """Test importing the transformer doesn't import the openai package."""
+        import subprocess
+        import sys
+        from pathlib import Path
+        code = (
+            "import sys; import src.transformers.components.openai_transformer; "
+            "sys.exit(1 if 'openai' in sys.modules else 0)"
+        )
+        repo_root = Path(__file__).resolve().parents[1]
+        assert subprocess.run([sys.executable, "-c", code], cwd=repo_root).returncode == 0
 
 
 class TestOpenAITransformerPromptConstruction:
@@ -86,12 +139,22 @@ class TestOpenAITransformerPromptConstruction:
         prompt = transformer._construct_prompt(sample_table, sample_context)
         assert sample_context in prompt
     
-    def test_construct_prompt_includes_instructions(self, transformer, sample_table, sample_context):
-        """Test prompt includes transformation instructions."""
-        prompt = transformer._construct_prompt(sample_table, sample_context)
-        assert "JSON" in prompt
-        assert "array" in prompt.lower()
-        assert "title" in prompt
+    def test_system_instructions_include_rules(self, transformer):
+        """Test transformation instructions live in the system message."""
+        instructions = transformer.SYSTEM_INSTRUCTIONS
+        assert "JSON" in instructions
+        assert "array" in instructions.lower()
+        assert "title" in instructions
+        assert '"contain_one_of": [' in instructions  # Example braces are literal
+    
+    def test_static_prefix_identical_across_tables(self, transformer, sample_table, sample_context):
+        """Test only the user message varies, so the instruction prefix can be cached."""
+        first = transformer._build_request(transformer._construct_prompt(sample_table, sample_context))
+        second = transformer._build_request(transformer._construct_prompt("| other |", "other context"))
+        assert first["messages"][0] == second["messages"][0]
+        assert first["messages"][0]["content"] == transformer.SYSTEM_INSTRUCTIONS
+        assert sample_table in first["messages"][1]["content"]
+        assert "expert" not in first["messages"][1]["content"]
 
 
 class TestOpenAITransformerAPICall:
@@ -102,19 +165,21 @@ class TestOpenAITransformerAPICall:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = '["test"]'
-        mock_response.usage.total_tokens = 100
+        mock_response.usage.prompt_tokens = 80
+        mock_response.usage.completion_tokens = 20
         
         with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
-            response, tokens = transformer._call_openai_with_retry("test prompt")
+            response, prompt_tokens, completion_tokens = transformer._call_openai_with_retry("test prompt")
             assert response == '["test"]'
-            assert tokens == 100
+            assert (prompt_tokens, completion_tokens) == (80, 20)
     
     def test_call_openai_retry_on_rate_limit(self, transformer):
         """Test retry logic on rate limit error."""
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = '["success"]'
-        mock_response.usage.total_tokens = 100
+        mock_response.usage.prompt_tokens = 80
+        mock_response.usage.completion_tokens = 20
         
         # Create properly structured RateLimitError
         mock_http_response = MagicMock()
@@ -132,16 +197,17 @@ class TestOpenAITransformerAPICall:
             side_effect=[rate_limit_error, mock_response]
         ):
             with patch('time.sleep'):  # Don't actually sleep in tests
-                response, tokens = transformer._call_openai_with_retry("test", max_retries=3)
+                response, prompt_tokens, completion_tokens = transformer._call_openai_with_retry("test", max_retries=3)
                 assert response == '["success"]'
-                assert tokens == 100
+                assert prompt_tokens + completion_tokens == 100
     
     def test_call_openai_retry_on_timeout(self, transformer):
         """Test retry logic on timeout error."""
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = '["success"]'
-        mock_response.usage.total_tokens = 100
+        mock_response.usage.prompt_tokens = 80
+        mock_response.usage.completion_tokens = 20
         
         # First call times out, second succeeds
         with patch.object(
@@ -150,7 +216,7 @@ class TestOpenAITransformerAPICall:
             side_effect=[APITimeoutError("Timeout"), mock_response]
         ):
             with patch('time.sleep'):
-                response, tokens = transformer._call_openai_with_retry("test", max_retries=3)
+                response, _, _ = transformer._call_openai_with_retry("test", max_retries=3)
                 assert response == '["success"]'
     
     def test_call_openai_max_retries_exceeded(self, transformer):
@@ -173,6 +239,56 @@ class TestOpenAITransformerAPICall:
                     transformer._call_openai_with_retry("test", max_retries=2)
 
 
+class TestRetryBackoff:
+    """Test retry wait selection."""
+    
+    @staticmethod
+    def rate_limit_error(headers):
+        import httpx
+        response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "https://api.openai.com/v1"))
+        return RateLimitError("Rate limit exceeded", response=response, body=None)
+    
+    def test_retry_after_header_honored(self, transformer):
+        """Test the server-requested delay is used instead of backoff."""
+        wait = transformer._retry_wait_time(self.rate_limit_error({"retry-after": "7"}), 0, 3, 1.0)
+        assert wait == 7.0
+    
+    def test_retry_after_ms_header_preferred(self, transformer):
+        """Test the millisecond header is more precise than the seconds one."""
+        error = self.rate_limit_error({"retry-after-ms": "1500", "retry-after": "2"})
+        assert transformer._retry_wait_time(error, 0, 3, 1.0) == 1.5
+    
+    def test_retry_after_capped(self, transformer):
+        """Test an excessive server delay is capped."""
+        wait = transformer._retry_wait_time(self.rate_limit_error({"retry-after": "3600"}), 0, 3, 1.0)
+        assert wait == transformer.RETRY_MAX_SECONDS
+    
+    def test_decorrelated_jitter_bounds(self, transformer):
+        """Test jittered waits stay between the base and 3x the previous wait, capped."""
+        error = APITimeoutError("Timeout")
+        for previous_wait in (1.0, 4.0, 20.0):
+            for _ in range(50):
+                wait = transformer._retry_wait_time(error, 0, 3, previous_wait)
+                assert transformer.RETRY_BASE_SECONDS <= wait <= min(previous_wait * 3, transformer.RETRY_MAX_SECONDS)
+    
+    def test_no_wait_after_last_attempt(self, transformer):
+        """Test retries are reported exhausted on the final attempt."""
+        assert transformer._retry_wait_time(APITimeoutError("Timeout"), 2, 3, 1.0) is None
+    
+    def test_sync_retry_sleeps_server_interval(self, transformer):
+        """Test the sync call sleeps exactly the Retry-After interval."""
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '["success"]'
+        mock_response.usage.prompt_tokens = 80
+        mock_response.usage.completion_tokens = 20
+        error = self.rate_limit_error({"retry-after": "3"})
+        with patch.object(transformer.client.chat.completions, 'create', side_effect=[error, mock_response]):
+            with patch('time.sleep') as mock_sleep:
+                transformer._call_openai_with_retry("test")
+        mock_sleep.assert_called_once_with(3.0)
+
+
 class TestOpenAITransformerJSONExtraction:
     """Test JSON extraction and validation."""
     
@@ -234,6 +350,18 @@ class TestOpenAITransformerJSONExtraction:
         with pytest.raises(ValueError, match="title"):
             transformer._extract_and_validate_json(response)
     
+    def test_validate_json_reports_failing_index(self, transformer):
+        """Test the error names the first invalid row."""
+        response = '[{"title": "a"}, {"title": "b"}, {"description": "c"}]'
+        with pytest.raises(ValueError, match="Object 2 missing"):
+            transformer._extract_and_validate_json(response)
+    
+    def test_validate_rows_accepts_dict_subclass(self, transformer):
+        """Test the fast type check still accepts mapping subclasses with a title."""
+        from collections import OrderedDict
+        rows = [OrderedDict(title="a")]
+        assert transformer._validate_rows(rows) == rows
+    
     def test_validate_json_non_dict_object(self, transformer):
         """Test error when array contains non-dict."""
         response = '["string", "another string"]'
@@ -241,28 +369,124 @@ class TestOpenAITransformerJSONExtraction:
             transformer._extract_and_validate_json(response)
 
 
+class TestFindJsonSpan:
+    """Test the linear JSON span scanner used by extraction."""
+    
+    def test_brackets_inside_strings_ignored(self, transformer):
+        """Test brackets and escaped quotes in string values don't end the span."""
+        data = [{"title": "Range [1-3] \"quoted\" }", "note": "{not json]"}]
+        result = transformer._extract_and_validate_json(json.dumps(data))
+        assert result == data
+    
+    def test_trailing_text_with_brackets(self, transformer, sample_json_array):
+        """Test text after the array (even with brackets) is not included."""
+        response = f"{json.dumps(sample_json_array)}\n\nNote: see [DMG p. 74] for details."
+        assert transformer._extract_and_validate_json(response) == sample_json_array
+    
+    def test_object_containing_array_wrapped(self, transformer):
+        """Test a single object is wrapped whole, not reduced to its inner array."""
+        single_object = {"title": "Test", "levels": [1, 2, 3]}
+        result = transformer._extract_and_validate_json(f"Result: {json.dumps(single_object)}")
+        assert result == [single_object]
+    
+    def test_unclosed_array_is_invalid(self, transformer):
+        """Test a truncated response reports invalid JSON."""
+        with pytest.raises(ValueError, match="Invalid JSON"):
+            transformer._extract_and_validate_json('[{"title": "Test"}, {"title": "Tru')
+    
+    def test_span_positions(self):
+        """Test span boundaries and array/object detection."""
+        from src.transformers.components.openai_transformer import _find_json_span
+        assert _find_json_span('x [1, [2]] y') == (2, 10, True)
+        assert _find_json_span('x {"a": [1]} [2]') == (2, 12, False)
+        assert _find_json_span('no json here') is None
+
+
+class TestJsonParserFallback:
+    """Test extraction gives the same results with and without orjson."""
+    
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_parse_with_and_without_orjson(self, transformer, sample_json_array, use_orjson):
+        """Test valid and malformed responses behave the same on both parsers."""
+        import src.transformers.components.openai_transformer as module
+        parser = module.orjson if use_orjson else None
+        with patch.object(module, 'orjson', parser):
+            assert transformer._extract_and_validate_json(json.dumps(sample_json_array)) == sample_json_array
+            with pytest.raises(ValueError, match="Invalid JSON"):
+                transformer._extract_and_validate_json('[{"title": "Test", "data": }]')
+
+
+class TestJsonMode:
+    """Test JSON mode requests and the {"rows": [...]} response shape."""
+    
+    def test_request_uses_json_mode(self, transformer):
+        """Test JSON mode is requested by default."""
+        request = transformer._build_request("prompt")
+        assert request["response_format"] == {"type": "json_object"}
+        assert '"rows"' in transformer.SYSTEM_INSTRUCTIONS
+    
+    def test_json_mode_can_be_disabled(self):
+        """Test models without JSON mode can still be used."""
+        transformer = OpenAITransformer(api_key="sk-test", json_mode=False)
+        assert "response_format" not in transformer._build_request("prompt")
+    
+    def test_rows_object_parsed_without_scanning(self, transformer, sample_json_array):
+        """Test a JSON mode response is parsed directly and unwrapped."""
+        with patch('src.transformers.components.openai_transformer._find_json_span') as mock_scan:
+            result = transformer._extract_and_validate_json(json.dumps({"rows": sample_json_array}))
+        assert result == sample_json_array
+        mock_scan.assert_not_called()
+    
+    def test_rows_object_in_code_block(self, transformer, sample_json_array):
+        """Test the rows object is also recognized when the model adds prose."""
+        response = f"Here you go:\n{json.dumps({'rows': sample_json_array})}"
+        assert transformer._extract_and_validate_json(response) == sample_json_array
+    
+    def test_empty_rows_rejected(self, transformer):
+        """Test an empty rows array is still an error."""
+        with pytest.raises(ValueError, match="empty"):
+            transformer._extract_and_validate_json('{"rows": []}')
+
+
 class TestOpenAITransformerCostCalculation:
     """Test cost calculation."""
     
     def test_calculate_cost_zero_tokens(self, transformer):
         """Test cost calculation with zero tokens."""
-        cost = transformer._calculate_cost(0)
+        cost = transformer._calculate_cost(0, 0)
         assert cost == 0.0
     
     def test_calculate_cost_100_tokens(self, transformer):
         """Test cost calculation with 100 tokens."""
-        cost = transformer._calculate_cost(100)
+        cost = transformer._calculate_cost(70, 30)
         # 70 input tokens: (70/1M) * 0.150 = 0.0000105
         # 30 output tokens: (30/1M) * 0.600 = 0.000018
-        # Total: ~0.0000285
-        assert cost > 0
-        assert cost < 0.0001
+        # Total: 0.0000285
+        assert cost == pytest.approx(0.0000285)
     
     def test_calculate_cost_1000_tokens(self, transformer):
         """Test cost calculation with 1000 tokens."""
-        cost = transformer._calculate_cost(1000)
+        cost = transformer._calculate_cost(950, 50)
         assert cost > 0
         assert cost < 0.001
+    
+    def test_calculate_cost_uses_exact_split(self, transformer):
+        """Test output tokens are priced higher than input tokens."""
+        assert transformer._calculate_cost(0, 1_000_000) == pytest.approx(transformer.PRICE_PER_1M_OUTPUT_TOKENS)
+        assert transformer._calculate_cost(1_000_000, 0) == pytest.approx(transformer.PRICE_PER_1M_INPUT_TOKENS)
+    
+    def test_transform_table_reports_exact_cost(self, transformer, sample_table, sample_context, sample_json_array):
+        """Test transform_table prices the usage the API reported."""
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = json.dumps(sample_json_array)
+        mock_response.usage.prompt_tokens = 1900
+        mock_response.usage.completion_tokens = 100
+        
+        with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
+            _, tokens, cost = transformer.transform_table(sample_table, sample_context)
+        assert tokens == 2000
+        assert cost == pytest.approx(transformer._calculate_cost(1900, 100))
 
 
 class TestOpenAITransformerIntegration:
@@ -273,7 +497,8 @@ class TestOpenAITransformerIntegration:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = json.dumps(sample_json_array)
-        mock_response.usage.total_tokens = 150
+        mock_response.usage.prompt_tokens = 120
+        mock_response.usage.completion_tokens = 30
         
         with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
             json_objects, tokens, cost = transformer.transform_table(sample_table, sample_context)
@@ -287,7 +512,8 @@ class TestOpenAITransformerIntegration:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = json.dumps(sample_json_array)
-        mock_response.usage.total_tokens = 150
+        mock_response.usage.prompt_tokens = 120
+        mock_response.usage.completion_tokens = 30
         
         mock_http_response = MagicMock()
         mock_http_response.status_code = 429
@@ -325,7 +551,8 @@ class TestOpenAITransformerIntegration:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = "Not valid JSON"
-        mock_response.usage.total_tokens = 100
+        mock_response.usage.prompt_tokens = 80
+        mock_response.usage.completion_tokens = 20
         
         with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
             with pytest.raises(ValueError, match="Failed to extract valid JSON"):
@@ -336,13 +563,567 @@ class TestOpenAITransformerIntegration:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = f"```json\n{json.dumps(sample_json_array)}\n```"
-        mock_response.usage.total_tokens = 150
+        mock_response.usage.prompt_tokens = 120
+        mock_response.usage.completion_tokens = 30
         
         with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
             json_objects, tokens, cost = transformer.transform_table(sample_table, sample_context)
             assert json_objects == sample_json_array
 
 
+class TestOpenAITransformerAsync:
+    """Test the async transformation path."""
+    
+    @staticmethod
+    def make_response(content, total_tokens=150):
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = content
+        mock_response.usage.prompt_tokens = total_tokens * 4 // 5
+        mock_response.usage.completion_tokens = total_tokens - total_tokens * 4 // 5
+        return mock_response
+    
+    def test_atransform_table_success(self, transformer, sample_table, sample_context, sample_json_array):
+        """Test async transformation returns the same tuple as the sync path."""
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(
+            return_value=self.make_response(json.dumps(sample_json_array))
+        )
+        json_objects, tokens, cost = asyncio.run(transformer.atransform_table(sample_table, sample_context))
+        assert json_objects == sample_json_array
+        assert tokens == 150
+        assert cost == transformer._calculate_cost(120, 30)
+    
+    def test_atransform_table_retries_without_blocking(self, transformer, sample_table, sample_context, sample_json_array):
+        """Test async retry waits with asyncio.sleep instead of time.sleep."""
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(
+            side_effect=[APITimeoutError("Timeout"), self.make_response(json.dumps(sample_json_array))]
+        )
+        with patch('asyncio.sleep', new=AsyncMock()) as mock_sleep, patch('time.sleep') as mock_time_sleep:
+            json_objects, _, _ = asyncio.run(transformer.atransform_table(sample_table, sample_context))
+        assert json_objects == sample_json_array
+        mock_sleep.assert_awaited_once()
+        mock_time_sleep.assert_not_called()
+    
+    def test_large_response_parsed_in_thread(self, transformer, sample_table, sample_context):
+        """Test long responses are parsed off the event loop, short ones inline."""
+        rows = [{"title": f"Row {i}", "description": "x" * 100} for i in range(100)]
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(side_effect=[
+            self.make_response(json.dumps(rows)),
+            self.make_response('[{"title": "Small"}]')
+        ])
+        with patch('asyncio.to_thread', wraps=asyncio.to_thread) as mock_to_thread:
+            json_objects, _, _ = asyncio.run(transformer.atransform_table(sample_table, sample_context))
+            assert json_objects == rows
+            assert mock_to_thread.call_count == 1
+            
+            json_objects, _, _ = asyncio.run(transformer.atransform_table(sample_table, "other"))
+            assert json_objects == [{"title": "Small"}]
+            assert mock_to_thread.call_count == 1
+    
+    def test_transform_tables_keeps_order_and_partial_failures(self, transformer):
+        """Test batch results line up with items and one failure doesn't abort the rest."""
+        def respond(**kwargs):
+            prompt = kwargs['messages'][1]['content']
+            if "BAD" in prompt:
+                return self.make_response("Not valid JSON")
+            label = "first" if "FIRST" in prompt else "second"
+            return self.make_response(json.dumps([{"title": label}]))
+        
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(side_effect=respond)
+        items = [("| FIRST |", "ctx"), ("| BAD |", "ctx"), ("| SECOND |", "ctx")]
+        results = asyncio.run(transformer.transform_tables(items, max_concurrent=2))
+        
+        assert len(results) == 3
+        assert results[0][0] == [{"title": "first"}]
+        assert isinstance(results[1], ValueError)
+        assert results[2][0] == [{"title": "second"}]
+    
+    def test_transform_tables_limits_concurrency(self, transformer):
+        """Test no more than max_concurrent requests are in flight at once."""
+        in_flight = 0
+        peak = 0
+        
+        async def respond(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return self.make_response('[{"title": "Test"}]')
+        
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = respond
+        results = asyncio.run(transformer.transform_tables([("| t |", "ctx")] * 6, max_concurrent=2))
+        
+        assert peak == 2
+        assert all(result[0] == [{"title": "Test"}] for result in results)
+
+
+class TestOpenAITransformerRateLimiting:
+    """Test client-side RPM/TPM gating of async calls."""
+    
+    def test_no_limiter_by_default(self, transformer):
+        """Test calls are not gated unless limits are given."""
+        assert transformer.rate_limiter is None
+    
+    def test_estimate_tokens_without_tiktoken(self, transformer):
+        """Test the length-based fallback estimate."""
+        with patch('src.transformers.components.openai_transformer.tiktoken', None):
+            estimate = transformer._estimate_tokens("x" * 400)
+        expected_prompt_tokens = (len(transformer.SYSTEM_INSTRUCTIONS) // 4 + 1) + (400 // 4 + 1)
+        assert estimate == expected_prompt_tokens + transformer.EXPECTED_OUTPUT_TOKENS
+    
+    def test_instructions_tokenized_once(self, transformer):
+        """Test only the per-table user message is encoded on each estimate."""
+        encoding = MagicMock()
+        encoding.encode.side_effect = lambda text: text.split()
+        transformer._encoding = encoding
+        
+        first = transformer._estimate_tokens("one two three")
+        second = transformer._estimate_tokens("four five")
+        
+        instruction_tokens = len(transformer.SYSTEM_INSTRUCTIONS.split())
+        assert first == instruction_tokens + 3 + transformer.EXPECTED_OUTPUT_TOKENS
+        assert second == instruction_tokens + 2 + transformer.EXPECTED_OUTPUT_TOKENS
+        encoded = [call.args[0] for call in encoding.encode.call_args_list]
+        assert encoded.count(transformer.SYSTEM_INSTRUCTIONS) == 1
+        assert len(encoded) == 3
+    
+    def test_async_call_reserves_and_records_usage(self, sample_json_array):
+        """Test each async call acquires from the limiter and reports actual tokens."""
+        transformer = OpenAITransformer(api_key="sk-test", requests_per_minute=100, tokens_per_minute=100000)
+        transformer._encoding = False  # Use the length-based estimate
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(
+            return_value=TestOpenAITransformerAsync.make_response(json.dumps(sample_json_array), 150)
+        )
+        
+        async def run():
+            return await transformer.transform_tables([("| a |", "ctx"), ("| b |", "ctx")])
+        
+        results = asyncio.run(run())
+        assert all(result[1] == 150 for result in results)
+        assert len(transformer.rate_limiter._entries) == 2
+        assert transformer.rate_limiter._tokens_in_window == 300
+
+
+class TestOpenAITransformerCache:
+    """Test the on-disk cache of transformed tables."""
+    
+    @pytest.fixture
+    def cached_transformer(self, tmp_path):
+        return OpenAITransformer(api_key="sk-test", cache_dir=str(tmp_path / "cache"))
+    
+    def test_repeat_table_served_from_cache(self, cached_transformer, sample_table, sample_context, sample_json_array):
+        """Test an identical table is only sent to the API once."""
+        mock_response = TestOpenAITransformerAsync.make_response(json.dumps(sample_json_array), 150)
+        with patch.object(cached_transformer.client.chat.completions, 'create', return_value=mock_response) as mock_create:
+            first = cached_transformer.transform_table(sample_table, sample_context)
+            second = cached_transformer.transform_table(sample_table, sample_context)
+        
+        assert mock_create.call_count == 1
+        assert first[0] == sample_json_array
+        assert second == (sample_json_array, 0, 0.0)
+    
+    def test_context_is_part_of_key(self, cached_transformer, sample_table, sample_json_array):
+        """Test the same table with different context is not a hit."""
+        mock_response = TestOpenAITransformerAsync.make_response(json.dumps(sample_json_array))
+        with patch.object(cached_transformer.client.chat.completions, 'create', return_value=mock_response) as mock_create:
+            cached_transformer.transform_table(sample_table, "Fighter levels")
+            cached_transformer.transform_table(sample_table, "Paladin levels")
+        assert mock_create.call_count == 2
+    
+    def test_invalid_response_not_cached(self, cached_transformer, sample_table, sample_context):
+        """Test failed extractions are retried on the next run."""
+        mock_response = TestOpenAITransformerAsync.make_response("Not valid JSON")
+        with patch.object(cached_transformer.client.chat.completions, 'create', return_value=mock_response) as mock_create:
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    cached_transformer.transform_table(sample_table, sample_context)
+        assert mock_create.call_count == 2
+    
+    def test_async_path_shares_cache(self, cached_transformer, sample_table, sample_context, sample_json_array):
+        """Test results from the sync path are reused by transform_tables()."""
+        mock_response = TestOpenAITransformerAsync.make_response(json.dumps(sample_json_array))
+        with patch.object(cached_transformer.client.chat.completions, 'create', return_value=mock_response):
+            cached_transformer.transform_table(sample_table, sample_context)
+        
+        cached_transformer.async_client = MagicMock()
+        cached_transformer.async_client.chat.completions.create = AsyncMock()
+        results = asyncio.run(cached_transformer.transform_tables([(sample_table, sample_context)]))
+        assert results == [(sample_json_array, 0, 0.0)]
+        cached_transformer.async_client.chat.completions.create.assert_not_called()
+
+
+class TestTransformTablesBatched:
+    """Test packing several tables into one request."""
+    
+    @staticmethod
+    def batch_responder(prompts, drop_table=None):
+        """Answer each batch with one row per table, titled by the table's marker cell."""
+        def respond(**kwargs):
+            prompt = kwargs['messages'][1]['content']
+            prompts.append(prompt)
+            sections = prompt.split("## Table ")[1:]
+            answer = {}
+            for section in sections:
+                number, body = section.split("\n", 1)
+                if number == drop_table:
+                    continue
+                marker = body.split("|")[1].strip()
+                answer[number] = [{"title": marker}]
+            return TestOpenAITransformerAsync.make_response(json.dumps(answer), 100 * len(sections))
+        return respond
+    
+    @pytest.fixture
+    def items(self):
+        return [(f"| T{i} |", f"context {i}") for i in range(5)]
+    
+    def test_results_dispatched_by_index(self, transformer, items):
+        """Test each table gets its own rows back, in input order."""
+        prompts = []
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(side_effect=self.batch_responder(prompts))
+        
+        results = asyncio.run(transformer.transform_tables_batched(items, max_tables_per_batch=2))
+        
+        assert len(prompts) == 3  # 2 + 2 + 1 tables
+        assert [result[0] for result in results] == [[{"title": f"T{i}"}] for i in range(5)]
+        assert sum(result[1] for result in results) == 500
+        assert sum(result[2] for result in results) == pytest.approx(transformer._calculate_cost(400, 100))
+    
+    def test_zero_max_concurrent_does_not_hang(self, transformer, items):
+        """Test max_concurrent=0 still sends requests, one at a time."""
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(side_effect=self.batch_responder([]))
+        
+        async def run():
+            return await asyncio.wait_for(
+                transformer.transform_tables_batched(items, max_tables_per_batch=2, max_concurrent=0), timeout=5
+            )
+        
+        results = asyncio.run(run())
+        assert [result[0] for result in results] == [[{"title": f"T{i}"}] for i in range(5)]
+    
+    def test_batches_share_system_prefix(self, transformer, items):
+        """Test batched requests keep the cached instruction prefix."""
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(side_effect=self.batch_responder([]))
+        asyncio.run(transformer.transform_tables_batched(items))
+        
+        request = transformer.async_client.chat.completions.create.call_args.kwargs
+        assert request["messages"][0]["content"] == transformer.SYSTEM_INSTRUCTIONS
+        assert '"1": [...]' in request["messages"][1]["content"]
+    
+    def test_token_budget_splits_batches(self, transformer, items):
+        """Test tables are packed greedily under the token budget."""
+        prompts = []
+        transformer._encoding = False
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(side_effect=self.batch_responder(prompts))
+        
+        per_table = transformer._count_tokens(items[0][0]) + transformer._count_tokens(items[0][1])
+        asyncio.run(transformer.transform_tables_batched(items, batch_token_budget=per_table * 3))
+        assert [prompt.count("## Table ") for prompt in prompts] == [3, 2]
+    
+    def test_missing_table_fails_only_that_item(self, transformer, items):
+        """Test a table left out of the response doesn't fail its batch-mates."""
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(
+            side_effect=self.batch_responder([], drop_table="2")
+        )
+        results = asyncio.run(transformer.transform_tables_batched(items[:3]))
+        
+        assert results[0][0] == [{"title": "T0"}]
+        assert isinstance(results[1], ValueError)
+        assert results[2][0] == [{"title": "T2"}]
+    
+    def test_failed_request_fails_its_batch(self, transformer, items):
+        """Test an unparseable response is reported for every table in the batch."""
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(
+            return_value=TestOpenAITransformerAsync.make_response("Not valid JSON")
+        )
+        results = asyncio.run(transformer.transform_tables_batched(items[:2]))
+        assert all(isinstance(result, ValueError) for result in results)
+    
+    def test_cached_tables_not_sent(self, tmp_path, items):
+        """Test cached tables are skipped and batched results are cached per table."""
+        transformer = OpenAITransformer(api_key="sk-test", cache_dir=str(tmp_path))
+        prompts = []
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(side_effect=self.batch_responder(prompts))
+        
+        asyncio.run(transformer.transform_tables_batched(items[:2]))
+        results = asyncio.run(transformer.transform_tables_batched(items[:3]))
+        
+        assert len(prompts) == 2
+        assert prompts[1].count("## Table ") == 1 and "| T2 |" in prompts[1]
+        assert results[0] == ([{"title": "T0"}], 0, 0.0)
+        
+        with patch.object(transformer.client.chat.completions, 'create') as mock_create:
+            assert transformer.transform_table(*items[1])[0] == [{"title": "T1"}]
+        mock_create.assert_not_called()
+
+
+class TestTransformTablesBatchApi:
+    """Test submitting tables through the OpenAI Batch API."""
+    
+    @staticmethod
+    def _output_line(index, content, prompt_tokens=100, completion_tokens=50):
+        return json.dumps({
+            "custom_id": f"table_{index}",
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "choices": [{"message": {"content": content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+                }
+            },
+            "error": None
+        })
+    
+    def _mock_client(self, transformer, output_lines, error_lines=(), statuses=("completed",)):
+        client = MagicMock()
+        client.files.create.return_value.id = "file-in"
+        batches = []
+        for status in ("validating",) + tuple(statuses):
+            batch = MagicMock(id="batch-1", status=status, output_file_id="file-out",
+                              error_file_id="file-err" if error_lines else None)
+            batches.append(batch)
+        client.batches.create.return_value = batches[0]
+        client.batches.retrieve.side_effect = batches[1:]
+        contents = {"file-out": "\n".join(output_lines), "file-err": "\n".join(error_lines)}
+        client.files.content.side_effect = lambda file_id: MagicMock(text=contents[file_id])
+        transformer.client = client
+        return client
+    
+    def test_results_mapped_back_by_custom_id(self, transformer):
+        """Test output lines (in any order) are matched to their tables."""
+        client = self._mock_client(transformer, [
+            self._output_line(1, '{"rows": [{"title": "B"}]}'),
+            self._output_line(0, '{"rows": [{"title": "A"}]}'),
+        ], statuses=("in_progress", "completed"))
+        
+        with patch("src.transformers.components.openai_transformer.time.sleep") as sleep:
+            results = transformer.transform_tables_batch_api([("| a |", "ctx a"), ("| b |", "ctx b")])
+        
+        assert [r[0][0]["title"] for r in results] == ["A", "B"]
+        assert results[0][1] == 150
+        assert sleep.call_count == 2
+        
+        upload = client.files.create.call_args.kwargs
+        assert upload["purpose"] == "batch"
+        requests = [json.loads(line) for line in upload["file"][1].decode("utf-8").splitlines()]
+        assert [r["custom_id"] for r in requests] == ["table_0", "table_1"]
+        assert requests[0]["url"] == "/v1/chat/completions"
+        assert requests[0]["body"]["messages"][0]["content"] == transformer.SYSTEM_INSTRUCTIONS
+        client.batches.create.assert_called_once_with(
+            input_file_id="file-in", endpoint="/v1/chat/completions", completion_window="24h"
+        )
+    
+    def test_batch_results_cost_half(self, transformer):
+        """Test Batch API results are priced at the discounted rate."""
+        self._mock_client(transformer, [self._output_line(0, '{"rows": [{"title": "A"}]}', 1000, 1000)])
+        
+        with patch("src.transformers.components.openai_transformer.time.sleep"):
+            [(_, _, cost)] = transformer.transform_tables_batch_api([("| a |", "ctx")])
+        
+        assert cost == pytest.approx(transformer._calculate_cost(1000, 1000) / 2)
+    
+    def test_failed_and_missing_tables_become_exceptions(self, transformer):
+        """Test errored, invalid and missing results don't affect the other tables."""
+        error_line = json.dumps({
+            "custom_id": "table_1",
+            "response": {"status_code": 500, "body": {"error": {"message": "server error"}}},
+            "error": None
+        })
+        self._mock_client(transformer, [
+            self._output_line(0, '{"rows": [{"title": "A"}]}'),
+            self._output_line(2, 'not json'),
+        ], error_lines=[error_line])
+        
+        with patch("src.transformers.components.openai_transformer.time.sleep"):
+            results = transformer.transform_tables_batch_api([("| a |", ""), ("| b |", ""), ("| c |", ""), ("| d |", "")])
+        
+        assert results[0][0] == [{"title": "A"}]
+        assert isinstance(results[1], RuntimeError) and "server error" in str(results[1])
+        assert isinstance(results[2], ValueError)
+        assert isinstance(results[3], RuntimeError)
+    
+    def test_cached_tables_not_submitted(self, tmp_path):
+        """Test cache hits are served locally and nothing is submitted."""
+        transformer = OpenAITransformer(api_key="sk-test", cache_dir=str(tmp_path / "cache"))
+        cache_key, _ = transformer._check_cache(transformer._construct_prompt("| a |", "ctx"))
+        transformer.response_cache.set(cache_key, [{"title": "Cached"}])
+        client = self._mock_client(transformer, [])
+        
+        results = transformer.transform_tables_batch_api([("| a |", "ctx")])
+        
+        assert results == [([{"title": "Cached"}], 0, 0.0)]
+        client.files.create.assert_not_called()
+
+
+class TestTransformTableStream:
+    """Test streaming row-by-row transformation."""
+    
+    class FakeStream:
+        """Async iterable of chunks with the AsyncStream close() method."""
+        
+        def __init__(self, chunks):
+            self.chunks = chunks
+            self.delivered = 0
+            self.closed = False
+        
+        async def __aiter__(self):
+            for chunk in self.chunks:
+                self.delivered += 1
+                yield chunk
+        
+        async def close(self):
+            self.closed = True
+    
+    @classmethod
+    def stream_of(cls, text, piece_size=7, total_tokens=150, finish_reason="stop"):
+        """Fake streamed completion: content deltas, then a usage-only chunk."""
+        chunks = []
+        for start in range(0, len(text), piece_size):
+            chunk = MagicMock()
+            chunk.usage = None
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = text[start:start + piece_size]
+            chunk.choices[0].finish_reason = None
+            chunks.append(chunk)
+        if chunks:
+            chunks[-1].choices[0].finish_reason = finish_reason
+        final = MagicMock()
+        final.choices = []
+        final.usage.prompt_tokens = total_tokens * 4 // 5
+        final.usage.completion_tokens = total_tokens - total_tokens * 4 // 5
+        chunks.append(final)
+        return cls.FakeStream(chunks)
+    
+    @pytest.mark.parametrize("piece_size", [1, 5, 1000])
+    def test_parser_emits_rows_across_chunk_boundaries(self, piece_size, sample_json_array):
+        """Test rows are found however the text is split, for both response shapes."""
+        from src.transformers.components.openai_transformer import _StreamingRowParser
+        tricky = [{"title": "Row {1}", "note": "a \"quoted\" ] } value", "levels": [1, {"x": 2}]}]
+        for rows in (sample_json_array, tricky):
+            for text in (json.dumps({"rows": rows}), "Here:\n```json\n" + json.dumps(rows) + "\n```"):
+                parser = _StreamingRowParser()
+                emitted = []
+                for start in range(0, len(text), piece_size):
+                    emitted.extend(parser.feed(text[start:start + piece_size]))
+                assert [json.loads(row) for row in emitted] == rows
+    
+    def test_rows_yielded_before_stream_ends(self, transformer, sample_table, sample_context, sample_json_array):
+        """Test the first row is available before the response is complete."""
+        text = json.dumps({"rows": sample_json_array})
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(return_value=self.stream_of(text))
+        usage = []
+        
+        async def run():
+            rows = []
+            async for row in transformer.transform_table_stream(sample_table, sample_context, on_usage=lambda *u: usage.append(u)):
+                rows.append(row)
+                if len(rows) == 1:
+                    assert usage == []  # Still streaming
+            return rows
+        
+        assert asyncio.run(run()) == sample_json_array
+        assert usage == [(150, transformer._calculate_cost(120, 30))]
+        request = transformer.async_client.chat.completions.create.call_args.kwargs
+        assert request["stream"] is True
+        assert request["stream_options"] == {"include_usage": True}
+    
+    def test_row_without_title_raises(self, transformer, sample_table, sample_context):
+        """Test rows are validated as they arrive, closing the stream early."""
+        text = json.dumps({"rows": [{"title": "ok"}, {"description": "no title"}, {"title": "later"}]})
+        stream = self.stream_of(text)
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(return_value=stream)
+        
+        async def run():
+            return [row async for row in transformer.transform_table_stream(sample_table, sample_context)]
+        
+        with pytest.raises(ValueError, match="title"):
+            asyncio.run(run())
+        assert stream.closed
+        assert stream.delivered < len(stream.chunks)
+    
+    @pytest.mark.parametrize("text, finish_reason", [
+        ('{"rows": [{"title": "a"}, {"title": "b"}, {"title"', "length"),
+        ('{"rows": [{"title": "a"}, {"title": "b"}', "stop"),
+    ])
+    def test_truncated_response_raises(self, transformer, sample_table, sample_context, text, finish_reason):
+        """Test a response cut off mid-JSON is not accepted as a complete table."""
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(
+            return_value=self.stream_of(text, finish_reason=finish_reason)
+        )
+        
+        async def run():
+            return [row async for row in transformer.transform_table_stream(sample_table, sample_context)]
+        
+        with pytest.raises(ValueError, match="truncated after 2 rows"):
+            asyncio.run(run())
+    
+    def test_no_rows_raises(self, transformer, sample_table, sample_context):
+        """Test a response without rows is an error."""
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(return_value=self.stream_of("Not valid JSON"))
+        
+        async def run():
+            return [row async for row in transformer.transform_table_stream(sample_table, sample_context)]
+        
+        with pytest.raises(ValueError, match="no rows"):
+            asyncio.run(run())
+    
+    def test_stream_uses_and_fills_cache(self, tmp_path, sample_table, sample_context, sample_json_array):
+        """Test streamed results are cached and replayed without an API call."""
+        transformer = OpenAITransformer(api_key="sk-test", cache_dir=str(tmp_path))
+        transformer.async_client = MagicMock()
+        transformer.async_client.chat.completions.create = AsyncMock(
+            return_value=self.stream_of(json.dumps({"rows": sample_json_array}))
+        )
+        
+        async def run():
+            return [row async for row in transformer.transform_table_stream(sample_table, sample_context)]
+        
+        assert asyncio.run(run()) == sample_json_array
+        assert asyncio.run(run()) == sample_json_array
+        assert transformer.async_client.chat.completions.create.await_count == 1
+
+
+class TestOpenAITransformerLogging:
+    """Test per-table logging stays cheap at INFO level."""
+    
+    def test_prompt_not_logged_at_info(self, transformer, sample_table, sample_context, sample_json_array, caplog):
+        """Test INFO output is one summary line, without the prompt or response."""
+        mock_response = TestOpenAITransformerAsync.make_response(json.dumps(sample_json_array), 150)
+        with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
+            with caplog.at_level("INFO", logger="src.transformers.components.openai_transformer"):
+                transformer.transform_table(sample_table, sample_context)
+        
+        messages = [record.getMessage() for record in caplog.records]
+        assert messages == ["Transformed table: 2 rows, 150 tokens"]
+    
+    def test_prompt_logged_at_debug(self, transformer, sample_table, sample_context, sample_json_array, caplog):
+        """Test the full prompt and response are still available when debugging."""
+        mock_response = TestOpenAITransformerAsync.make_response(json.dumps(sample_json_array), 150)
+        with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
+            with caplog.at_level("DEBUG", logger="src.transformers.components.openai_transformer"):
+                transformer.transform_table(sample_table, sample_context)
+        
+        assert any(sample_table in record.getMessage() for record in caplog.records)
+        assert any("Fighter XP Table for Level 2" in record.getMessage() for record in caplog.records)
+
+
 class TestOpenAITransformerEdgeCases:
     """Test edge cases and error handling."""
     
@@ -351,7 +1132,8 @@ class TestOpenAITransformerEdgeCases:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = '[{"title": "Empty", "data": null}]'
-        mock_response.usage.total_tokens = 50
+        mock_response.usage.prompt_tokens = 40
+        mock_response.usage.completion_tokens = 10
         
         with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
             json_objects, tokens, cost = transformer.transform_table("", sample_context)
@@ -362,7 +1144,8 @@ class TestOpenAITransformerEdgeCases:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = '[{"title": "Test", "data": 123}]'
-        mock_response.usage.total_tokens = 50
+        mock_response.usage.prompt_tokens = 40
+        mock_response.usage.completion_tokens = 10
         
         with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
             json_objects, tokens, cost = transformer.transform_table(sample_table, "")
@@ -373,7 +1156,8 @@ class TestOpenAITransformerEdgeCases:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = '[{"title": "Test", "data": 123}]'
-        mock_response.usage.total_tokens = 100000  # Large token count
+        mock_response.usage.prompt_tokens = 80000  # Large token count
+        mock_response.usage.completion_tokens = 20000
         
         with patch.object(transformer.client.chat.completions, 'create', return_value=mock_response):
             json_objects, tokens, cost = transformer.transform_table(sample_table, sample_context)
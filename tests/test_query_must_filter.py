@@ -5,13 +5,19 @@ Unit tests for query_must_filter module.
 Tests all operators and edge cases for post-retrieval filtering.
 """
 
+import json
 import pytest
+from src.query import query_must_filter
 from src.query.query_must_filter import (
     validate_contain_one_of,
     validate_contain_all_of,
     validate_contain,
     validate_contain_range,
-    satisfies_query_must
+    satisfies_query_must,
+    parse_query_must,
+    compile_query_must,
+    compile_query_must_json,
+    filter_chunks
 )
 
 
@@ -208,6 +214,13 @@ class TestValidateContainRange:
         query = "anything"
         query_must = {}
         assert validate_contain_range(query, query_must) == True
+    
+    def test_same_query_many_ranges(self):
+        """Repeated checks of one query (cached numbers) stay independent per range."""
+        query = "intelligence 12 and wisdom 17"
+        assert validate_contain_range(query, {"contain_range": {"min": 10, "max": 13}}) == True
+        assert validate_contain_range(query, {"contain_range": {"min": 14, "max": 17}}) == True
+        assert validate_contain_range(query, {"contain_range": {"min": 18, "max": 19}}) == False
 
 
 class TestSatisfiesQueryMust:
@@ -295,5 +308,142 @@ class TestSatisfiesQueryMust:
         assert satisfies_query_must(query, query_must) == True
 
 
+
+class TestParseQueryMust:
+    """Tests for cached query_must JSON parsing."""
+    
+    def test_parses_json_string(self):
+        """Valid JSON should parse to the query_must dict."""
+        query_must = parse_query_must('{"contain": "psionic"}')
+        assert query_must == {"contain": "psionic"}
+    
+    def test_identical_strings_share_result(self):
+        """Identical strings should hit the cache and return the same object."""
+        first = parse_query_must('{"contain_range": {"min": 10, "max": 13}}')
+        second = parse_query_must('{"contain_range": {"min": 10, "max": 13}}')
+        assert first is second
+    
+    def test_malformed_json_raises_decode_error(self):
+        """Malformed JSON should raise json.JSONDecodeError (caller fails open)."""
+        with pytest.raises(json.JSONDecodeError):
+            parse_query_must('{"contain": ')
+
+
+class TestCompileQueryMust:
+    """Tests for query_must predicate compilation."""
+    
+    def test_word_terms_collected(self):
+        """Predicates expose the lowercased whole-word terms they check."""
+        predicate = compile_query_must({
+            "contain_one_of": [["Cleric"], ["AC 6"]],
+            "contain_all_of": ["armor"],
+            "contain": "level"
+        })
+        assert predicate.word_terms == {"cleric", "ac 6", "armor"}
+    
+    def test_no_restrictions_always_pass(self):
+        """Empty specs compile to a predicate that accepts everything."""
+        predicate = compile_query_must(None)
+        assert predicate(lambda term: False, lambda term: False, ()) == True
+        assert compile_query_must({}).word_terms == frozenset()
+    
+    def test_json_compiled_once(self):
+        """Identical JSON strings share one compiled predicate."""
+        first = compile_query_must_json('{"contain": "owlbear"}')
+        assert first is compile_query_must_json('{"contain": "owlbear"}')
+    
+    def test_predicates_accepted_by_filter_chunks(self):
+        """filter_chunks gives the same verdicts for specs and compiled predicates."""
+        query = "What does a 7th level cleric need to roll to hit armor class 6?"
+        specs = TestFilterChunks.QUERY_MUSTS
+        compiled = [compile_query_must(qm) for qm in specs]
+        assert filter_chunks(query, compiled) == filter_chunks(query, specs)
+
+
+class TestHasWord:
+    """The str.find fast path must agree with the word-boundary regex."""
+    
+    @pytest.mark.parametrize("query,term", [
+        ("7th level cleric", "cleric"),
+        ("clerics and fighters", "cleric"),
+        ("the owlbear attacks", "bear"),
+        ("x_cleric", "cleric"),
+        ("cleric_x", "cleric"),
+        ("bear", "bear"),
+        ("bear bear-like bearded", "bear"),
+        ("armor class 6 or armor class 60", "armor class 6"),
+        ("armor class 60", "armor class 6"),
+        ("a.c. 6 please", "a.c. 6"),
+        ("ac 6", "a.c. 6"),
+        ("", "cleric"),
+    ])
+    def test_matches_regex(self, query, term):
+        expected = bool(query_must_filter._compiled_boundary(term).search(query))
+        assert query_must_filter._has_word(query, term) == expected
+
+
+class TestFilterChunks:
+    """Tests for batch query_must validation."""
+    
+    QUERY_MUSTS = [
+        None,
+        {},
+        {"contain_one_of": [["cleric", "clerics"], ["armor class 6", "ac 6"]]},
+        {"contain_one_of": [["fighter"], ["ac 6"]]},
+        {"contain_all_of": ["cleric", "armor"]},
+        {"contain": "gold dragon"},
+        {"contain": "level"},
+        {"contain_range": {"min": 5, "max": 8}},
+        {"contain_range": {"min": 10, "max": 13}},
+        {"contain_one_of": [[]]},
+    ]
+    
+    @pytest.mark.parametrize("query", [
+        "What does a 7th level cleric need to roll to hit armor class 6?",
+        "tell me about gold dragons",
+        "",
+    ])
+    def test_matches_single_checks(self, query):
+        """Batch verdicts equal satisfies_query_must per chunk."""
+        expected = [satisfies_query_must(query, qm) for qm in self.QUERY_MUSTS]
+        assert filter_chunks(query, self.QUERY_MUSTS) == expected
+    
+    def test_matches_single_checks_without_automaton(self, monkeypatch):
+        """Regex fallback gives the same verdicts."""
+        monkeypatch.setattr(query_must_filter, "ahocorasick", None)
+        query = "What does a 7th level cleric need to roll to hit armor class 6?"
+        expected = [satisfies_query_must(query, qm) for qm in self.QUERY_MUSTS]
+        assert filter_chunks(query, self.QUERY_MUSTS) == expected
+    
+    def test_empty_batch(self):
+        """No chunks yields no verdicts."""
+        assert filter_chunks("anything", []) == []
+
+
+@pytest.mark.skipif(query_must_filter.ahocorasick is None, reason="pyahocorasick not installed")
+class TestAhoCorasickScan:
+    """The optional automaton scan must agree with the per-term regex path."""
+    
+    CASES = [
+        ("7th level cleric attacking armor class 6", {"contain_one_of": [["cleric"], ["armor class 6", "ac 6"]]}),
+        ("tell me about the owlbear", {"contain_one_of": [["bear", "bears"]]}),
+        ("what does a cleric need to hit a.c. 6?", {"contain_one_of": [["cleric"], ["a.c. 6"]]}),
+        ("psionic blast attack", {"contain_all_of": ["psionic", "attack"]}),
+        ("psionic defense", {"contain_all_of": ["psionic", "attack"]}),
+        ("CLERIC clerics", {"contain_all_of": ["Cleric", "clerics"]}),
+        ("anything", {"contain_one_of": [[]]}),
+    ]
+    
+    @pytest.mark.parametrize("query,query_must", CASES)
+    def test_matches_regex_path(self, monkeypatch, query, query_must):
+        """Automaton and regex paths return the same verdict."""
+        with_automaton = (validate_contain_one_of(query, query_must),
+                          validate_contain_all_of(query, query_must))
+        monkeypatch.setattr(query_must_filter, "ahocorasick", None)
+        without_automaton = (validate_contain_one_of(query, query_must),
+                             validate_contain_all_of(query, query_must))
+        assert with_automaton == without_automaton
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
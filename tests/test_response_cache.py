@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Unit tests for ResponseCache."""
+
+import pytest
+import tempfile
+import threading
+from src.utils.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test file-based response caching."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create temporary directory for cache entries."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+    
+    def test_miss_returns_none(self, temp_dir):
+        """Unknown keys are a miss."""
+        cache = ResponseCache(temp_dir)
+        assert cache.get(ResponseCache.make_key("nothing")) is None
+    
+    def test_set_then_get(self, temp_dir):
+        """Stored values round-trip."""
+        cache = ResponseCache(temp_dir)
+        key = ResponseCache.make_key("gpt-4o-mini", "prompt")
+        cache.set(key, {"content": "answer", "usage": {"total_tokens": 5}})
+        assert cache.get(key) == {"content": "answer", "usage": {"total_tokens": 5}}
+    
+    def test_persists_across_instances(self, temp_dir):
+        """Entries survive a new cache instance on the same directory."""
+        key = ResponseCache.make_key("a")
+        ResponseCache(temp_dir).set(key, [1, 2, 3])
+        assert ResponseCache(temp_dir).get(key) == [1, 2, 3]
+    
+    def test_key_depends_on_part_boundaries(self):
+        """Keys differ when the same characters are split differently."""
+        assert ResponseCache.make_key("ab", "c") != ResponseCache.make_key("a", "bc")
+    
+    def test_corrupt_entry_is_a_miss(self, temp_dir):
+        """Unreadable entries are treated as misses."""
+        cache = ResponseCache(temp_dir)
+        key = ResponseCache.make_key("x")
+        (cache.cache_dir / f"{key}.json").write_text("{not json")
+        assert cache.get(key) is None
+    
+    def test_concurrent_writes_to_same_key(self, temp_dir):
+        """Threads writing one key don't collide on a shared temporary file."""
+        cache = ResponseCache(temp_dir)
+        key = ResponseCache.make_key("same question")
+        errors = []
+        
+        def write(thread_number):
+            try:
+                for i in range(50):
+                    cache.set(key, {"thread": thread_number, "write": i})
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert cache.get(key)["write"] == 49
+        assert not list(cache.cache_dir.glob("*.tmp"))
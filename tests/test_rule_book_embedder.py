@@ -252,7 +252,7 @@ class TestRuleBookEmbedder:
         mock_collection = MagicMock()
         mock_chroma_instance = MagicMock()
         mock_chroma_instance.get_or_create_collection.return_value = mock_collection
-        mock_chroma.return_value = mock_chroma_instance
+        mock_chroma.get_instance.return_value = mock_chroma_instance
 
         mock_openai_instance = MagicMock()
         mock_response = MagicMock()
@@ -78,6 +78,17 @@ class TestTableListParserRecordSplitting:
         records = parser._split_records(content)
         assert len(records) == 2
 
+    def test_split_records_returns_offsets(self):
+        """Should return offsets into content that parse without slicing."""
+        parser = TableListParser(SAMPLE_LIST)
+        content = "  \n### Table A\n**Location**: Lines 1-4\n---\n### Table B\n**Location**: Lines 8-9\n"
+        spans = parser._split_records(content)
+        
+        assert content[spans[0][0]:spans[0][1]].startswith("### Table A")
+        record = parser._parse_single_record(content, *spans[1])
+        assert (record.start_line, record.end_line) == (8, 9)
+        assert record.description == "Table B"
+
 
 class TestTableListParserLineNumberExtraction:
     """Test line number extraction from location fields."""
@@ -229,6 +240,20 @@ class TestTableListParserFullParsing:
         records = parser.parse_table_list()
         assert len(records) == 0
 
+    def test_parse_table_list_utf8(self, tmp_path):
+        """Should decode non-ASCII descriptions from the memory-mapped file."""
+        table_list = tmp_path / "tables.md"
+        table_list.write_text(
+            "### Table 1: Élan Modifiers — Dwarves\n**Location**: Lines 1-4\n"
+            "\n---\n   \n---\n"
+            "### Table 2: Ogre Strength\n**Location**: Lines 9-12\n",
+            encoding="utf-8"
+        )
+        records = TableListParser(table_list).parse_table_list()
+        
+        assert [(r.start_line, r.end_line) for r in records] == [(1, 4), (9, 12)]
+        assert records[0].description == "Table 1: Élan Modifiers — Dwarves"
+
     def test_parse_table_list_ordering(self):
         """Should preserve order of tables from file."""
         parser = TableListParser(SAMPLE_LIST)
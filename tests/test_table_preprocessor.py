@@ -259,6 +259,59 @@ class TestTablePreprocessorFullPreprocessing:
         assert stats['lines_processed'] == 3
 
 
+    def test_single_pass_matches_reference(self):
+        """Single-pass preprocessing should match the per-line helper methods."""
+        table = "\n".join([
+            "|   Name   | :----: |  Notes |",
+            "|:---------|--------:| ------ |",
+            "| Fighter  |        |\tTab\t|",
+            "",
+            "no pipes ---",
+            "| --- not closed",
+            "   |   |---|   ",
+            "|",
+        ])
+        fast, fast_stats = TablePreprocessor().preprocess_table(table)
+        reference, reference_stats = TablePreprocessor(single_pass=False).preprocess_table(table)
+        
+        assert fast == reference
+        assert fast_stats == reference_stats
+        for path in (PADDED_TABLE, MINIMAL_TABLE, EMPTY_CELLS_TABLE):
+            table = path.read_text()
+            assert (TablePreprocessor().preprocess_table(table)
+                    == TablePreprocessor(single_pass=False).preprocess_table(table))
+
+    def test_single_pass_without_numba(self, monkeypatch):
+        """Pure-Python single pass should match the reference when numba is missing."""
+        from src.transformers.components import table_preprocessor
+        monkeypatch.setattr(table_preprocessor, "compress_table_text", None)
+        table = "|  A  |  B  |\n|-----|:---:|\n|  1  |     |"
+        assert (TablePreprocessor().preprocess_table(table)
+                == TablePreprocessor(single_pass=False).preprocess_table(table))
+
+    def test_numba_kernel_matches_reference(self):
+        """Compiled kernel should match the reference on varied input."""
+        pytest.importorskip("numba")
+        from src.transformers.components._table_preproc_numba import compress_table_text
+        reference = TablePreprocessor(single_pass=False)
+        tables = [
+            "",
+            "|",
+            "\n\n",
+            "no pipes ---",
+            "  | a |  b  |\t",
+            "|---|  |  --- |\n| :--: |",
+            "|\x0b x \x1c| y\r|\n|   |---|   \n",
+        ]
+        for table in tables:
+            assert compress_table_text(table) == reference.preprocess_table(table)[0]
+
+    def test_non_ascii_table_uses_python_path(self):
+        """Non-ASCII whitespace should be stripped like str.strip() does."""
+        table = "|\u00a0Caf\u00e9\u00a0|   B   |\n|-------|-------|"
+        preprocessed, _ = TablePreprocessor().preprocess_table(table)
+        assert preprocessed == "| Caf\u00e9 | B |\n|---|---|"
+
 class TestTablePreprocessorTokenSavings:
     """Test token savings calculations."""
 
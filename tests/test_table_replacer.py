@@ -98,6 +98,16 @@ class TestTableReplacerHeadingLevelExtraction:
         replacer = TableReplacer(["Not a heading"])
         assert replacer._get_heading_level("Not a heading") is None
     
+    def test_get_heading_level_requires_whitespace_and_max_six(self):
+        """Test headings need 1-6 '#' followed by whitespace."""
+        replacer = TableReplacer([])
+        assert replacer._get_heading_level("###### Six") == 6
+        assert replacer._get_heading_level("  ##\tIndented") == 2
+        assert replacer._get_heading_level("####### Seven") is None
+        assert replacer._get_heading_level("#NoSpace") is None
+        assert replacer._get_heading_level("## ") is None
+        assert replacer._get_heading_level("#") is None
+    
     def test_extract_heading_level_from_context(self, sample_markdown_lines):
         """Test extracting heading level from context."""
         replacer = TableReplacer(sample_markdown_lines)
@@ -111,6 +121,22 @@ class TestTableReplacerHeadingLevelExtraction:
         replacer = TableReplacer(lines)
         level = replacer.extract_heading_level_from_context(2)
         assert level == 4  # Default
+    
+    def test_extract_heading_level_for_many_tables(self):
+        """Test each table gets its nearest preceding heading, including after replacements."""
+        lines = ["# Top", "| A |", "## Mid", "text", "| B |", "#### Deep", "| C |", "| D |"]
+        replacer = TableReplacer(lines)
+        
+        assert replacer.extract_heading_level_from_context(2) == 1
+        assert replacer.extract_heading_level_from_context(3) == 1
+        assert replacer.extract_heading_level_from_context(5) == 2
+        assert replacer.extract_heading_level_from_context(8) == 4
+        assert replacer.extract_heading_level_from_context(1) == 4  # Nothing before line 1
+        
+        # Replacing a table shifts later lines; the index is rebuilt
+        replacer.replace_table_with_json_rows(2, 2, [{"title": "Row"}], heading_level=2)
+        replacer.get_transformed_lines()
+        assert replacer.extract_heading_level_from_context(5) == 2  # "## Row" at line 2
 
 
 class TestTableReplacerHeadingAndJsonBlockCreation:
@@ -145,6 +171,24 @@ class TestTableReplacerHeadingAndJsonBlockCreation:
         lines = replacer._create_heading_and_json_block(json_obj, heading_level=6)
         assert lines[0] == "###### Test"
     
+    def test_json_encoding_matches_stdlib(self, monkeypatch):
+        """Test the orjson path produces the same text as json.dumps(indent=2)."""
+        from src.transformers.components import table_replacer
+        replacer = TableReplacer([])
+        json_obj = {"title": "Élan — Test", "nested": {"a": [1, 2.5]}, "empty": [], "none": {}}
+        expected = json.dumps(json_obj, indent=2, ensure_ascii=False)
+        
+        assert replacer._encode_json(json_obj) == expected
+        assert replacer._encode_json({1: "int key"}) == json.dumps({1: "int key"}, indent=2)
+        monkeypatch.setattr(table_replacer, "orjson", None)
+        assert replacer._encode_json(json_obj) == expected
+    
+    def test_json_encoding_float_spelling_round_trips(self):
+        """Test float spelling may differ from json.dumps but decodes to the same values."""
+        replacer = TableReplacer([])
+        json_obj = {"weight": 0.00001, "cost": 1e20, "ratio": 1 / 3}
+        assert json.loads(replacer._encode_json(json_obj)) == json_obj
+    
     def test_json_block_formatting(self):
         """Test JSON is properly formatted in code block."""
         replacer = TableReplacer([])
@@ -282,6 +326,37 @@ class TestTableReplacerMultipleTables:
         assert "| T1 C1 | T1 C2 |" not in result_str
         assert "| T2 C1 | T2 C2 |" not in result_str
 
+    
+    def test_replace_multiple_tables_any_order(self):
+        """Test queued replacements use original line numbers regardless of order."""
+        lines = ["# Doc", "| A |", "|---|", "| 1 |", "Middle", "| B |", "|---|", "| 2 |", "End"]
+        json1 = [{"title": "First"}]
+        json2 = [{"title": "Second"}, {"title": "Third"}]
+        
+        forward = TableReplacer(lines)
+        forward.replace_table_with_json_rows(2, 4, json1, heading_level=2)
+        forward.replace_table_with_json_rows(6, 8, json2, heading_level=2)
+        
+        reverse = TableReplacer(lines)
+        reverse.replace_table_with_json_rows(6, 8, json2, heading_level=2)
+        reverse.replace_table_with_json_rows(2, 4, json1, heading_level=2)
+        
+        result = forward.get_transformed_lines()
+        assert result == reverse.get_transformed_lines()
+        assert result[0] == "# Doc"
+        assert result[1] == "## First"
+        assert "Middle" in result
+        assert result[-1] == "End"
+        assert not any(line.startswith("|") for line in result)
+    
+    def test_overlapping_replacements_raise(self):
+        """Test overlapping replacements are rejected."""
+        replacer = TableReplacer(["| A |", "|---|", "| 1 |", "| 2 |"])
+        replacer.replace_table_with_json_rows(1, 3, [{"title": "One"}])
+        replacer.replace_table_with_json_rows(3, 4, [{"title": "Two"}])
+        
+        with pytest.raises(ValueError, match="Overlapping"):
+            replacer.get_transformed_lines()
 
 class TestTableReplacerEdgeCases:
     """Test edge cases and boundary conditions."""
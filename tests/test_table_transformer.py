@@ -7,7 +7,7 @@ Tests the complete pipeline with mocked OpenAI API responses.
 
 import pytest
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from src.transformers.table_transformer import TableTransformer
 from src.transformers.data_models import TransformationReport
 
@@ -145,9 +145,11 @@ class TestTableTransformerDryRun:
                 output_dir=str(tmp_path / "output")
             )
             
-            with patch.object(transformer.openai_transformer, 'transform_table') as mock_transform:
+            with patch.object(transformer.openai_transformer, 'transform_table') as mock_transform, \
+                    patch.object(transformer.openai_transformer, 'atransform_table') as mock_atransform:
                 transformer.transform(dry_run=True)
                 mock_transform.assert_not_called()
+                mock_atransform.assert_not_called()
 
 
 class TestTableTransformerEndToEnd:
@@ -176,7 +178,7 @@ class TestTableTransformerEndToEnd:
                 response_index[0] += 1
                 return (json_objects, 100, 0.001)
             
-            with patch.object(transformer.openai_transformer, 'transform_table', side_effect=mock_transform):
+            with patch.object(transformer.openai_transformer, 'atransform_table', new=AsyncMock(side_effect=mock_transform)):
                 report = transformer.transform(dry_run=False)
             
             # Verify report
@@ -227,7 +229,7 @@ class TestTableTransformerEndToEnd:
                 else:
                     raise ValueError("API Error")
             
-            with patch.object(transformer.openai_transformer, 'transform_table', side_effect=mock_transform):
+            with patch.object(transformer.openai_transformer, 'atransform_table', new=AsyncMock(side_effect=mock_transform)):
                 report = transformer.transform(dry_run=False)
             
             # Verify report shows 1 success, 1 failure
@@ -247,6 +249,345 @@ class TestTableTransformerEndToEnd:
             # Verify second table remains as markdown
             assert "| Spell  | Level |" in content
 
+    
+    def test_tables_processed_concurrently_in_order(
+        self,
+        test_markdown_file,
+        test_table_list_file,
+        tmp_path
+    ):
+        """Test tables are sent concurrently and results keep table order."""
+        import asyncio
+        with patch('src.transformers.table_transformer.TableTransformer._get_api_key', return_value='test-key'):
+            transformer = TableTransformer(
+                markdown_file=str(test_markdown_file),
+                table_list_file=str(test_table_list_file),
+                output_dir=str(tmp_path / "output"),
+                delay_seconds=0
+            )
+            markdown_lines, table_records = transformer._load_files()
+            
+            in_flight = 0
+            peak = 0
+            
+            async def mock_atransform(table, context):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                # The first table finishes last
+                await asyncio.sleep(0.02 if "XP Required" in table else 0.0)
+                in_flight -= 1
+                assert isinstance(table, str)
+                return ([{"title": table.split("\n")[0]}], 10, 0.0001)
+            
+            with patch.object(transformer.openai_transformer, 'atransform_table', new=mock_atransform):
+                results = transformer._process_tables(markdown_lines, table_records)
+            
+            assert peak == 2
+            assert [r.table_record for r in results] == table_records
+            assert "XP Required" in results[0].json_objects[0]["title"]
+            assert all(r.success for r in results)
+    
+    def test_contexts_extracted_once_per_run(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test the estimate and processing steps share one context extraction."""
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key",
+            delay_seconds=0
+        )
+        
+        with patch.object(transformer, '_extract_contexts', wraps=transformer._extract_contexts) as extract, \
+             patch.object(transformer.openai_transformer, 'atransform_table',
+                          new=AsyncMock(return_value=([{"title": "Row"}], 100, 0.001))):
+            report = transformer.transform(dry_run=False)
+        
+        assert report.successful == 2
+        extract.assert_called_once()
+    
+    def test_invalid_table_range_fails_only_that_table(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test a table outside the file fails without affecting the others' contexts."""
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key"
+        )
+        markdown_lines, table_records = transformer._load_files()
+        table_records[1].start_line = len(markdown_lines) + 5
+        table_records[1].end_line = len(markdown_lines) + 10
+        expected_context = transformer._get_context_extractor(markdown_lines).extract_context(
+            table_records[0].start_line, table_records[0].end_line
+        )
+        
+        with patch.object(transformer.openai_transformer, 'atransform_table',
+                          new=AsyncMock(return_value=([{"title": "Row"}], 100, 0.001))) as atransform:
+            results = transformer._process_tables(markdown_lines, table_records)
+        
+        assert results[0].success
+        assert atransform.call_args.args[1] == expected_context
+        assert not results[1].success and "Invalid line numbers" in results[1].error_message
+    
+    def test_overlapping_table_fails_before_api_calls(self, test_markdown_file, tmp_path):
+        """Test a duplicated table list entry fails that table only, and output is still written."""
+        table_list = tmp_path / "duplicate_list.md"
+        table_list.write_text("""**Table**: Fighter Level Progression
+**Location**: Lines 9-12
+
+---
+
+**Table**: Spell List
+**Location**: Lines 16-19
+
+---
+
+**Table**: Fighter Levels Again
+**Location**: Lines 9-12
+""", encoding='utf-8')
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(table_list),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key",
+            delay_seconds=0
+        )
+        
+        with patch.object(transformer.openai_transformer, 'atransform_table',
+                          new=AsyncMock(return_value=([{"title": "Row"}], 100, 0.001))) as atransform:
+            report = transformer.transform(dry_run=False)
+        
+        assert atransform.await_count == 2
+        assert report.successful == 2
+        assert report.failed == 1
+        assert "overlaps" in report.failures[0].error_message
+        assert report.failures[0].table_record.description.endswith("Fighter Levels Again")
+        assert (tmp_path / "output" / "test_doc_with_json_tables.md").exists()
+    
+    def test_tables_per_batch_uses_batched_requests(
+        self,
+        test_markdown_file,
+        test_table_list_file,
+        tmp_path
+    ):
+        """Test batching sends tables together and splits results per table."""
+        with patch('src.transformers.table_transformer.TableTransformer._get_api_key', return_value='test-key'):
+            transformer = TableTransformer(
+                markdown_file=str(test_markdown_file),
+                table_list_file=str(test_table_list_file),
+                output_dir=str(tmp_path / "output"),
+                delay_seconds=0,
+                tables_per_batch=5
+            )
+            markdown_lines, table_records = transformer._load_files()
+            batched = AsyncMock(return_value=[
+                ([{"title": "Fighter"}], 60, 0.0006),
+                ValueError("Batch response missing table 2")
+            ])
+            
+            with patch.object(transformer.openai_transformer, 'transform_tables_batched', new=batched), \
+                    patch.object(transformer.openai_transformer, 'atransform_table') as mock_atransform:
+                results = transformer._process_tables(markdown_lines, table_records)
+            
+            mock_atransform.assert_not_called()
+            items = batched.await_args.args[0]
+            assert len(items) == 2
+            assert batched.await_args.kwargs["max_tables_per_batch"] == 5
+            assert results[0].success and results[0].json_objects == [{"title": "Fighter"}]
+            assert not results[1].success
+            assert "missing table 2" in results[1].error_message
+    
+    def test_batching_lowers_cost_estimate(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test batched tables share the prompt overhead in the estimate."""
+        estimates = []
+        for tables_per_batch in (1, 2):
+            transformer = TableTransformer(
+                markdown_file=str(test_markdown_file),
+                table_list_file=str(test_table_list_file),
+                output_dir=str(tmp_path / "output"),
+                api_key="test-key",
+                tables_per_batch=tables_per_batch
+            )
+            markdown_lines, table_records = transformer._load_files()
+            estimates.append(transformer._estimate_cost(markdown_lines, table_records))
+        
+        assert estimates[1] < estimates[0]
+    
+    def test_cost_estimate_discounts_cached_prompt_prefix(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test requests after the first are estimated with a cached instruction prefix."""
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key"
+        )
+        markdown_lines, table_records = transformer._load_files()
+        single = transformer._estimate_cost(markdown_lines, table_records[:1])
+        repeated = transformer._estimate_cost(markdown_lines, [table_records[0]] * 3)
+        
+        assert single < repeated < 3 * single
+    
+    def test_cost_estimate_overhead_follows_instructions(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test the per-request overhead is the actual instruction prompt length."""
+        from src.transformers.components.openai_transformer import OpenAITransformer
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key"
+        )
+        markdown_lines, table_records = transformer._load_files()
+        base = transformer._estimate_cost(markdown_lines, table_records[:1])
+        
+        with patch.object(OpenAITransformer, 'SYSTEM_INSTRUCTIONS', OpenAITransformer.SYSTEM_INSTRUCTIONS + "x" * 4000):
+            longer = transformer._estimate_cost(markdown_lines, table_records[:1])
+        
+        # 4000 more characters = 1000 more tokens, split 70% input / 30% output
+        assert longer - base == pytest.approx(0.7 * 0.00015 + 0.3 * 0.0006)
+    
+    def test_batch_mode_halves_cost_estimate(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test the Batch API estimate is half the synchronous one."""
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key"
+        )
+        markdown_lines, table_records = transformer._load_files()
+        
+        assert transformer._estimate_cost(markdown_lines, table_records, batch_mode=True) == pytest.approx(
+            transformer._estimate_cost(markdown_lines, table_records) / 2
+        )
+    
+    def test_batch_mode_estimate_ignores_tables_per_batch(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test the Batch API estimate counts one request per table, as it submits them."""
+        estimates = []
+        for tables_per_batch in (1, 2):
+            transformer = TableTransformer(
+                markdown_file=str(test_markdown_file),
+                table_list_file=str(test_table_list_file),
+                output_dir=str(tmp_path / "output"),
+                api_key="test-key",
+                tables_per_batch=tables_per_batch
+            )
+            markdown_lines, table_records = transformer._load_files()
+            estimates.append(transformer._estimate_cost(markdown_lines, table_records, batch_mode=True))
+        
+        assert estimates[0] == pytest.approx(estimates[1])
+    
+    def test_batch_mode_uses_batch_api(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test batch mode submits every table as one Batch API job."""
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key"
+        )
+        markdown_lines, table_records = transformer._load_files()
+        outcomes = [([{"title": "Row"}], 100, 0.001), ValueError("bad table")]
+        
+        with patch.object(transformer.openai_transformer, 'transform_tables_batch_api', return_value=outcomes) as batch_api, \
+             patch.object(transformer.openai_transformer, 'atransform_table', new_callable=AsyncMock) as atransform:
+            results = transformer._process_tables(markdown_lines, table_records, batch_mode=True)
+        
+        assert len(batch_api.call_args.args[0]) == 2
+        atransform.assert_not_called()
+        assert results[0].success and results[0].tokens_used == 100
+        assert not results[1].success and results[1].error_message == "bad table"
+    
+    def test_rerun_with_cache_dir_makes_no_api_calls(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test a second run over unchanged tables is served from the response cache."""
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = '{"rows": [{"title": "Row"}]}'
+        response.usage.prompt_tokens = 80
+        response.usage.completion_tokens = 20
+        
+        reports, call_counts = [], []
+        for _ in range(2):
+            transformer = TableTransformer(
+                markdown_file=str(test_markdown_file),
+                table_list_file=str(test_table_list_file),
+                output_dir=str(tmp_path / "output"),
+                api_key="test-key",
+                delay_seconds=0,
+                cache_dir=str(tmp_path / "cache")
+            )
+            transformer.openai_transformer.async_client = MagicMock()
+            create = transformer.openai_transformer.async_client.chat.completions.create = AsyncMock(return_value=response)
+            reports.append(transformer.transform(dry_run=False))
+            call_counts.append(create.await_count)
+        
+        assert call_counts == [2, 0]
+        assert reports[1].successful == 2
+        assert reports[1].total_tokens == 0
+        assert reports[1].total_cost_usd == 0
+    
+    def test_apply_transformations_independent_of_result_order(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test replacements land on the original line numbers whatever the result order."""
+        from src.transformers.data_models import TransformationResult
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key"
+        )
+        markdown_lines, table_records = transformer._load_files()
+        results = [
+            TransformationResult(
+                table_record=record,
+                json_objects=[{"title": f"Row {i}.{j}"} for j in range(3)],
+                success=True
+            )
+            for i, record in enumerate(table_records)
+        ]
+        
+        forward = transformer._apply_transformations(markdown_lines, results)
+        backward = transformer._apply_transformations(markdown_lines, results[::-1])
+        
+        assert forward == backward
+        for record in table_records:
+            assert markdown_lines[record.start_line - 1] not in forward
+        assert sum(line.lstrip("#").startswith(" Row ") for line in forward) == 6
+    
+    @pytest.mark.parametrize("max_concurrent", [0, -3])
+    def test_non_positive_max_concurrent_still_processes(self, test_markdown_file, test_table_list_file, tmp_path, max_concurrent):
+        """Test max_concurrent below 1 is treated as 1 instead of hanging."""
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key",
+            max_concurrent=max_concurrent
+        )
+        markdown_lines, table_records = transformer._load_files()
+        
+        with patch.object(transformer.openai_transformer, 'atransform_table',
+                          new=AsyncMock(return_value=([{"title": "Row"}], 100, 0.001))):
+            results = transformer._process_tables(markdown_lines, table_records)
+        
+        assert transformer.max_concurrent == 1
+        assert all(result.success for result in results)
+    
+    def test_delay_becomes_request_rate_limit(self, test_markdown_file, test_table_list_file, tmp_path):
+        """Test delay_seconds maps to a requests-per-minute limit unless one is given."""
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key",
+            delay_seconds=2.0
+        )
+        assert transformer.openai_transformer.rate_limiter.requests_per_minute == 30
+        
+        transformer = TableTransformer(
+            markdown_file=str(test_markdown_file),
+            table_list_file=str(test_table_list_file),
+            output_dir=str(tmp_path / "output"),
+            api_key="test-key",
+            delay_seconds=0
+        )
+        assert transformer.openai_transformer.rate_limiter is None
 
 class TestTableTransformerCostLimit:
     """Test cost limit enforcement."""
@@ -334,7 +675,7 @@ class TestTableTransformerProgressTracking:
             def mock_transform(table, context):
                 return ([{"title": "Test", "data": 1}], 50, 0.0005)
             
-            with patch.object(transformer.openai_transformer, 'transform_table', side_effect=mock_transform):
+            with patch.object(transformer.openai_transformer, 'atransform_table', new=AsyncMock(side_effect=mock_transform)):
                 transformer.transform(dry_run=False)
             
             captured = capsys.readouterr()